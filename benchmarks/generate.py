@@ -0,0 +1,107 @@
+"""Deterministic synthetic sales data in the same 14-column layout as data/sales_data.csv.
+
+    uv run -m benchmarks.generate data/sales_1m.csv --rows 1000000
+"""
+import argparse
+import csv
+import random
+from datetime import date, timedelta
+from typing import Dict, Iterator
+
+COLUMNS = [
+    'Product_ID', 'Sale_Date', 'Sales_Rep', 'Region', 'Sales_Amount', 'Quantity_Sold', 'Product_Category',
+    'Unit_Cost', 'Unit_Price', 'Customer_Type', 'Discount', 'Payment_Method', 'Sales_Channel', 'Region_and_Sales_Rep',
+]
+
+SALES_REPS = ['Alice', 'Bob', 'Charlie', 'David', 'Eve']
+REGIONS = ['North', 'South', 'East', 'West']
+CATEGORIES = ['Electronics', 'Furniture', 'Clothing', 'Food']
+CUSTOMER_TYPES = ['New', 'Returning']
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'Bank Transfer']
+SALES_CHANNELS = ['Online', 'Retail']
+
+FIRST_SALE = date(2023, 1, 1)
+SALE_DAYS = 366
+
+# Formats a sale date is written in when it is not ISO (see `mixed_date_rate`)
+OTHER_DATE_FORMATS = ['%Y/%m/%d', '%d-%m-%Y', '%m/%d/%Y']
+DEFAULT_MISSING_RATE = 0.01
+DEFAULT_MIXED_DATE_RATE = 0.05
+
+
+def generate_rows(
+    num_rows: int, seed: int = 0, missing_rate: float = DEFAULT_MISSING_RATE, mixed_date_rate: float = DEFAULT_MIXED_DATE_RATE,
+) -> Iterator[Dict[str, str]]:
+    """Yield `num_rows` sales rows as CSV strings; the same arguments always give the same rows.
+
+    Each value is left empty with probability `missing_rate`. A fraction
+    `mixed_date_rate` of the sale dates is written in one of OTHER_DATE_FORMATS
+    instead of YYYY-MM-DD.
+    """
+    rng = random.Random(seed)
+    days = [FIRST_SALE + timedelta(days=offset) for offset in range(SALE_DAYS)]
+    iso_days = [day.isoformat() for day in days]
+
+    for _ in range(num_rows):
+        day_index = rng.randrange(SALE_DAYS)
+        sale_date = iso_days[day_index]
+        if mixed_date_rate and rng.random() < mixed_date_rate:
+            sale_date = days[day_index].strftime(rng.choice(OTHER_DATE_FORMATS))
+
+        rep = rng.choice(SALES_REPS)
+        region = rng.choice(REGIONS)
+        unit_cost = round(rng.uniform(60, 5000), 2)
+        row = {
+            'Product_ID': str(rng.randint(1001, 1100)),
+            'Sale_Date': sale_date,
+            'Sales_Rep': rep,
+            'Region': region,
+            'Sales_Amount': f"{rng.uniform(100, 10000):.2f}",
+            'Quantity_Sold': str(rng.randint(1, 49)),
+            'Product_Category': rng.choice(CATEGORIES),
+            'Unit_Cost': f"{unit_cost:.2f}",
+            'Unit_Price': f"{unit_cost + rng.uniform(10, 500):.2f}",
+            'Customer_Type': rng.choice(CUSTOMER_TYPES),
+            'Discount': str(rng.randint(0, 30) / 100),
+            'Payment_Method': rng.choice(PAYMENT_METHODS),
+            'Sales_Channel': rng.choice(SALES_CHANNELS),
+            'Region_and_Sales_Rep': f"{region}-{rep}",
+        }
+        if missing_rate:
+            for col in COLUMNS:
+                if rng.random() < missing_rate:
+                    row[col] = ""
+        yield row
+
+
+def write_csv(
+    file_path: str, num_rows: int, seed: int = 0,
+    missing_rate: float = DEFAULT_MISSING_RATE, mixed_date_rate: float = DEFAULT_MIXED_DATE_RATE,
+) -> None:
+    """Write generated rows to `file_path`, streaming, so any row count fits in memory."""
+    with open(file_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(generate_rows(num_rows, seed, missing_rate, mixed_date_rate))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales dataset")
+    parser.add_argument("output", type=str, help="Path of the CSV file to write")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of rows to generate")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same file")
+    parser.add_argument("--missing-rate", type=float, default=DEFAULT_MISSING_RATE, help="Fraction of values left empty")
+    parser.add_argument(
+        "--mixed-date-rate",
+        type=float,
+        default=DEFAULT_MIXED_DATE_RATE,
+        help=f"Fraction of sale dates not in YYYY-MM-DD (default: {DEFAULT_MIXED_DATE_RATE})"
+    )
+    args = parser.parse_args()
+
+    write_csv(args.output, args.rows, args.seed, args.missing_rate, args.mixed_date_rate)
+    print(f"Wrote {args.rows} rows to '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
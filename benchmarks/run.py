@@ -0,0 +1,211 @@
+"""Time every pipeline stage of each implementation on a generated dataset.
+
+    uv run -m benchmarks.run --rows 1000000
+    uv run -m benchmarks.run --dataset data/sales_1m.csv --impl functional imperative
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from benchmarks.generate import DEFAULT_MISSING_RATE, DEFAULT_MIXED_DATE_RATE, write_csv
+from core.io import iter_csv, load_csv, save_csv
+from core.schema import DEFAULT_SAMPLE_ROWS, Schema
+
+STAGES = ['load', 'clean', 'transform', 'aggregate', 'analyze', 'save']
+
+DEFAULT_CONFIG = {
+    'missing_data_action': 'remove',
+    'filter': {'apply': True, 'column': 'Sales_Amount', 'operator': '>', 'value': 3000.0},
+    'compute': 'Profit',
+    'aggregate': 'Aggregate total sales by region',
+}
+
+
+def _load(dataset_path: str, columnar: bool = False) -> Tuple[Any, Schema]:
+    # As main.py does: the schema is inferred once from the first rows and decides the column storage
+    schema = Schema.infer(next(iter_csv(dataset_path, DEFAULT_SAMPLE_ROWS), []))
+    return load_csv(dataset_path, columnar=columnar, schema=schema), schema
+
+
+def functional_stages(dataset_path: str, config: Dict[str, Any], output_path: str) -> Iterator[str]:
+    from functional_impl.analysis import analyze
+    from functional_impl.cleaning import clean
+    from functional_impl.transformation import aggregate_by_key, transform
+
+    data, schema = _load(dataset_path)
+    yield 'load'
+    data = clean(data, config, schema)
+    yield 'clean'
+    data = transform(data, config, schema)
+    yield 'transform'
+    aggregate_by_key(data, config)
+    yield 'aggregate'
+    analyze(data, config.get('quantiles'), schema)
+    yield 'analyze'
+    save_csv(data, output_path)
+    yield 'save'
+
+
+def imperative_stages(dataset_path: str, config: Dict[str, Any], output_path: str) -> Iterator[str]:
+    from imperative_impl.analysis import DataAnalyzer
+    from imperative_impl.cleaning import DataCleaner
+    from imperative_impl.transformation import DataTransformer
+
+    data, schema = _load(dataset_path)
+    yield 'load'
+    cleaner = DataCleaner(data, config, schema)
+    cleaner.clean()
+    yield 'clean'
+    transformer = DataTransformer(cleaner.data, config, schema)
+    transformer.transform()
+    yield 'transform'
+    transformer.aggregate_by_key()
+    yield 'aggregate'
+    DataAnalyzer(transformer.data, config.get('quantiles'), schema).analyze()
+    yield 'analyze'
+    save_csv(transformer.data, output_path)
+    yield 'save'
+
+
+def numpy_stages(dataset_path: str, config: Dict[str, Any], output_path: str) -> Iterator[str]:
+    from numpy_impl.analysis import analyze
+    from numpy_impl.cleaning import clean
+    from numpy_impl.frame import to_frame, to_table
+    from numpy_impl.transformation import aggregate_by_key, transform
+
+    table, schema = _load(dataset_path, columnar=True)
+    yield 'load'
+    frame = clean(to_frame(table, schema), config, schema)
+    yield 'clean'
+    frame = transform(frame, config, schema)
+    yield 'transform'
+    aggregate_by_key(frame, config)
+    yield 'aggregate'
+    analyze(frame, config.get('quantiles'), schema)
+    yield 'analyze'
+    save_csv(to_table(frame), output_path)
+    yield 'save'
+
+
+IMPLEMENTATIONS: Dict[str, Callable[[str, Dict[str, Any], str], Iterator[str]]] = {
+    'functional': functional_stages,
+    'imperative': imperative_stages,
+    'numpy': numpy_stages,
+}
+
+
+def measure(stages: Iterator[str], trace_memory: bool = True) -> Dict[str, Tuple[float, Optional[int]]]:
+    """Run a stage generator, returning each stage's wall time and peak traced memory (bytes, or None)."""
+    results: Dict[str, Tuple[float, Optional[int]]] = {}
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        for stage in stages:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+            results[stage] = (elapsed, peak)
+            if trace_memory:
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return results
+
+
+def format_table(num_rows: int, results: Dict[str, Dict[str, Tuple[float, Optional[int]]] | str]) -> str:
+    """Side-by-side table of seconds, rows/s and peak MB per stage for every implementation."""
+    names = list(results)
+    header = f"{'stage':<10}" + "".join(f" | {name:^32}" for name in names)
+    subheader = f"{'':<10}" + "".join(f" | {'seconds':>9} {'rows/s':>11} {'peak MB':>10}" for _ in names)
+    lines = [header, subheader, "-" * len(subheader)]
+
+    def cell(measured: Tuple[float, Optional[int]] | None) -> str:
+        if measured is None:
+            return f" | {'-':>9} {'-':>11} {'-':>10}"
+        seconds, peak = measured
+        rate = num_rows / seconds if seconds > 0 else float('inf')
+        peak_mb = f"{peak / 2 ** 20:.1f}" if peak is not None else "-"
+        return f" | {seconds:>9.3f} {rate:>11,.0f} {peak_mb:>10}"
+
+    for stage in STAGES:
+        lines.append(f"{stage:<10}" + "".join(
+            cell(result.get(stage)) if isinstance(result, dict) else cell(None) for result in results.values()
+        ))
+
+    totals = []
+    for result in results.values():
+        if isinstance(result, dict):
+            peaks = [peak for _, peak in result.values() if peak is not None]
+            totals.append((sum(seconds for seconds, _ in result.values()), max(peaks) if peaks else None))
+        else:
+            totals.append(None)
+    lines.append("-" * len(subheader))
+    lines.append(f"{'total':<10}" + "".join(cell(total) for total in totals))
+
+    for name, result in results.items():
+        if isinstance(result, str):
+            lines.append(f"{name} failed: {result}")
+    return "\n".join(lines)
+
+
+def run(dataset_path: str, impls: List[str], config: Dict[str, Any], trace_memory: bool = True) -> Dict[str, Dict[str, Tuple[float, Optional[int]]] | str]:
+    """Benchmark each implementation on the dataset. A failing implementation maps to its error message."""
+    results: Dict[str, Dict[str, Tuple[float, Optional[int]]] | str] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in impls:
+            output_path = os.path.join(tmp_dir, f"{name}_output.csv")
+            try:
+                # The stages print progress messages of their own
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = measure(IMPLEMENTATIONS[name](dataset_path, dict(config), output_path), trace_memory)
+            except Exception as e:
+                results[name] = f"{type(e).__name__}: {e}"
+    return results
+
+
+def count_rows(dataset_path: str) -> int:
+    with open(dataset_path, 'rb') as file:
+        return max(sum(1 for _ in file) - 1, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline implementations stage by stage")
+    parser.add_argument("--dataset", type=str, default=None, help="CSV file to benchmark on (default: generate one)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows to generate when no dataset is given")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated dataset")
+    parser.add_argument("--missing-rate", type=float, default=DEFAULT_MISSING_RATE, help="Fraction of generated values left empty")
+    parser.add_argument(
+        "--mixed-date-rate",
+        type=float,
+        default=DEFAULT_MIXED_DATE_RATE,
+        help=f"Fraction of generated sale dates not in YYYY-MM-DD (default: {DEFAULT_MIXED_DATE_RATE})"
+    )
+    parser.add_argument("--missing-action", choices=['remove', 'fill'], default='remove', help="How the pipeline handles missing values")
+    parser.add_argument("--impl", nargs='+', choices=list(IMPLEMENTATIONS), default=['functional', 'imperative'], help="Implementations to run")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory tracing, which slows every stage down")
+    args = parser.parse_args()
+
+    config = {**DEFAULT_CONFIG, 'missing_data_action': args.missing_action}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset_path = args.dataset
+        if dataset_path is None:
+            dataset_path = os.path.join(tmp_dir, 'sales.csv')
+            print(f"Generating {args.rows} rows...")
+            write_csv(dataset_path, args.rows, args.seed, args.missing_rate, args.mixed_date_rate)
+
+        num_rows = count_rows(dataset_path)
+        print(f"Benchmarking {', '.join(args.impl)} on {num_rows} rows (rows/s is dataset rows per second of the stage)\n")
+        print(format_table(num_rows, run(dataset_path, args.impl, config, not args.no_memory)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Check that the functional pipeline's time grows linearly with the row count.
+
+    uv run -m benchmarks.scaling
+    uv run -m benchmarks.scaling --rows 10000 100000 --max-ratio 1.5
+
+Each size is generated with the same seed and run through every stage of the
+functional implementation. The time per row at the largest size is compared
+with the smallest: a quadratic reduction makes it grow with the row count
+(10x per row from 10k to 100k), a linear pipeline keeps it about level. The
+exit status is 1 when the ratio is above `--max-ratio`.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import Dict, List
+
+from benchmarks.generate import write_csv
+from benchmarks.run import DEFAULT_CONFIG, run
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+# Per-row time may grow somewhat with size (cache misses, GC); quadratic growth is far beyond this
+DEFAULT_MAX_RATIO = 2.0
+
+
+def time_sizes(sizes: List[int], impl: str = 'functional', seed: int = 0) -> Dict[int, float]:
+    """Total seconds of every stage of `impl` on a generated dataset of each size."""
+    seconds: Dict[int, float] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_rows in sizes:
+            dataset_path = os.path.join(tmp_dir, f'sales_{num_rows}.csv')
+            write_csv(dataset_path, num_rows, seed)
+            result = run(dataset_path, [impl], DEFAULT_CONFIG, trace_memory=False)[impl]
+            os.remove(dataset_path)
+            if isinstance(result, str):
+                raise RuntimeError(f"{impl} failed on {num_rows} rows: {result}")
+            seconds[num_rows] = sum(elapsed for elapsed, _ in result.values())
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that pipeline time grows linearly with the number of rows")
+    parser.add_argument("--rows", type=int, nargs='+', default=DEFAULT_ROWS, help="Dataset sizes to time (default: 10k 100k 1M)")
+    parser.add_argument("--impl", choices=['functional', 'imperative', 'numpy'], default='functional', help="Implementation to time (default: functional)")
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=DEFAULT_MAX_RATIO,
+        help=f"Largest allowed time per row at the largest size over the smallest (default: {DEFAULT_MAX_RATIO})"
+    )
+    args = parser.parse_args()
+
+    sizes = sorted(set(args.rows))
+    seconds = time_sizes(sizes, args.impl)
+    base = seconds[sizes[0]] / sizes[0]
+    print(f"{'rows':>10} {'seconds':>9} {'us/row':>8} {'vs ' + format(sizes[0], ','):>10}")
+    for num_rows in sizes:
+        per_row = seconds[num_rows] / num_rows
+        print(f"{num_rows:>10,} {seconds[num_rows]:>9.2f} {per_row * 1e6:>8.1f} {per_row / base:>9.2f}x")
+
+    ratio = (seconds[sizes[-1]] / sizes[-1]) / base
+    if ratio > args.max_ratio:
+        print(f"Not linear: time per row grew {ratio:.2f}x from {sizes[0]:,} to {sizes[-1]:,} rows (allowed {args.max_ratio}x)")
+        sys.exit(1)
+    print(f"Linear: time per row changed {ratio:.2f}x from {sizes[0]:,} to {sizes[-1]:,} rows")
+
+
+if __name__ == "__main__":
+    main()
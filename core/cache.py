@@ -0,0 +1,175 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Any, Dict, Optional
+
+from core.schema import Schema
+from core.table import DictColumn, NumberColumn, Table
+
+CACHE_DIR_NAME = '.pipeline_cache'
+DEFAULT_MAX_BYTES = 512 * 2 ** 20
+
+# File layout: magic, 8-byte header length, JSON header, then each column's
+# array buffer at the 8-byte aligned offset the header gives for it.
+_MAGIC = b'DPCOL1\n'
+_HEADER_LENGTH = struct.Struct('<Q')
+_INDEX_FILE = 'index.json'
+
+
+def default_cache_dir(file_path: str) -> str:
+    """The cache directory next to the source file."""
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME)
+
+
+def content_hash(file_path: str) -> str:
+    with open(file_path, 'rb') as file:
+        return hashlib.file_digest(file, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+def write_table(table: Table, file_path: str) -> int:
+    """Write a Table in the binary columnar format, returning the file size in bytes."""
+    columns, buffers, offset = [], [], 0
+    for name, column in table.columns.items():
+        if isinstance(column, NumberColumn):
+            spec: Dict[str, Any] = {'name': name, 'kind': 'number'}
+            data = column.values
+        else:
+            spec = {'name': name, 'kind': 'dict', 'dictionary': column.dictionary}
+            data = column.codes
+        spec.update({'offset': offset, 'nbytes': data.itemsize * len(data)})
+        columns.append(spec)
+        buffers.append(data)
+        offset += -(-spec['nbytes'] // 8) * 8
+
+    header = json.dumps({'length': table.length, 'byteorder': sys.byteorder, 'columns': columns}).encode('utf-8')
+    start = len(_MAGIC) + _HEADER_LENGTH.size + len(header)
+    padding = -start % 8
+
+    with open(file_path, 'wb') as file:
+        file.write(_MAGIC)
+        file.write(_HEADER_LENGTH.pack(len(header) + padding))
+        file.write(header + b' ' * padding)
+        for spec, data in zip(columns, buffers):
+            data.tofile(file)
+            file.write(b'\0' * (-spec['nbytes'] % 8))
+        return file.tell()
+
+
+def read_table(file_path: str) -> Table:
+    """Memory-map a file written by `write_table` and copy each column buffer into its array."""
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if mapped[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"'{file_path}' is not a dataset cache file")
+        (header_length,) = _HEADER_LENGTH.unpack_from(mapped, len(_MAGIC))
+        start = len(_MAGIC) + _HEADER_LENGTH.size
+        header = json.loads(mapped[start:start + header_length])
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f"'{file_path}' was written on a {header['byteorder']}-endian machine")
+
+        start += header_length
+        table = Table(length=header['length'])
+        with memoryview(mapped) as view:
+            for spec in header['columns']:
+                data = array('d' if spec['kind'] == 'number' else 'i')
+                begin = start + spec['offset']
+                data.frombytes(view[begin:begin + spec['nbytes']])
+                table.columns[spec['name']] = (
+                    NumberColumn(data) if spec['kind'] == 'number' else DictColumn(data, spec['dictionary'])
+                )
+        return table
+
+
+class DatasetCache:
+    """Parsed datasets stored as binary columnar files in `cache_dir`, evicted least recently used first.
+
+    Entries are found by content hash and column types, so an edited file is
+    never served stale while a touched or copied one still hits. The hash is only
+    recomputed when the source's path, size or mtime no longer match the index.
+    The total size of the cache files is kept under `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, _INDEX_FILE)
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(index, file, indent=2)
+        os.replace(temp_path, self.index_path)
+
+    def key(self, file_path: str, schema: Schema, index: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """Cache key of a source file read with `schema`: its content hash combined with the column types."""
+        source = os.path.abspath(file_path)
+        stat = os.stat(source)
+        digest = next((
+            entry['content_hash'] for entry in (index or {}).values()
+            if entry['source'] == source and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+        ), None) or content_hash(source)
+        types = json.dumps(sorted(schema.items()))
+        return f"{digest}-{hashlib.blake2b(types.encode('utf-8'), digest_size=8).hexdigest()}"
+
+    def get(self, file_path: str, schema: Schema) -> Optional[Table]:
+        """The cached Table of `file_path`, or None on a miss."""
+        index = self._read_index()
+        key = self.key(file_path, schema, index)
+        entry = index.get(key)
+        if entry is None:
+            return None
+        try:
+            table = read_table(os.path.join(self.cache_dir, entry['file']))
+        except (OSError, ValueError):
+            del index[key]
+            self._write_index(index)
+            return None
+
+        stat = os.stat(file_path)
+        entry.update({
+            'source': os.path.abspath(file_path), 'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns, 'last_used': time.time(),
+        })
+        self._write_index(index)
+        return table
+
+    def put(self, file_path: str, schema: Schema, table: Table) -> None:
+        """Store the Table parsed from `file_path`, then evict entries until the cache fits in `max_bytes`."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index = self._read_index()
+        key = self.key(file_path, schema, index)
+        file_name = f"{key}.colcache"
+        temp_path = os.path.join(self.cache_dir, f"{file_name}.{os.getpid()}.tmp")
+        size = write_table(table, temp_path)
+        os.replace(temp_path, os.path.join(self.cache_dir, file_name))
+
+        stat = os.stat(file_path)
+        index[key] = {
+            'file': file_name, 'source': os.path.abspath(file_path), 'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns, 'content_hash': key.split('-')[0],
+            'bytes': size, 'last_used': time.time(),
+        }
+        self._evict(index)
+        self._write_index(index)
+
+    def _evict(self, index: Dict[str, Dict[str, Any]]) -> None:
+        total = sum(entry['bytes'] for entry in index.values())
+        for key in sorted(index, key=lambda key: index[key]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]['bytes']
+            try:
+                os.remove(os.path.join(self.cache_dir, index.pop(key)['file']))
+            except FileNotFoundError:
+                pass
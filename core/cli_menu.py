@@ -1,14 +1,30 @@
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import re
 from InquirerPy import inquirer
-from core.utils import infer_column_types
+from prompt_toolkit.validation import ValidationError, Validator
+from core.config import NUMBER_OPERATORS, STRING_OPERATORS
+from core.expressions import check_expression, parse_expression
+from core.schema import Schema
 
 
-def main_menu(dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+class _ExpressionValidator(Validator):
+    """Rejects filter expressions that do not parse or do not fit the dataset, showing why."""
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+
+    def validate(self, document) -> None:
+        try:
+            check_expression(parse_expression(document.text), self.schema)
+        except ValueError as e:
+            raise ValidationError(message=str(e), cursor_position=len(document.text))
+
+
+def main_menu(dataset: List[Dict[str, Any]], schema: Optional[Schema] = None) -> Dict[str, Any]:
     answers: Dict[str, Any] = {}
 
     cols = list(dataset[0].keys()) if dataset else []
-    col_types = infer_column_types(dataset)
+    col_types = schema if schema is not None else Schema.infer(dataset)
 
     # Missing data handling
     missing_choice = inquirer.select( # type: ignore
@@ -22,13 +38,21 @@ def main_menu(dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
     # Filter rows
     filter_choice = inquirer.select( # type: ignore
         message="Filter rows based on conditions or skip?",
-        choices=["Skip filtering", "Filter rows"],
+        choices=["Skip filtering", "Filter rows", "Filter rows with an expression"],
         pointer="➜",
     ).execute()
 
     answers['filter'] = {'apply': filter_choice.startswith('Filter')}
 
-    if answers['filter']['apply']:
+    if filter_choice == "Filter rows with an expression":
+        expression = inquirer.text( # type: ignore
+            message="Enter a filter expression, e.g. Region in ('North', 'West') and Sales_Amount > 1000:",
+            validate=_ExpressionValidator(col_types),
+        ).execute()
+
+        answers['filter']['expression'] = expression.strip()
+
+    elif answers['filter']['apply']:
         # choose a column
         col = inquirer.select( # type: ignore
             message="Select a column to filter on:",
@@ -38,10 +62,7 @@ def main_menu(dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
 
         ctype = col_types.get(col, 'string')
 
-        if ctype == 'number':
-            ops = ['>', '<', '<=', '>=', '==']
-        else:
-            ops = ['Exactly equal', 'Contains']
+        ops = NUMBER_OPERATORS if ctype == 'number' else STRING_OPERATORS
 
         op = inquirer.select( # type: ignore
             message=f"Select operator for column '{col}':",
@@ -86,3 +107,10 @@ def main_menu(dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
 
     return answers
 
+
+def ask_again() -> bool:
+    """Whether to run another query against the dataset that is already loaded."""
+    return inquirer.confirm( # type: ignore
+        message="Run another query on the same dataset?",
+        default=False,
+    ).execute()
@@ -0,0 +1,151 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from core.expressions import check_expression, parse_expression
+from core.groupby import NUMERIC_AGGREGATES, parse_aggregate, parse_key
+from core.schema import Schema
+
+MISSING_DATA_ACTIONS = ['remove', 'fill']
+NUMBER_OPERATORS = ['>', '<', '<=', '>=', '==']
+STRING_OPERATORS = ['Exactly equal', 'Contains']
+COMPUTE_CHOICES = ['Profit']
+AGGREGATE_CHOICES = ['Aggregate total sales by region']
+OUTPUT_CHOICES = ['Save to CSV', 'Print summary to console']
+
+# Short spellings accepted on the command line and in config files
+ALIASES = {
+    'equals': 'Exactly equal',
+    'exactly equal': 'Exactly equal',
+    'contains': 'Contains',
+    'profit': 'Profit',
+    'region': 'Aggregate total sales by region',
+    'csv': 'Save to CSV',
+    'summary': 'Print summary to console',
+}
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, str):
+        return ALIASES.get(value.strip().lower(), value)
+    return value
+
+
+def _choice(config: Dict[str, Any], key: str, choices: List[str], allow_none: bool) -> Any:
+    value = _canonical(config.get(key))
+    if value in (None, 'none', 'None') and allow_none:
+        return None
+    if value not in choices:
+        allowed = ", ".join(repr(choice) for choice in choices) + (", null" if allow_none else "")
+        raise ValueError(f"Invalid {key} {config.get(key)!r}; expected one of {allowed}")
+    return value
+
+
+def validate_config(config: Dict[str, Any], schema: Schema) -> Dict[str, Any]:
+    """Check a batch-mode config against the dataset's schema and return it in the form `main_menu` produces.
+
+    Missing keys get the batch defaults: remove rows with missing values, no
+    filter, compute and aggregation, and print a summary. The filter is either
+    the menu's column/operator/value condition or an `expression` (see
+    `core.expressions.parse_expression`), which may also be given as a plain
+    string. `group_by` takes the `keys` and `aggregates` of `core.groupby.GroupBy`.
+    Raises ValueError on anything the interactive menu would not have allowed.
+    """
+    validated: Dict[str, Any] = {
+        'missing_data_action': _choice({'missing_data_action': config.get('missing_data_action', 'remove')}, 'missing_data_action', MISSING_DATA_ACTIONS, False),
+        'filter': {'apply': False},
+        'compute': _choice(config, 'compute', COMPUTE_CHOICES, True),
+        'aggregate': _choice(config, 'aggregate', AGGREGATE_CHOICES, True),
+        'output': _choice({'output': config.get('output', 'summary')}, 'output', OUTPUT_CHOICES, False),
+    }
+
+    filter_config = config.get('filter') or {}
+    if isinstance(filter_config, str):
+        filter_config = {'expression': filter_config}
+    if filter_config.get('apply', True) and filter_config.get('expression') is not None:
+        expression = str(filter_config['expression'])
+        check_expression(parse_expression(expression), schema)
+        validated['filter'] = {'apply': True, 'expression': expression}
+    elif filter_config.get('apply', True) and filter_config.get('column') is not None:
+        col = filter_config['column']
+        if col not in schema:
+            raise ValueError(f"Unknown filter column '{col}'; the dataset has {', '.join(schema)}")
+        if schema.get(col) == 'number':
+            operators, value = NUMBER_OPERATORS, filter_config.get('value')
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Filter value for number column '{col}' must be numeric, got {value!r}")
+        else:
+            operators, value = STRING_OPERATORS, str(filter_config.get('value', '')).strip()
+            if not value:
+                raise ValueError(f"Filter value for column '{col}' must not be empty")
+        operator = _canonical(filter_config.get('operator'))
+        if operator not in operators:
+            raise ValueError(f"Invalid operator {filter_config.get('operator')!r} for column '{col}'; expected one of {', '.join(operators)}")
+        validated['filter'] = {'apply': True, 'column': col, 'operator': operator, 'value': value}
+
+    if config.get('group_by'):
+        validated['group_by'] = _group_by(config['group_by'], schema)
+
+    # Optional settings the menu never asks for pass through unchanged
+    for key in config.keys() - validated.keys():
+        validated[key] = config[key]
+    return validated
+
+
+def _group_by(group_by: Any, schema: Schema) -> Dict[str, List[str]]:
+    """Check a `group_by` setting's keys and aggregates against the schema (computed columns included)."""
+    if not isinstance(group_by, dict):
+        raise ValueError(f"Invalid group_by {group_by!r}; expected an object with 'keys' and 'aggregates'")
+    col_types = {**schema, **{col: 'number' for col in COMPUTE_CHOICES}}
+    keys = [str(spec) for spec in group_by.get('keys') or []]
+    aggregates = [str(spec) for spec in group_by.get('aggregates') or ['count']]
+
+    for spec in keys:
+        col, unit = parse_key(spec)
+        if col not in col_types:
+            raise ValueError(f"Unknown group key column '{col}'; the dataset has {', '.join(schema)}")
+        if unit == 'month' and col_types[col] != 'date':
+            raise ValueError(f"Group key '{spec}' needs a date column; '{col}' is a {col_types[col]} column")
+    for spec in aggregates:
+        function, col = parse_aggregate(spec)
+        if col is not None and col not in col_types:
+            raise ValueError(f"Unknown aggregate column '{col}'; the dataset has {', '.join(schema)}")
+        if function in NUMERIC_AGGREGATES and col_types[col] != 'number':
+            raise ValueError(f"Aggregate '{spec}' needs a number column; '{col}' is a {col_types[col]} column")
+    return {'keys': keys, 'aggregates': aggregates}
+
+
+def load_config(file_path: str) -> Dict[str, Any]:
+    """Read a batch-mode config JSON file, with the same keys `main_menu` returns."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+    if not isinstance(config, dict):
+        raise ValueError(f"Config file '{file_path}' must contain a JSON object")
+    return config
+
+
+def config_from_args(args: Any, base: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Overlay the batch-mode command-line flags that were given on `base` (e.g. a loaded config file)."""
+    config = dict(base or {})
+    if args.missing is not None:
+        config['missing_data_action'] = args.missing
+    if args.filter is not None:
+        column, operator, value = args.filter
+        config['filter'] = {'apply': True, 'column': column, 'operator': operator, 'value': value}
+    if args.where is not None:
+        config['filter'] = {'apply': True, 'expression': args.where}
+    if args.compute is not None:
+        config['compute'] = args.compute
+    if args.aggregate is not None:
+        config['aggregate'] = args.aggregate
+    if args.group_by is not None or args.agg is not None:
+        group_by = dict(config.get('group_by') or {})
+        if args.group_by is not None:
+            group_by['keys'] = args.group_by
+        if args.agg is not None:
+            group_by['aggregates'] = args.agg
+        config['group_by'] = group_by
+    if args.output is not None:
+        config['output'] = args.output
+    return config
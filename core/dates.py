@@ -0,0 +1,58 @@
+from datetime import date
+from typing import Any, Callable, Dict, Optional
+
+ISO_FORMAT = '%Y-%m-%d'
+# Distinct raw values remembered per column; real date columns have a few hundred to a few thousand
+DEFAULT_MEMO_SIZE = 100_000
+
+_MISSING = object()
+
+
+def is_iso_date(text: str) -> bool:
+    """Whether `text` is exactly a valid YYYY-MM-DD date, checked without `strptime`."""
+    if len(text) != 10 or text[4] != '-' or text[7] != '-' or not text.isascii():
+        return False
+    year, month, day = text[:4], text[5:7], text[8:]
+    if not (year.isdigit() and month.isdigit() and day.isdigit()):
+        return False
+    try:
+        date(int(year), int(month), int(day))
+    except ValueError:
+        return False
+    return True
+
+
+class DateStandardizer:
+    """Maps the raw values of one date column to YYYY-MM-DD strings, parsing each distinct value once.
+
+    `fmt` is the column's detected format (`Schema.date_formats`) and `parse`
+    the implementation's `(text, fmt) -> datetime | None` parser, called only on
+    a memo miss. Values already in ISO form are recognized without `strptime`,
+    unless `fmt` could read them as another date. Values `parse` cannot handle
+    (None) are kept as they are; exceptions from `parse` propagate and are not
+    remembered. At most `max_size` values are remembered, the oldest dropped first.
+    """
+
+    def __init__(self, fmt: Optional[str], parse: Callable[[str, Optional[str]], Any], max_size: int = DEFAULT_MEMO_SIZE):
+        self.fmt = fmt
+        self.parse = parse
+        self.max_size = max_size
+        # A format like %Y-%d-%m would read an ISO string as a different date
+        self.iso_fast_path = fmt is None or fmt == ISO_FORMAT or not fmt.startswith('%Y-')
+        self.memo: Dict[Any, Any] = {}
+
+    def __call__(self, value: Any) -> Any:
+        standardized = self.memo.get(value, _MISSING)
+        if standardized is _MISSING:
+            standardized = self._standardize(value)
+            if len(self.memo) >= self.max_size:
+                del self.memo[next(iter(self.memo))]
+            self.memo[value] = standardized
+        return standardized
+
+    def _standardize(self, value: Any) -> Any:
+        text = str(value)
+        if self.iso_fast_path and is_iso_date(text):
+            return text
+        parsed = self.parse(text, self.fmt)
+        return parsed.strftime(ISO_FORMAT) if parsed else value
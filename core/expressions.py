@@ -0,0 +1,353 @@
+import math
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from core.dates import ISO_FORMAT, is_iso_date
+from core.schema import DATE_FORMATS
+
+# Operators of the single-condition filters the menu builds, in expression terms
+LEGACY_OPERATORS = {'Exactly equal': '==', 'Contains': 'contains'}
+
+_COMPARISONS = ('>', '<', '>=', '<=', '==', '!=')
+_KEYWORDS = ('and', 'or', 'not', 'in', 'between', 'contains')
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*|`[^`]+`)
+      | (?P<op>>=|<=|!=|==|=|>|<|\(|\)|,)
+    )""", re.VERBOSE)
+
+
+class Condition(NamedTuple):
+    """`column operator values`: one literal for a comparison or `contains`, two for `between`, any number for `in`."""
+    column: str
+    operator: str
+    values: Tuple[Any, ...]
+
+
+class Logical(NamedTuple):
+    """`and` / `or` of two or more operands, or `not` of one."""
+    operator: str
+    operands: Tuple[Any, ...]
+
+
+Expression = Condition | Logical
+
+
+def _tokenize(text: str) -> List[Tuple[str, Any, int]]:
+    tokens, position = [], 0
+    while text[position:].strip():
+        match = _TOKEN.match(text, position)
+        if match is None:
+            position += len(text[position:]) - len(text[position:].lstrip())
+            raise ValueError(f"Unexpected character {text[position]!r} at position {position} of filter expression")
+        kind = match.lastgroup
+        raw = match.group(kind)
+        if kind == 'number':
+            value: Any = float(raw)
+        elif kind == 'string':
+            value = raw[1:-1].replace(raw[0] * 2, raw[0])
+        elif kind == 'name' and raw.startswith('`'):
+            kind, value = 'column', raw[1:-1]
+        elif kind == 'name':
+            kind, value = ('keyword', raw.lower()) if raw.lower() in _KEYWORDS else ('column', raw)
+        else:
+            value = '==' if raw == '=' else raw
+        tokens.append((kind, value, match.start(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over the tokens: `or` binds loosest, then `and`, then `not`."""
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.index = 0
+
+    def parse(self) -> Expression:
+        if not self.tokens:
+            raise ValueError("Empty filter expression")
+        expression = self._or()
+        if self.index < len(self.tokens):
+            self._fail("end of expression")
+        return expression
+
+    def _peek(self, kind: str, value: Any = None) -> bool:
+        if self.index >= len(self.tokens):
+            return False
+        token_kind, token_value, _ = self.tokens[self.index]
+        return token_kind == kind and (value is None or token_value == value)
+
+    def _take(self, kind: str, value: Any = None, expected: Optional[str] = None) -> Any:
+        if not self._peek(kind, value):
+            self._fail(expected or repr(value))
+        self.index += 1
+        return self.tokens[self.index - 1][1]
+
+    def _fail(self, expected: str) -> None:
+        if self.index >= len(self.tokens):
+            raise ValueError(f"Filter expression ended early; expected {expected}")
+        _, value, position = self.tokens[self.index]
+        raise ValueError(f"Expected {expected} at position {position} of filter expression, got {value!r}")
+
+    def _or(self) -> Expression:
+        operands = [self._and()]
+        while self._peek('keyword', 'or'):
+            self.index += 1
+            operands.append(self._and())
+        return operands[0] if len(operands) == 1 else Logical('or', tuple(operands))
+
+    def _and(self) -> Expression:
+        operands = [self._not()]
+        while self._peek('keyword', 'and'):
+            self.index += 1
+            operands.append(self._not())
+        return operands[0] if len(operands) == 1 else Logical('and', tuple(operands))
+
+    def _not(self) -> Expression:
+        if self._peek('keyword', 'not'):
+            self.index += 1
+            return Logical('not', (self._not(),))
+        if self._peek('op', '('):
+            self.index += 1
+            expression = self._or()
+            self._take('op', ')')
+            return expression
+        return self._condition()
+
+    def _literal(self) -> Any:
+        if self._peek('number') or self._peek('string'):
+            self.index += 1
+            return self.tokens[self.index - 1][1]
+        self._fail("a number or a quoted string")
+
+    def _condition(self) -> Expression:
+        column = self._take('column', expected="a column name")
+        negated = self._peek('keyword', 'not')
+        if negated:
+            self.index += 1
+            if not (self._peek('keyword', 'in') or self._peek('keyword', 'between')):
+                self._fail("'in' or 'between' after 'not'")
+
+        if self._peek('keyword', 'in'):
+            self.index += 1
+            self._take('op', '(')
+            values = [self._literal()]
+            while self._peek('op', ','):
+                self.index += 1
+                values.append(self._literal())
+            self._take('op', ')')
+            condition = Condition(column, 'in', tuple(values))
+        elif self._peek('keyword', 'between'):
+            self.index += 1
+            low = self._literal()
+            self._take('keyword', 'and')
+            condition = Condition(column, 'between', (low, self._literal()))
+        elif self._peek('keyword', 'contains'):
+            self.index += 1
+            condition = Condition(column, 'contains', (self._literal(),))
+        else:
+            operator = self._take('op', expected="an operator")
+            if operator not in _COMPARISONS:
+                self.index -= 1
+                self._fail("an operator")
+            condition = Condition(column, operator, (self._literal(),))
+        return Logical('not', (condition,)) if negated else condition
+
+
+def parse_expression(text: str) -> Expression:
+    """Parse a filter expression such as `Region in ('North', 'West') and Sales_Amount > 1000`.
+
+    Conditions are `column op literal` (op one of > < >= <= == = !=),
+    `column [not] in (...)`, `column [not] between low and high` and
+    `column contains literal`, combined with `and`, `or`, `not` and
+    parentheses. Keywords are case-insensitive; a column name that is not a
+    plain identifier goes in backticks. Raises ValueError on a syntax error.
+    """
+    return _Parser(text).parse()
+
+
+def filter_expression(filter_config: Optional[Dict[str, Any]]) -> Optional[Expression]:
+    """The expression of a config's filter: its `expression` text, or the menu's single column/operator/value condition.
+
+    None when the filter is off or incomplete.
+    """
+    filter_config = filter_config or {}
+    if not filter_config.get('apply', False):
+        return None
+    if filter_config.get('expression') is not None:
+        return parse_expression(filter_config['expression'])
+    col, operator = filter_config.get('column'), filter_config.get('operator')
+    if not col or not operator:
+        return None
+    return Condition(col, LEGACY_OPERATORS.get(operator, operator), (filter_config.get('value'),))
+
+
+def expression_columns(expression: Expression) -> List[str]:
+    """The columns an expression reads, in order of first use."""
+    if isinstance(expression, Condition):
+        return [expression.column]
+    return list(dict.fromkeys(col for operand in expression.operands for col in expression_columns(operand)))
+
+
+def _to_date(value: Any) -> str:
+    text = str(value).strip()
+    if is_iso_date(text):
+        return text
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime(ISO_FORMAT)
+        except ValueError:
+            continue
+    raise ValueError(f"Cannot read {value!r} as a date")
+
+
+def check_expression(expression: Expression, schema: Mapping[str, str]) -> Expression:
+    """Check an expression against the dataset's schema, returning it with its literals converted to the column types.
+
+    Literals compared with number columns become floats and those compared with
+    date columns YYYY-MM-DD strings. Raises ValueError on an unknown column, an
+    unknown operator (or `contains` on a number column) or a literal the
+    column's type cannot hold.
+    """
+    if isinstance(expression, Logical):
+        return Logical(expression.operator, tuple(check_expression(operand, schema) for operand in expression.operands))
+
+    col, operator, values = expression
+    if col not in schema:
+        raise ValueError(f"Unknown filter column '{col}'; the dataset has {', '.join(schema)}")
+    if operator not in _COMPARISONS + ('in', 'between', 'contains'):
+        raise ValueError(f"Invalid operator {operator!r} for column '{col}'")
+    if operator == 'contains':
+        # Cleaning rewrites numbers (3000 becomes 3000.0), so their text is no stable thing to search
+        if schema[col] == 'number':
+            raise ValueError(f"Invalid operator 'contains' for number column '{col}'; compare it with >, <, >=, <=, =, !=, in or between")
+        if str(values[0]).strip() == '':
+            raise ValueError(f"Filter value for column '{col}' must not be empty")
+        return Condition(col, operator, (str(values[0]),))
+
+    if schema[col] == 'number':
+        if not all(_is_number(value) for value in values):
+            raise ValueError(f"Filter value for number column '{col}' must be numeric, got {', '.join(map(repr, values))}")
+        return Condition(col, operator, tuple(float(value) for value in values))
+    if schema[col] == 'date':
+        try:
+            return Condition(col, operator, tuple(_to_date(value) for value in values))
+        except ValueError:
+            # Equality against a value that is not a date is still a plain text comparison
+            if operator in ('>', '<', '>=', '<=', 'between'):
+                raise ValueError(f"Filter value for date column '{col}' must be a date, got {', '.join(map(repr, values))}")
+    if any(str(value).strip() == '' for value in values):
+        raise ValueError(f"Filter value for column '{col}' must not be empty")
+    return Condition(col, operator, tuple(str(value) for value in values))
+
+
+def _is_number(value: Any) -> bool:
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _number(value: Any) -> float:
+    """A value as a float, or NaN (which compares False with everything) when it is not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _text(value: Any) -> str:
+    return str(value).lower()
+
+
+def _date(value: Any) -> Optional[str]:
+    """A standardized date value, or None when it is not in YYYY-MM-DD form."""
+    text = str(value)
+    return text if is_iso_date(text) else None
+
+
+# What each kind of condition compares: the column's values converted by these
+CONVERSIONS: Dict[str, Callable[[Any], Any]] = {'number': _number, 'date': _date, 'text': _text}
+
+
+def condition_kind(condition: Condition, schema: Mapping[str, str]) -> str:
+    """Numbers compare as floats, dates in order as YYYY-MM-DD strings, anything else as lowercased text."""
+    col_type = schema.get(condition.column, 'string')
+    if col_type == 'number' and condition.operator != 'contains':
+        return 'number'
+    if col_type == 'date' and condition.operator in ('>', '<', '>=', '<=', 'between'):
+        return 'date'
+    return 'text'
+
+
+def _source(expression: Expression, schema: Mapping[str, str], names: Dict[str, str], constants: Dict[str, Any], conversions: Dict[str, str]) -> str:
+    """Python source of one boolean expression over the converted column values."""
+    if isinstance(expression, Logical):
+        if expression.operator == 'not':
+            return f"(not {_source(expression.operands[0], schema, names, constants, conversions)})"
+        return "(" + f" {expression.operator} ".join(
+            _source(operand, schema, names, constants, conversions) for operand in expression.operands
+        ) + ")"
+
+    col, operator, values = expression
+    kind = condition_kind(expression, schema)
+    if kind == 'text':
+        values = tuple(str(value).lower() for value in values)
+    variable = conversions.setdefault(f"{kind}:{col}", f"v{len(conversions)}")
+    names.setdefault(variable, f"_{kind}(row.get({col!r}))")
+
+    # Literals are bound as names rather than written out with repr(): inf and nan have no literal form
+    def constant(value: Any) -> str:
+        name = f"c{len(constants)}"
+        constants[name] = value
+        return name
+
+    if operator == 'in':
+        return f"({variable} in {constant(frozenset(values))})"
+    if operator == 'contains':
+        return f"({constant(values[0])} in {variable})"
+    guard = f"{variable} is not None and " if kind == 'date' else ""
+    if operator == 'between':
+        return f"({guard}{constant(values[0])} <= {variable} <= {constant(values[1])})"
+    return f"({guard}{variable} {operator} {constant(values[0])})"
+
+
+def compile_filter(expression: Expression, schema: Mapping[str, str]) -> Callable[[Mapping[str, Any]], bool]:
+    """Compile an expression (see `check_expression`) once into a function of a row.
+
+    The function is generated as Python source: each column it reads is
+    converted once per row, then the whole condition is a single boolean
+    expression, so a row costs one call no matter how many conditions there are.
+    """
+    names: Dict[str, str] = {}
+    constants: Dict[str, Any] = {}
+    condition = _source(expression, schema, names, constants, {})
+    assignments = "".join(f"    {variable} = {converted}\n" for variable, converted in names.items())
+    source = f"def matches(row):\n{assignments}    return bool{condition}\n"
+    namespace: Dict[str, Any] = {'_number': _number, '_text': _text, '_date': _date, **constants}
+    exec(compile(source, '<filter expression>', 'exec'), namespace)
+    return namespace['matches']
+
+
+def format_expression(expression: Expression) -> str:
+    """Readable text of an expression, e.g. for explaining a query plan."""
+    if isinstance(expression, Logical):
+        if expression.operator == 'not':
+            operand = format_expression(expression.operands[0])
+            return f"not {operand}" if operand.startswith('(') else f"not ({operand})"
+        return "(" + f" {expression.operator} ".join(map(format_expression, expression.operands)) + ")"
+
+    col, operator, values = expression
+    name = col if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", col) else f"`{col}`"
+    literal = lambda value: repr(value) if isinstance(value, str) else f"{value:g}"
+    if operator == 'in':
+        return f"{name} in ({', '.join(map(literal, values))})"
+    if operator == 'between':
+        return f"{name} between {literal(values[0])} and {literal(values[1])}"
+    return f"{name} {operator} {literal(values[0])}"
@@ -0,0 +1,249 @@
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from core.quantiles import QuantileSketch
+
+AGGREGATES = ('count', 'sum', 'mean', 'min', 'max', 'count_distinct', 'median')
+# Aggregates that read their column as numbers; values that are missing or not numeric are skipped
+NUMERIC_AGGREGATES = ('sum', 'mean', 'min', 'max', 'median')
+KEY_UNITS = ('', 'month')
+
+# The menu's fixed aggregation, as a group-by
+LEGACY_AGGREGATE = 'Aggregate total sales by region'
+_LEGACY_SPEC = (['Region'], ['sum:Sales_Amount'])
+
+
+def parse_key(spec: str) -> Tuple[str, str]:
+    """A group key, 'column' or 'column:month' (the YYYY-MM of a cleaned date), as (column, unit)."""
+    col, _, unit = spec.partition(':')
+    if not col or unit not in KEY_UNITS:
+        raise ValueError(f"Invalid group key '{spec}'; expected COLUMN or COLUMN:month")
+    return col, unit
+
+
+def parse_aggregate(spec: str) -> Tuple[str, Optional[str]]:
+    """An aggregate, 'function:column' or just 'count' (of rows), as (function, column or None)."""
+    function, _, col = spec.partition(':')
+    function = function.strip().lower().replace('-', '_')
+    if function not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate '{spec}'; expected one of {', '.join(AGGREGATES)}")
+    if not col and function != 'count':
+        raise ValueError(f"Aggregate '{function}' needs a column, e.g. {function}:Sales_Amount")
+    return function, col or None
+
+
+def aggregate_label(function: str, col: Optional[str]) -> str:
+    return f"{function}({col})" if col else function
+
+
+def group_by_spec(config: Dict[str, Any]) -> Optional[Tuple[List[str], List[str]]]:
+    """The (keys, aggregates) a config asks for: its `group_by`, or the menu's sales-by-region total; None for neither."""
+    group_by = config.get('group_by')
+    if group_by:
+        return list(group_by.get('keys') or []), list(group_by.get('aggregates') or ['count'])
+    if config.get('aggregate') == LEGACY_AGGREGATE:
+        return _LEGACY_SPEC
+    return None
+
+
+def _number(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+
+def month_of(value: Any) -> Any:
+    """The YYYY-MM a 'column:month' key groups a cleaned date by, None for a missing one."""
+    return None if value in (None, "") else str(value)[:7]
+
+
+class GroupBy:
+    """Hash aggregation: rows go into one group per distinct key tuple, every aggregate updated in the same pass.
+
+    `keys` are 'column' or 'column:month' and `aggregates` 'function:column'
+    (or 'count' for the rows of a group), with the functions in `AGGREGATES`.
+    Each group holds one partial state per aggregate: a count, a running sum,
+    a [sum, count] pair for the mean, the min / max so far (None before the
+    first number), the set of distinct values and a `QuantileSketch` for the
+    median. Partial results over different chunks combine with `merge`, so the
+    result does not depend on how the rows were split.
+    """
+
+    def __init__(self, keys: Sequence[str], aggregates: Sequence[str]):
+        self.keys = [parse_key(spec) for spec in keys]
+        self.aggregates = [parse_aggregate(spec) for spec in aggregates]
+        self.groups: Dict[Tuple[Any, ...], List[Any]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["GroupBy"]:
+        spec = group_by_spec(config)
+        return cls(*spec) if spec is not None else None
+
+    def columns(self) -> List[str]:
+        """The columns the keys and aggregates read."""
+        return list(dict.fromkeys([col for col, _ in self.keys] + [col for _, col in self.aggregates if col]))
+
+    def labels(self) -> List[str]:
+        return [aggregate_label(function, col) for function, col in self.aggregates]
+
+    def empty_state(self) -> List[Any]:
+        state: List[Any] = []
+        for function, _ in self.aggregates:
+            if function in ('count', 'sum'):
+                state.append(0 if function == 'count' else 0.0)
+            elif function == 'mean':
+                state.append([0.0, 0])
+            elif function in ('min', 'max'):
+                state.append(None)
+            elif function == 'count_distinct':
+                state.append(set())
+            else:
+                state.append(QuantileSketch())
+        return state
+
+    def _key_function(self) -> Callable[[Mapping[str, Any]], Tuple[Any, ...]]:
+        if len(self.keys) == 1:
+            col, unit = self.keys[0]
+            return (lambda row: (month_of(row.get(col)),)) if unit == 'month' else (lambda row: (row.get(col),))
+        getters = [
+            (lambda row, col=col: month_of(row.get(col))) if unit == 'month' else (lambda row, col=col: row.get(col))
+            for col, unit in self.keys
+        ]
+        return lambda row: tuple([get(row) for get in getters])
+
+    def update(self, rows: Iterable[Mapping[str, Any]]) -> "GroupBy":
+        """Aggregate `rows` into the groups in one pass and return self."""
+        key_of = self._key_function()
+        groups = self.groups
+        aggregates = [(index, function, col, function in NUMERIC_AGGREGATES) for index, (function, col) in enumerate(self.aggregates)]
+        for row in rows:
+            key = key_of(row)
+            state = groups.get(key)
+            if state is None:
+                state = groups[key] = self.empty_state()
+            for index, function, col, numeric in aggregates:
+                if col is None:
+                    state[index] += 1
+                    continue
+                value = row.get(col)
+                if not numeric:
+                    if value not in (None, ""):
+                        if function == 'count':
+                            state[index] += 1
+                        else:
+                            state[index].add(value)
+                    continue
+                if value.__class__ is not float:
+                    value = _number(value)
+                    if value is None:
+                        continue
+                elif value != value:
+                    continue
+                if function == 'sum':
+                    state[index] += value
+                elif function == 'mean':
+                    state[index][0] += value
+                    state[index][1] += 1
+                elif function == 'min':
+                    if state[index] is None or value < state[index]:
+                        state[index] = value
+                elif function == 'max':
+                    if state[index] is None or value > state[index]:
+                        state[index] = value
+                else:
+                    state[index].update(value)
+        return self
+
+    def add_partial(self, key: Tuple[Any, ...], state: List[Any]) -> "GroupBy":
+        """Fold one group's partial state, laid out as `empty_state` is, into the groups and return self."""
+        current = self.groups.get(key)
+        if current is None:
+            self.groups[key] = state
+            return self
+        for index, (function, _) in enumerate(self.aggregates):
+            mine, theirs = current[index], state[index]
+            if function in ('count', 'sum'):
+                current[index] = mine + theirs
+            elif function == 'mean':
+                current[index] = [mine[0] + theirs[0], mine[1] + theirs[1]]
+            elif function in ('min', 'max'):
+                if mine is None or (theirs is not None and (theirs < mine if function == 'min' else theirs > mine)):
+                    current[index] = theirs
+            elif function == 'count_distinct':
+                mine.update(theirs)
+            else:
+                mine.merge(theirs)
+        return self
+
+    def merge(self, other: "GroupBy") -> "GroupBy":
+        """Combine the groups aggregated over another chunk into this one and return self."""
+        for key, state in other.groups.items():
+            self.add_partial(key, state)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain data for JSON: groups as [key, state] pairs, distinct-value sets as lists and sketches as their `to_dict`."""
+        def encode(function: str, partial: Any) -> Any:
+            if function == 'count_distinct':
+                return list(partial)
+            return partial.to_dict() if function == 'median' else partial
+
+        return {
+            'keys': self.keys,
+            'aggregates': self.aggregates,
+            'groups': [
+                [list(key), [encode(function, partial) for (function, _), partial in zip(self.aggregates, state)]]
+                for key, state in self.groups.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GroupBy":
+        def decode(function: str, partial: Any) -> Any:
+            if function == 'count_distinct':
+                return set(partial)
+            return QuantileSketch.from_dict(partial) if function == 'median' else partial
+
+        group = cls([], [])
+        group.keys = [(col, unit) for col, unit in data['keys']]
+        group.aggregates = [(function, col) for function, col in data['aggregates']]
+        for key, state in data['groups']:
+            group.groups[tuple(key)] = [decode(function, partial) for (function, _), partial in zip(group.aggregates, state)]
+        return group
+
+    def result(self) -> Dict[Tuple[Any, ...], Dict[str, Any]]:
+        """Key tuple -> {aggregate label: value} for every group, in order of first appearance."""
+        labels = self.labels()
+        finished: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        for key, state in self.groups.items():
+            values: Dict[str, Any] = {}
+            for label, (function, _), partial in zip(labels, self.aggregates, state):
+                if function == 'mean':
+                    values[label] = partial[0] / partial[1] if partial[1] else None
+                elif function == 'count_distinct':
+                    values[label] = len(partial)
+                elif function == 'median':
+                    values[label] = partial.quantile(0.5)
+                else:
+                    values[label] = partial
+            finished[key] = values
+        return finished
+
+
+def aggregation_result(aggregation: Optional[GroupBy], config: Dict[str, Any]) -> dict | None:
+    """The final result of an aggregation: `GroupBy.result`, or {region: total sales} for the menu's aggregation."""
+    if aggregation is None:
+        return None
+    if config.get('group_by'):
+        return aggregation.result()
+    return {key[0]: values[aggregation.labels()[0]] for key, values in aggregation.result().items()}
+
+
+def merge_aggregations(left: Optional[GroupBy], right: Optional[GroupBy]) -> Optional[GroupBy]:
+    """Combine two partial aggregations computed over different batches."""
+    if left is None or right is None:
+        return right if left is None else left
+    return left.merge(right)
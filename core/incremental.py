@@ -0,0 +1,228 @@
+import hashlib
+import json
+import mmap
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.cache import default_cache_dir
+from core.groupby import GroupBy
+from core.mmap_csv import RANGE_BYTES, parse_rows, read_header, split_ranges
+from core.quantiles import QuantileSketch
+from core.schema import Schema
+from core.sketches import StringSketch
+from core.stats import RunningStats
+
+STATE_SUFFIX = '.state'
+# Bumped whenever the layout of a saved state changes; a state of another version is not reused
+STATE_VERSION = 2
+# The processed prefix of the dataset is hashed this many bytes at a time
+_HASH_BYTES = 16 * 2 ** 20
+
+
+class PipelineState:
+    """What an incremental run carries over to the next: how far it read the dataset and the partial results so far.
+
+    `offset` is the byte offset of the first record not processed yet.
+    `summary` is the implementation's mergeable analysis summary (stats,
+    sketches, strings and monthly totals; `DataAnalyzer.summary` for the
+    imperative one) and `aggregation` its `GroupBy` partial.
+    `run_pipeline_stream` starts from these and leaves the merged results in
+    their place, so they are never finalized here. The state is saved as JSON,
+    so loading one never runs code.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.offset = 0
+        self.num_rows = 0
+        self.columns: List[str] = []
+        self.summary: Any = None
+        self.aggregation: Optional[GroupBy] = None
+        # Size of every saved output file once the rows up to `offset` were written
+        self.output_sizes: Dict[str, int] = {}
+        # Hash of the dataset up to `offset`, and its size and modification time when the state was saved
+        self.fingerprint: Optional[Dict[str, Any]] = None
+        # The hash of the dataset up to some offset as checked by `load_state`, so `save_state` only hashes what follows
+        self._prefix_hash: Optional[Tuple[int, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': STATE_VERSION,
+            'key': self.key,
+            'offset': self.offset,
+            'num_rows': self.num_rows,
+            'columns': self.columns,
+            'summary': _summary_to_dict(self.summary) if self.summary is not None else None,
+            'aggregation': self.aggregation.to_dict() if self.aggregation is not None else None,
+            'output_sizes': self.output_sizes,
+            'fingerprint': self.fingerprint,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PipelineState":
+        if data.get('version') != STATE_VERSION:
+            raise ValueError(f"Unsupported pipeline state version {data.get('version')!r}")
+        state = cls(data['key'])
+        state.offset, state.num_rows, state.columns = data['offset'], data['num_rows'], data['columns']
+        state.summary = _summary_from_dict(data['summary']) if data['summary'] is not None else None
+        state.aggregation = GroupBy.from_dict(data['aggregation']) if data['aggregation'] is not None else None
+        state.output_sizes, state.fingerprint = data['output_sizes'], data['fingerprint']
+        return state
+
+
+def _summary_to_dict(summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'stats': {col: stats.to_dict() for col, stats in summary['stats'].items()},
+        'sketches': {col: sketch.to_dict() for col, sketch in summary['sketches'].items()},
+        'strings': {col: sketch.to_dict() for col, sketch in summary['strings'].items()},
+        'monthly': summary['monthly'],
+    }
+
+
+def _summary_from_dict(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'stats': {col: RunningStats.from_dict(stats) for col, stats in data['stats'].items()},
+        'sketches': {col: QuantileSketch.from_dict(sketch) for col, sketch in data['sketches'].items()},
+        'strings': {col: StringSketch.from_dict(sketch) for col, sketch in data['strings'].items()},
+        'monthly': dict(data['monthly']),
+    }
+
+
+def state_key(config: Dict[str, Any], schema: Schema, implementation: str) -> str:
+    """What the partial results depend on; a saved state made with a different key is not reused."""
+    return json.dumps(
+        {'config': config, 'types': dict(schema), 'date_formats': schema.date_formats, 'implementation': implementation},
+        sort_keys=True, default=str,
+    )
+
+
+def default_state_path(dataset_path: str) -> str:
+    """The state file of a dataset, in the cache directory next to it."""
+    return os.path.join(default_cache_dir(dataset_path), os.path.basename(dataset_path) + STATE_SUFFIX)
+
+
+def _hash_prefix(mapped: mmap.mmap, start: int, end: int, hasher: Any = None) -> Any:
+    """`hasher` (a new blake2b if None) updated with the bytes from `start` to `end`, a block at a time."""
+    hasher = hasher if hasher is not None else hashlib.blake2b(digest_size=16)
+    for block in range(start, end, _HASH_BYTES):
+        hasher.update(mapped[block:min(block + _HASH_BYTES, end)])
+    return hasher
+
+
+def _map(dataset_path: str):
+    file = open(dataset_path, 'rb')
+    try:
+        return file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # An empty file cannot be mapped
+        file.close()
+        return None, None
+
+
+def load_state(state_path: str, dataset_path: str, key: str) -> Optional[PipelineState]:
+    """The saved state, if it was made with the same `key` and the dataset has only been appended to since; else None.
+
+    Every byte up to the state's offset must hash as it did when the state was
+    saved. A dataset whose size and modification time are both unchanged since
+    then is taken as untouched without hashing it again.
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as file:
+            state = PipelineState.from_dict(json.load(file))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    fingerprint = state.fingerprint
+    if state.key != key or not isinstance(fingerprint, dict) or fingerprint.get('offset') != state.offset:
+        return None
+
+    try:
+        stat = os.stat(dataset_path)
+    except OSError:
+        return None
+    if stat.st_size < state.offset:
+        return None
+    if (stat.st_size, stat.st_mtime_ns) == (fingerprint.get('size'), fingerprint.get('mtime_ns')):
+        return state
+
+    file, mapped = _map(dataset_path)
+    if mapped is None:
+        return None
+    with file, mapped:
+        hasher = _hash_prefix(mapped, 0, state.offset)
+    if hasher.hexdigest() != fingerprint.get('hash'):
+        return None
+    state._prefix_hash = (state.offset, hasher)
+    return state
+
+
+def save_state(state_path: str, dataset_path: str, state: PipelineState) -> None:
+    """Write `state` atomically as JSON, with the fingerprint of the dataset up to its offset."""
+    file, mapped = _map(dataset_path)
+    if mapped is None:
+        return
+    with file, mapped:
+        stat = os.fstat(file.fileno())
+        if state.fingerprint is not None and state.fingerprint.get('offset') == state.offset:
+            digest = state.fingerprint['hash']
+        else:
+            start, hasher = state._prefix_hash if state._prefix_hash is not None and state._prefix_hash[0] <= state.offset else (0, None)
+            digest = _hash_prefix(mapped, start, state.offset, hasher.copy() if hasher is not None else None).hexdigest()
+    state.fingerprint = {'offset': state.offset, 'hash': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    temporary = f"{state_path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(state.to_dict(), file)
+    os.replace(temporary, state_path)
+
+
+def output_sizes(save_path: str) -> Dict[str, int]:
+    """Size of the output file at `save_path`, or of each partition file in it if it is a directory."""
+    if os.path.isdir(save_path):
+        paths = [os.path.join(save_path, name) for name in os.listdir(save_path)]
+    else:
+        paths = [save_path] if os.path.exists(save_path) else []
+    return {path: os.path.getsize(path) for path in paths if os.path.isfile(path)}
+
+
+def restore_output(save_path: str, sizes: Dict[str, int]) -> None:
+    """Cut saved output back to `sizes`, dropping rows a run wrote without getting to save its state."""
+    for path, size in output_sizes(save_path).items():
+        if path not in sizes:
+            os.remove(path)
+        elif size > sizes[path]:
+            with open(path, 'r+b') as file:
+                file.truncate(sizes[path])
+
+
+def complete_end(dataset_path: str) -> int:
+    """Offset just past the last complete line of the dataset; a record still being appended is left for the next run."""
+    file, mapped = _map(dataset_path)
+    if mapped is None:
+        return 0
+    with file, mapped:
+        return mapped.rfind(b'\n') + 1
+
+
+def iter_appended(dataset_path: str, start: int, end: int, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the rows of the CSV records between byte offsets `start` and `end` in batches of `batch_size`.
+
+    The header is read from the start of the file; `start` 0 begins with the first data record.
+    """
+    file, mapped = _map(dataset_path)
+    if mapped is None:
+        return
+    with file, mapped:
+        headers, data_start = read_header(mapped)
+        start = max(start, data_start)
+        if start >= end:
+            return
+        spans = [(begin, min(stop, end)) for begin, stop in split_ranges(mapped, start, -(-(end - start) // RANGE_BYTES)) if begin < end]
+
+    batch: List[Dict[str, Any]] = []
+    for span in spans:
+        batch.extend(parse_rows(span, dataset_path, headers))
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    if batch:
+        yield batch
@@ -0,0 +1,160 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+
+from core.expressions import CONVERSIONS, Condition, Expression, Logical, compile_filter, condition_kind
+from core.schema import Schema
+from core.table import Table
+
+# Cleans a list of raw values of one column: (column, values) -> cleaned values
+CleanValues = Callable[[str, List[Any]], List[Any]]
+
+_MISSING = (None, "")
+_RANGE_OPERATORS = ('>', '<', '>=', '<=', '==', 'between', 'in')
+
+
+class ColumnIndex:
+    """Row ids of every distinct raw value of one column, with the values ordered by their cleaned form on demand.
+
+    Non-missing values clean the same way in every run (dates standardized,
+    numbers rounded), so the orderings are built once, the first time a
+    condition needs them: the numbers sorted for bisecting ranges, the dates
+    sorted as YYYY-MM-DD strings, and the lowercased text looked up by equality.
+    Missing values depend on the run's config and are handled by the caller.
+    """
+
+    def __init__(self, values: Iterable[Any]):
+        self.postings: Dict[Any, array] = {}
+        for row_id, value in enumerate(values):
+            ids = self.postings.get(value)
+            if ids is None:
+                ids = self.postings[value] = array('q')
+            ids.append(row_id)
+        self.present = [value for value in self.postings if value not in _MISSING]
+        self._orders: Dict[str, Any] = {}
+
+    def rows(self, values: Iterable[Any]) -> Iterable[int]:
+        for value in values:
+            yield from self.postings.get(value, ())
+
+    def ordered(self, kind: str, col: str, clean_values: CleanValues) -> Any:
+        """The non-missing values keyed the way conditions of `kind` compare them.
+
+        'number' and 'date' give (sorted keys, raw values in the same order),
+        without values that compare False with everything (not numbers, not
+        dates); 'text' gives {lowercased text: [raw values]}.
+        """
+        order = self._orders.get(kind)
+        if order is not None:
+            return order
+        keys = map(CONVERSIONS[kind], clean_values(col, self.present))
+        if kind == 'text':
+            order = {}
+            for value, key in zip(self.present, keys):
+                order.setdefault(key, []).append(value)
+        else:
+            keyed = [(key, value) for key, value in zip(keys, self.present) if key is not None and key == key]
+            keyed.sort(key=lambda item: item[0])
+            order = ([key for key, _ in keyed], [value for _, value in keyed])
+        self._orders[kind] = order
+        return order
+
+
+class DatasetIndex:
+    """Column indexes over one dataset, each built the first time a filter reads the column.
+
+    Answers a filter expression with the ids of the matching rows without
+    scanning the dataset: ranges and equality on number and date columns by
+    bisecting the sorted values, equality on text through the inverted index,
+    and any other condition (`contains`, `!=`) once per distinct value. The
+    result is the same as filtering the rows cleaned by `clean_values`.
+    """
+
+    def __init__(self, dataset: List[Dict[str, Any]] | Table, schema: Schema):
+        self.dataset = dataset
+        self.schema = schema
+        self.columns: Dict[str, ColumnIndex] = {}
+
+    def column(self, col: str) -> ColumnIndex:
+        index = self.columns.get(col)
+        if index is None:
+            if isinstance(self.dataset, Table):
+                values = self.dataset.column(col) if col in self.dataset.columns else [None] * len(self.dataset)
+            else:
+                values = (row.get(col) for row in self.dataset)
+            index = self.columns[col] = ColumnIndex(values)
+        return index
+
+    def select(self, expression: Expression, clean_values: CleanValues, remove: bool) -> List[int]:
+        """Ids, in order, of the rows whose cleaned values match a checked `expression`.
+
+        With `remove`, rows missing a value of a column the expression reads are
+        left out, as cleaning would drop them; otherwise missing values are
+        matched as `clean_values` fills them.
+        """
+        ids = self._select(expression, clean_values, remove)
+        if remove:
+            for col in {condition.column for condition in _conditions(expression)}:
+                ids -= set(self.column(col).rows(_MISSING))
+        return sorted(ids)
+
+    def _select(self, expression: Expression, clean_values: CleanValues, remove: bool) -> Set[int]:
+        if isinstance(expression, Logical):
+            if expression.operator == 'not':
+                return set(range(len(self.dataset))) - self._select(expression.operands[0], clean_values, remove)
+            selections = [self._select(operand, clean_values, remove) for operand in expression.operands]
+            if expression.operator == 'and':
+                selections.sort(key=len)
+                return selections[0].intersection(*selections[1:])
+            return set().union(*selections)
+        return self._condition(expression, clean_values, remove)
+
+    def _condition(self, condition: Condition, clean_values: CleanValues, remove: bool) -> Set[int]:
+        col, operator, values = condition
+        index = self.column(col)
+        matches = compile_filter(condition, self.schema)
+        kind = condition_kind(condition, self.schema)
+
+        if kind != 'text' and operator in _RANGE_OPERATORS:
+            keys, raw = index.ordered(kind, col, clean_values)
+            selected = [value for low, high in _key_ranges(keys, operator, values) for value in raw[low:high]]
+        elif kind == 'text' and operator in ('==', 'in'):
+            lookup = index.ordered(kind, col, clean_values)
+            selected = [value for text in {str(value).lower() for value in values} for value in lookup.get(text, ())]
+        else:
+            # Once per distinct value rather than once per row
+            selected = [value for value, clean in zip(index.present, clean_values(col, index.present)) if matches({col: clean})]
+
+        missing = [value for value in _MISSING if value in index.postings]
+        if missing and not remove:
+            selected += [value for value, clean in zip(missing, clean_values(col, missing)) if matches({col: clean})]
+        return set(index.rows(selected))
+
+
+def _key_ranges(keys: List[Any], operator: str, values: Tuple[Any, ...]) -> List[Tuple[int, int]]:
+    """Slices of the sorted `keys` that satisfy one comparison."""
+    if operator == 'in':
+        return [(bisect_left(keys, value), bisect_right(keys, value)) for value in set(values)]
+    value = values[0]
+    if operator == 'between':
+        return [(bisect_left(keys, value), bisect_right(keys, values[1]))]
+    return [{
+        '>': (bisect_right(keys, value), len(keys)),
+        '>=': (bisect_left(keys, value), len(keys)),
+        '<': (0, bisect_left(keys, value)),
+        '<=': (0, bisect_right(keys, value)),
+        '==': (bisect_left(keys, value), bisect_right(keys, value)),
+    }[operator]]
+
+
+def _conditions(expression: Expression) -> Iterable[Condition]:
+    if isinstance(expression, Logical):
+        for operand in expression.operands:
+            yield from _conditions(operand)
+    else:
+        yield expression
+
+
+def value_cleaner(cleaners: Dict[str, Callable[[Any], Any]]) -> CleanValues:
+    """`CleanValues` from one cleaning function per column, as `value_cleaners` gives; other columns are kept as they are."""
+    return lambda col, values: list(map(cleaners[col], values)) if col in cleaners else list(values)
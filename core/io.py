@@ -1,15 +1,34 @@
 import csv
+import importlib
+import io
 import json
-from typing import List, Dict, Any
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, List, Dict, Any, Optional, TextIO, Tuple
 
+from core.metrics import PipelineMetrics
+from core.mmap_csv import read_csv
+from core.schema import Schema
+from core.table import NumberColumn, Table
+from core.utils import infer_column_types
 
-def load_csv(file_path: str) -> List[Dict[str, Any]]:
-    data = []
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    # Only needed by runs that use the cache; hashlib alone adds to every start-up
+    from core.cache import DatasetCache
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def iter_csv(file_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the rows of a CSV file in batches of at most `batch_size` rows."""
     try:
         with open(file_path, 'r', encoding='utf-8') as file:
             csv_reader = csv.reader(file)
             headers = next(csv_reader)
-            
+
+            batch = []
             for row in csv_reader:
                 row_dict = {}
                 for i in range(len(headers)):
@@ -17,12 +36,184 @@ def load_csv(file_path: str) -> List[Dict[str, Any]]:
                         row_dict[headers[i]] = row[i]
                     else:
                         row_dict[headers[i]] = None
-                data.append(row_dict)
+                batch.append(row_dict)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
     except Exception as e:
         print(f"Error loading file: {e}")
-    
+
+# Characters read from a JSON file at a time by the incremental parser
+JSON_CHUNK_SIZE = 1 << 20
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def iter_json_array(file: TextIO, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of the top-level JSON array in `file` one at a time, reading it in chunks.
+
+    Only the unparsed tail of the current chunk and the element being decoded
+    are held in memory, never the whole document. Raises `json.JSONDecodeError`
+    on malformed input, after yielding the elements before it.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+
+    def read_more() -> None:
+        nonlocal buffer, position, eof
+        chunk = file.read(chunk_size)
+        buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+
+    def next_char() -> str:
+        """Skip whitespace and return the next character without consuming it ('' at the end of the file)."""
+        nonlocal position
+        while True:
+            position = _JSON_WHITESPACE.match(buffer, position).end()
+            if position < len(buffer) or eof:
+                return buffer[position:position + 1]
+            read_more()
+
+    if next_char() != '[':
+        raise json.JSONDecodeError("Expecting a top-level array", buffer, position)
+    position += 1
+
+    first = True
+    while True:
+        char = next_char()
+        if char == ']':
+            position += 1
+            break
+        if not first:
+            if char != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+            position += 1
+            next_char()
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more()
+                continue
+            # A number cut off by the end of the chunk decodes as its prefix, so the value only
+            # counts once the ',' or ']' after it has been read
+            after = _JSON_WHITESPACE.match(buffer, end).end()
+            if eof or buffer[after:after + 1] in (',', ']'):
+                break
+            read_more()
+
+        position = end
+        first = False
+        yield value
+
+    if next_char():
+        raise json.JSONDecodeError("Extra data", buffer, position)
+
+
+def iter_json(file_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the records of a JSON array file in batches of at most `batch_size` records, parsing it incrementally."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            batch = []
+            for record in iter_json_array(file):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+    except json.JSONDecodeError:
+        print(f"Error: File '{file_path}' is not a valid JSON file.")
+    except Exception as e:
+        print(f"Error loading file: {e}")
+
+def _decode_lines(lines: List[str], line_numbers: List[int]) -> List[Dict[str, Any]]:
+    """Decode NDJSON lines as one JSON array, so the records share their key strings; a bad line is reported by number."""
+    try:
+        return json.loads('[' + ','.join(lines) + ']')
+    except json.JSONDecodeError:
+        for line, line_number in zip(lines, line_numbers):
+            try:
+                json.loads(line)
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(f"line {line_number}: {e.msg}", e.doc, e.pos) from None
+        raise
+
+def iter_ndjson(file_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the records of an NDJSON file (one JSON object per line) in batches of at most `batch_size` records.
+
+    Blank lines are skipped.
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            lines, line_numbers = [], []
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                lines.append(line)
+                line_numbers.append(line_number)
+                if len(lines) >= batch_size:
+                    yield _decode_lines(lines, line_numbers)
+                    lines, line_numbers = [], []
+            if lines:
+                yield _decode_lines(lines, line_numbers)
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+    except json.JSONDecodeError as e:
+        print(f"Error: File '{file_path}' is not a valid NDJSON file ({e.msg}).")
+    except Exception as e:
+        print(f"Error loading file: {e}")
+
+# Batched reader of each supported dataset format, by file extension
+BATCH_READERS: Dict[str, Callable[[str, int], Iterator[List[Dict[str, Any]]]]] = {
+    '.csv': iter_csv,
+    '.json': iter_json,
+    '.ndjson': iter_ndjson,
+    '.jsonl': iter_ndjson,
+}
+
+def batch_reader(file_path: str) -> Callable[[str, int], Iterator[List[Dict[str, Any]]]]:
+    """The batched reader for a dataset file, chosen by its extension (which must be in `BATCH_READERS`)."""
+    return BATCH_READERS[os.path.splitext(file_path)[1]]
+
+def load_csv(
+    file_path: str, columnar: bool = False, schema: Optional[Schema] = None,
+    cache: Optional["DatasetCache"] = None, workers: Optional[int] = 1,
+) -> List[Dict[str, Any]] | Table:
+    """Load a CSV file as a list of row dicts, or straight into a column-oriented `Table` when `columnar` is set.
+
+    The file is read through a memory map (see `core.mmap_csv`); a `Table` is
+    parsed by `workers` processes (None for every core). A `schema` decides the
+    column storage of a `Table`; without one it is inferred. With a `cache` the
+    file is only parsed when the cache has no `Table` for it; since the cache
+    holds Tables, the result is then always columnar.
+    """
+    columnar = columnar or cache is not None
+    if not os.path.isfile(file_path):
+        # iter_csv reports the missing file
+        return Table.from_batches(iter_csv(file_path)) if columnar else [row for batch in iter_csv(file_path) for row in batch]
+
+    if cache is not None:
+        table = cache.get(file_path, schema or Schema())
+        if table is not None:
+            return table
+
+    try:
+        col_types = (schema if schema is not None else infer_column_types(next(iter(iter_csv(file_path)), []))) if columnar else {}
+        data = read_csv(file_path, col_types, columnar, workers)
+    except Exception as e:
+        print(f"Error loading file: {e}")
+        return Table() if columnar else []
+
+    if cache is not None and data:
+        cache.put(file_path, schema or Schema(), data)
     return data
 
 def load_json(file_path: str) -> List[Dict[str, Any]]:
@@ -39,28 +230,41 @@ def load_json(file_path: str) -> List[Dict[str, Any]]:
     
     return data
 
+def load_ndjson(file_path: str) -> List[Dict[str, Any]]:
+    return [record for batch in iter_ndjson(file_path) for record in batch]
+
 def output_summary(data: List[Dict[str, Any]]) -> None:
     if not data:
         print("No data to summarize.")
         return
     
-    num_rows = len(data)
-    num_cols = len(data[0]) if num_rows > 0 else 0
+    output_stream_summary(len(data), list(data[0].keys()))
+
+def output_stream_summary(num_rows: int, columns: List[str]) -> None:
+    """Print the dataset summary from a row count and header, for output that was never held in memory."""
+    if num_rows == 0:
+        print("No data to summarize.")
+        return
+
     print(f"Dataset Summary:")
     print(f"Number of rows: {num_rows}")
-    print(f"Number of columns: {num_cols}")
+    print(f"Number of columns: {len(columns)}")
     print("Columns:")
-    for col in data[0].keys():
+    for col in columns:
         print(f" - {col}")
 
-def output_analysis(report: Dict[str, Any]) -> None:
-    """Pretty-print the analysis report returned by `run_pipeline`.
+def output_analysis(report: Dict[str, Any], metrics: Optional[PipelineMetrics] = None) -> None:
+    """Pretty-print the analysis report returned by `run_pipeline`, followed by the stage `metrics` if given.
 
     Expected report format (as produced by `imperative_impl.DataAnalyzer.analyze`):
       {
           'mean': {col: value, ...},
           'median': {col: value, ...},
           'variance': {col: value, ...},
+          'min': {col: value, ...},
+          'max': {col: value, ...},
+          'percentiles': {col: {'p50': value, 'p90': value, ...}, ...},
+          'quantile_error': {col: normalized_rank_error, ...},
           'trend': {'YYYY-MM': aggregated_value, ...}
       }
 
@@ -91,10 +295,38 @@ def output_analysis(report: Dict[str, Any]) -> None:
             print(f"  - {key}: {out}")
 
     # Print known sections in a predictable order
-    for section in ("mean", "median", "variance"):
+    for section in ("mean", "median", "variance", "min", "max"):
         if section in report:
             _print_map(section.capitalize(), report.get(section, {}))
 
+    # Percentiles may come from a quantile sketch, so show each column's rank error bound next to them
+    if "percentiles" in report:
+        percentiles = report.get("percentiles", {}) or {}
+        errors = report.get("quantile_error", {}) or {}
+        print("\nPercentiles:")
+        if not percentiles:
+            print("  (no data)")
+        for col in sorted(percentiles.keys()):
+            values = ", ".join(f"{name}={val:.4f}" for name, val in percentiles[col].items())
+            error = errors.get(col, 0.0)
+            bound = "exact" if not error else f"rank error ±{error:.2%}"
+            print(f"  - {col}: {values} ({bound})")
+
+    # String columns come from fixed-size sketches: distinct counts are estimates, top counts upper bounds
+    if "distinct" in report:
+        distinct = report.get("distinct", {}) or {}
+        errors = report.get("distinct_error", {}) or {}
+        top_values = report.get("top_values", {}) or {}
+        print("\nString columns:")
+        if not distinct:
+            print("  (no data)")
+        for col in sorted(distinct.keys()):
+            top = ", ".join(
+                f"{value}={count}" if not error else f"{value}≈{count} (±{error})"
+                for value, count, error in top_values.get(col, [])
+            )
+            print(f"  - {col}: ~{distinct[col]} distinct (±{errors.get(col, 0.0):.1%}); top: {top or '(no value stands out)'}")
+
     # Trend is typically a time series (YYYY-MM -> value)
     if "trend" in report:
         trend = report.get("trend", {}) or {}
@@ -106,19 +338,308 @@ def output_analysis(report: Dict[str, Any]) -> None:
                 val = trend[month]
                 print(f"  - {month}: {val:.4f}" if isinstance(val, (int, float)) else f"  - {month}: {val}")
 
+    if metrics is not None:
+        output_metrics(metrics)
 
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    return "-" if value is None else str(value)
 
+def _group_order(key: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    # Missing keys last, numbers before strings, so keys of mixed types still sort
+    return tuple((value is None, not isinstance(value, (int, float)), value if isinstance(value, (int, float)) else str(value)) for value in key)
 
-def save_csv(data: List[Dict[str, Any]], file_path: str) -> None:
-    if not data:
-        print("No data to save.")
+def output_aggregation(aggregation: Optional[Dict[Any, Any]]) -> None:
+    """Print the aggregation returned by `run_pipeline`, sorted by key; nothing if there was none.
+
+    Either the menu's {region: total sales} or a `core.groupby.GroupBy.result`,
+    {(key, ...): {aggregate label: value, ...}}, printed as one line per group.
+    """
+    if aggregation is None:
         return
-    
+
+    grouped = all(isinstance(key, tuple) for key in aggregation)
+    print("Aggregation:" if grouped else "Total sales by region:")
+    if not aggregation:
+        print("  (no data)")
+    elif not grouped:
+        for key in sorted(aggregation, key=lambda key: _group_order((key,))):
+            print(f"  - {_format_value(key)}: {_format_value(aggregation[key])}")
+    else:
+        for key in sorted(aggregation, key=_group_order):
+            group = " | ".join(_format_value(value) for value in key) or "(all rows)"
+            values = ", ".join(f"{label}={_format_value(value)}" for label, value in aggregation[key].items())
+            print(f"  - {group}: {values}")
+    print()
+
+def output_metrics(metrics: PipelineMetrics) -> None:
+    """Print one line per pipeline stage, in the order the stages ran, and the totals."""
+    print("\nStage metrics:")
+    if not metrics.stages:
+        print("  (no stages recorded)")
+        return
+
+    def _format_stage(name: str, stage: Dict[str, Any]) -> str:
+        parts = [f"{stage['wall_seconds']:.4f}s wall", f"{stage['cpu_seconds']:.4f}s cpu"]
+        if stage.get('rows_in') is not None and stage.get('rows_out') is not None:
+            parts.append(f"rows {stage['rows_in']} -> {stage['rows_out']}")
+        elif stage.get('rows_in') is not None:
+            parts.append(f"{stage['rows_in']} rows in")
+        elif stage.get('rows_out') is not None:
+            parts.append(f"{stage['rows_out']} rows out")
+        if stage.get('peak_memory') is not None:
+            parts.append(f"peak {stage['peak_memory'] / 2 ** 20:.2f} MB")
+        if stage.get('calls', 1) > 1:
+            parts.append(f"{stage['calls']} calls")
+        return f"  - {name}: " + ", ".join(parts)
+
+    summary = metrics.to_dict()
+    for name, stage in summary['stages'].items():
+        print(_format_stage(name, stage))
+    print(_format_stage('total', summary['total']))
+
+
+# Output compression by name: the module providing `open`, the suffix added to the file name and `open` options
+COMPRESSIONS = {
+    # gzip.open defaults to level 9, about three times slower than zlib's default for a few percent smaller files
+    'gzip': ('gzip', '.gz', {'compresslevel': 6}),
+    'bz2': ('bz2', '.bz2', {}),
+    'lzma': ('lzma', '.xz', {}),
+}
+# Encoded CSV text is collected per output file and written in blocks of about this many characters
+DEFAULT_WRITE_BUFFER = 1 << 20
+_MISSING_PARTITION = '__missing__'
+
+
+def partition_key(spec: str) -> Callable[[Dict[str, Any]], str]:
+    """Key function for `--partition-by`: a column name, or 'column:month' for the YYYY-MM of a cleaned date column."""
+    col, _, unit = spec.partition(':')
+    if unit not in ('', 'month'):
+        raise ValueError(f"Unknown partition unit '{unit}'; only 'month' is supported")
+    if unit == 'month':
+        return lambda row: str(row.get(col) or '')[:7]
+    return lambda row: str(row.get(col) if row.get(col) is not None else '')
+
+
+def _partition_file_name(spec: str, key: str, suffix: str) -> str:
+    value = re.sub(r'[\\/:*?"<>|]', '_', key) or _MISSING_PARTITION
+    return f"{spec.partition(':')[0]}={value}{suffix}"
+
+
+class _CsvSink:
+    """One output file: rows are formatted into an in-memory buffer that is written (and compressed) in large blocks."""
+
+    def __init__(self, file_path: str, fieldnames: List[str], compression: Optional[str], append: bool = False):
+        self.file_path = file_path
+        # Appending to a file that already has rows: no second header
+        continued = append and os.path.exists(file_path) and os.path.getsize(file_path) > 0
+        mode = 'ab' if append else 'wb'
+        if compression is None:
+            self.file = open(file_path, mode)
+        else:
+            # gzip, bz2 and lzma all read a file appended to this way as one stream
+            module_name, _, options = COMPRESSIONS[compression]
+            self.file = importlib.import_module(module_name).open(file_path, mode, **options)
+        self.buffer = io.StringIO()
+        self.writer = csv.DictWriter(self.buffer, fieldnames=fieldnames)
+        if not continued:
+            self.writer.writeheader()
+        self.pending: Optional["Future"] = None
+
+    def take_buffer(self) -> bytes:
+        data = self.buffer.getvalue().encode('utf-8')
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def _csv_field(value: Any) -> str:
+    """One value as `csv.writer` writes it: nothing for None, quoted if it holds a comma, quote or line break."""
+    if value is None:
+        return ''
+    text = str(value)
+    if ',' in text or '"' in text or '\n' in text or '\r' in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def table_lines(table: Table, fieldnames: List[str]) -> List[str]:
+    """The CSV lines (without line endings) of a Table's rows, as `csv.DictWriter` would write them with `fieldnames`.
+
+    Each column is formatted on its own, without building a row: a number
+    column value by value, a dictionary-encoded one once per distinct value.
+    The lines are joined from the formatted columns in one pass.
+    """
+    fields = []
+    for col in fieldnames:
+        column = table.columns.get(col)
+        if column is None:
+            fields.append([''] * table.length)
+        elif isinstance(column, NumberColumn):
+            # Missing numbers are NaN, written as nothing; repr is how csv writes floats
+            fields.append(['' if text == 'nan' else text for text in map(repr, column.values)])
+        else:
+            formatted = list(map(_csv_field, column.dictionary))
+            fields.append(list(map(formatted.__getitem__, column.codes)))
+    return list(map(','.join, zip(*fields)))
+
+
+class CsvBatchWriter:
+    """Write row batches to a CSV file as they come out of the pipeline.
+
+    The header is taken from the first non-empty batch. Use as a context manager.
+    Rows are formatted into an in-memory buffer and written in blocks of about
+    `buffer_size` characters, optionally compressed with `compression` (a key of
+    `COMPRESSIONS`). With `partition_by` (see `partition_key`) `file_path` is a
+    directory holding one file per key, e.g. `Region=North.csv.gz`. Blocks are
+    written by a pool of `workers` threads, at most one block per file at a time;
+    zlib, bz2 and lzma release the GIL, so partitions compress concurrently.
+    With `append`, rows are added to the end of existing files, whose header is kept.
+    """
+
+    def __init__(
+        self, file_path: str, compression: Optional[str] = None, partition_by: Optional[str] = None,
+        buffer_size: int = DEFAULT_WRITE_BUFFER, workers: int = 4, append: bool = False,
+    ):
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}'; expected one of {', '.join(COMPRESSIONS)}")
+        self.file_path = file_path
+        self.compression = compression
+        self.partition_by = partition_by
+        self.buffer_size = buffer_size
+        self.workers = workers
+        self.append = append
+        self.rows_written = 0
+        self._key = partition_key(partition_by) if partition_by else None
+        self._fieldnames: Optional[List[str]] = None
+        self._sinks: Dict[Optional[str], _CsvSink] = {}
+        self._pool = None
+        self._closed = False
+
+    def __enter__(self) -> "CsvBatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _sink(self, key: Optional[str]) -> _CsvSink:
+        sink = self._sinks.get(key)
+        if sink is None:
+            if key is None:
+                path = self.file_path
+            else:
+                os.makedirs(self.file_path, exist_ok=True)
+                suffix = '.csv' + (COMPRESSIONS[self.compression][1] if self.compression else '')
+                path = os.path.join(self.file_path, _partition_file_name(self.partition_by, key, suffix))
+            sink = self._sinks[key] = _CsvSink(path, self._fieldnames, self.compression, self.append)
+        return sink
+
+    def _flush(self, sink: _CsvSink) -> None:
+        """Hand the sink's buffered text to the pool, after the sink's previous block has been written."""
+        if sink.pending is not None:
+            sink.pending.result()
+        if self._pool is None:
+            # Imported here so runs that never write output don't pay for it at start-up
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        sink.pending = self._pool.submit(sink.file.write, sink.take_buffer())
+
+    def write(self, data: List[Dict[str, Any]] | Table) -> None:
+        """Write a batch of rows; a `Table` is formatted a column at a time (see `table_lines`)."""
+        if not data:
+            return
+
+        if self._fieldnames is None:
+            self._fieldnames = list(data[0].keys())
+        # csv.writer quotes the empty value of a one-column row, which table_lines leaves to it
+        if isinstance(data, Table) and len(self._fieldnames) > 1:
+            self._write_table(data)
+            return
+        if self._key is None:
+            groups: Dict[Optional[str], List[Dict[str, Any]]] = {None: data}
+        else:
+            groups = {}
+            for row in data:
+                groups.setdefault(self._key(row), []).append(row)
+
+        for key, rows in groups.items():
+            sink = self._sink(key)
+            sink.writer.writerows(rows)
+            if sink.buffer.tell() >= self.buffer_size:
+                self._flush(sink)
+        self.rows_written += len(data)
+
+    def _write_table(self, table: Table) -> None:
+        lines = table_lines(table, self._fieldnames)
+        if self._key is None:
+            groups: Dict[Optional[str], List[str]] = {None: lines}
+        else:
+            # The key only reads its own column, so it is given that value alone
+            col = self.partition_by.partition(':')[0]
+            values = table.columns[col] if col in table.columns else [None] * table.length
+            groups = {}
+            for value, line in zip(values, lines):
+                groups.setdefault(self._key({col: value}), []).append(line)
+
+        for key, group in groups.items():
+            sink = self._sink(key)
+            sink.buffer.write('\r\n'.join(group))
+            sink.buffer.write('\r\n')
+            if sink.buffer.tell() >= self.buffer_size:
+                self._flush(sink)
+        self.rows_written += table.length
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        if not self._sinks:
+            print("No data to save.")
+            return
+
+        try:
+            for sink in self._sinks.values():
+                self._flush(sink)
+            for sink in self._sinks.values():
+                sink.pending.result()
+        finally:
+            for sink in self._sinks.values():
+                sink.file.close()
+            self._pool.shutdown()
+        if self._key is None:
+            print(f"Data saved to '{self.file_path}' successfully.")
+        else:
+            print(f"Data saved to {len(self._sinks)} partitions in '{self.file_path}' successfully.")
+
+
+def save_csv(
+    data: List[Dict[str, Any]], file_path: str, compression: Optional[str] = None, partition_by: Optional[str] = None
+) -> None:
+    """Write a complete result set through `CsvBatchWriter`; see there for `compression` and `partition_by`."""
     try:
-        with open(file_path, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=data[0].keys())
-            writer.writeheader()
-            writer.writerows(data)
-        print(f"Data saved to '{file_path}' successfully.")
+        with CsvBatchWriter(file_path, compression, partition_by) as writer:
+            writer.write(data)
     except Exception as e:
-        print(f"Error saving file: {e}")
\ No newline at end of file
+        print(f"Error saving file: {e}")
+
+
+def output_file_path(dataset_path: str, compression: Optional[str] = None, partitioned: bool = False) -> str:
+    """Where the output of `dataset_path` goes: `<name>_output.csv` next to it (plus the compression suffix),
+    or the directory `<name>_output` when partitioned."""
+    path = Path(dataset_path)
+    if partitioned:
+        return str(path.with_name(f"{path.stem}_output"))
+    suffix = COMPRESSIONS[compression][1] if compression else ''
+    return str(path.with_name(f"{path.stem}_output.csv{suffix}"))
+
+
+def is_output_file(file_path: str) -> bool:
+    """Whether `file_path` is where `output_file_path` puts the output of some dataset, or a partition inside it."""
+    path = Path(file_path)
+    name = path.name
+    for _, suffix, _ in COMPRESSIONS.values():
+        name = name.removesuffix(suffix)
+    return name.endswith('_output.csv') or path.parent.name.endswith('_output')
+
@@ -0,0 +1,125 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+class StageMetrics:
+    """Totals for one pipeline stage; a stage run once per batch adds up over the batches."""
+
+    __slots__ = ('calls', 'wall_seconds', 'cpu_seconds', 'rows_in', 'rows_out', 'peak_memory')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rows_in: Optional[int] = None
+        self.rows_out: Optional[int] = None
+        # Peak bytes allocated on top of what was allocated when the stage started; None when not traced
+        self.peak_memory: Optional[int] = None
+
+    def merge(self, other: "StageMetrics") -> "StageMetrics":
+        self.calls += other.calls
+        self.wall_seconds += other.wall_seconds
+        self.cpu_seconds += other.cpu_seconds
+        self.rows_in = _add(self.rows_in, other.rows_in)
+        self.rows_out = _add(self.rows_out, other.rows_out)
+        self.peak_memory = _max(self.peak_memory, other.peak_memory)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _add(left: Optional[int], right: Optional[int]) -> Optional[int]:
+    return right if left is None else left if right is None else left + right
+
+
+def _max(left: Optional[int], right: Optional[int]) -> Optional[int]:
+    return right if left is None else left if right is None else max(left, right)
+
+
+class PipelineMetrics:
+    """Wall time, CPU time, rows in/out and peak allocated memory of each pipeline stage, in stage order.
+
+    Pass one to `run_pipeline` / `run_pipeline_stream` to have their stages
+    recorded; the caller can record its own (load, save) with `stage`. Peak
+    memory comes from `tracemalloc`, which slows the traced code down, so it
+    is only measured when `trace_memory` is set.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageMetrics] = {}
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[StageMetrics]:
+        """Time the body of the `with` block as stage `name`; set `rows_out` on the yielded metrics."""
+        current = StageMetrics()
+        current.calls = 1
+        current.rows_in = rows_in
+
+        if self.trace_memory:
+            import tracemalloc
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield current
+        finally:
+            current.wall_seconds = time.perf_counter() - wall_start
+            current.cpu_seconds = time.process_time() - cpu_start
+            if self.trace_memory:
+                current.peak_memory = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.record(name, current)
+
+    def measure(self, name: str, fn: Callable[..., Any], data: Any, *args: Any) -> Any:
+        """Call `fn(data, *args)` as stage `name`, counting rows in `data` and in the result."""
+        with self.stage(name, _rows(data)) as current:
+            result = fn(data, *args)
+            current.rows_out = _rows(result)
+        return result
+
+    def record(self, name: str, stage: StageMetrics) -> None:
+        if name in self.stages:
+            self.stages[name].merge(stage)
+        else:
+            self.stages[name] = stage
+
+    def merge(self, other: "PipelineMetrics") -> "PipelineMetrics":
+        """Add the stages recorded by another instance, e.g. in a worker process, to this one."""
+        for name, stage in other.stages.items():
+            self.record(name, StageMetrics().merge(stage))
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = StageMetrics()
+        for stage in self.stages.values():
+            total.merge(stage)
+        return {
+            'stages': {name: stage.to_dict() for name, stage in self.stages.items()},
+            'total': {
+                'wall_seconds': total.wall_seconds,
+                'cpu_seconds': total.cpu_seconds,
+                'peak_memory': total.peak_memory,
+            },
+        }
+
+    def write_json(self, file_path: str) -> None:
+        """Write the metrics as a JSON sidecar file for monitoring to pick up."""
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+def _rows(data: Any) -> Optional[int]:
+    """Row count of a stage's input or output (a list of rows or a Table), if it has one."""
+    if isinstance(data, dict) or not hasattr(data, '__len__'):
+        return None
+    return len(data)
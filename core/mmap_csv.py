@@ -0,0 +1,181 @@
+import csv
+import io
+import mmap
+import os
+from functools import partial
+from itertools import repeat
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from core.parallel import parallel_map
+from core.records import Header, Record, make_records, new_pools
+from core.table import DictColumn, NumberColumn, Table
+
+# Files are parsed in ranges of about this many bytes, so at most one range's text is decoded at a time
+RANGE_BYTES = 32 * 2 ** 20
+# Quote counting scans the file in blocks of this size instead of copying whole ranges
+_SCAN_BYTES = 16 * 2 ** 20
+
+
+def _count_quotes(mapped: mmap.mmap, start: int, end: int) -> int:
+    count = 0
+    for block in range(start, end, _SCAN_BYTES):
+        count += mapped[block:min(block + _SCAN_BYTES, end)].count(b'"')
+    return count
+
+
+def _record_end(mapped: mmap.mmap, position: int, quoted: bool = False) -> int:
+    """Offset just past the first newline at or after `position` that is not inside a quoted field.
+
+    `quoted` tells whether `position` itself is inside quotes. An escaped quote
+    ("") flips the state twice, so counting quotes is enough.
+    """
+    while True:
+        newline = mapped.find(b'\n', position)
+        if newline < 0:
+            return len(mapped)
+        quoted ^= bool(_count_quotes(mapped, position, newline) & 1)
+        if not quoted:
+            return newline + 1
+        position = newline + 1
+
+
+def split_ranges(mapped: mmap.mmap, start: int, parts: int) -> List[Tuple[int, int]]:
+    """Split the bytes from `start` to the end into about `parts` ranges that each hold whole records."""
+    size = len(mapped)
+    step = max((size - start) // max(parts, 1), 1)
+    bounds, position, quoted = [start], start, False
+    for target in range(start + step, size, step):
+        if target <= bounds[-1]:
+            continue
+        quoted ^= bool(_count_quotes(mapped, position, target) & 1)
+        end = _record_end(mapped, target, quoted)
+        if end >= size:
+            break
+        bounds.append(end)
+        position, quoted = end, False
+    bounds.append(size)
+    return [(begin, end) for begin, end in zip(bounds, bounds[1:]) if end > begin]
+
+
+def read_header(mapped: mmap.mmap) -> Tuple[List[str], int]:
+    """The column names of a mapped CSV file and the offset of its first data record."""
+    end = _record_end(mapped, 0)
+    header = next(csv.reader(io.StringIO(mapped[:end].decode('utf-8'))), [])
+    return header, end
+
+
+def _read_range(file_path: str, start: int, end: int) -> str:
+    """The text of a byte range, decoded straight from the map rather than from a copy of its bytes."""
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        # The views must be released before the map can close
+        with memoryview(mapped) as view, view[start:end] as part:
+            return str(part, 'utf-8')
+
+
+def _pad(record: List[Any], num_fields: int) -> List[Any]:
+    record[num_fields:] = []
+    record.extend([None] * (num_fields - len(record)))
+    return record
+
+
+def _line_separator(text: str) -> Optional[str]:
+    """The line ending to split `text` on when plain splitting parses it the way `csv.reader` does, else None."""
+    if '"' in text:
+        return None
+    carriage_returns = text.count('\r')
+    if not carriage_returns:
+        return '\n'
+    # Only consistent CRLF endings (as `csv.writer` writes them) are split directly
+    return '\r\n' if carriage_returns == text.count('\r\n') == text.count('\n') else None
+
+
+def _split_lines(text: str, separator: str) -> List[str]:
+    lines = text.split(separator)
+    if lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def iter_records(text: str, num_fields: int) -> Iterator[List[Optional[str]]]:
+    """Parse whole CSV records, padded with None (or cut) to `num_fields` fields.
+
+    Text without quotes and with consistent line endings is split on those
+    and on commas; anything else goes through `csv.reader`. As with `core.io.iter_csv`, a blank
+    line becomes a record of None.
+    """
+    separator = _line_separator(text)
+    if separator is not None:
+        records: Iterable[List[Any]] = (line.split(',') if line else [] for line in _split_lines(text, separator))
+    else:
+        records = csv.reader(io.StringIO(text))
+
+    for record in records:
+        yield record if len(record) == num_fields else _pad(record, num_fields)
+
+
+def parse_rows(span: Tuple[int, int], file_path: str, headers: Sequence[str] | Header, pools: Optional[List[Dict[Any, Any]]] = None) -> List[Record]:
+    """Rows of the records in a byte range of the file, as `core.records.Record`s with their repeated values interned in `pools`."""
+    text = _read_range(file_path, *span)
+    num_fields = len(headers.names) if isinstance(headers, Header) else len(headers)
+    return make_records(headers, iter_records(text, num_fields), pools)
+
+
+def parse_table(span: Tuple[int, int], file_path: str, headers: List[str], col_types: Dict[str, str]) -> Table:
+    """A `Table` of the records in a byte range of the file; runs in a worker process."""
+    text = _read_range(file_path, *span)
+    separator = _line_separator(text)
+    num_fields = len(headers)
+    if separator is not None and num_fields > 1:
+        lines = _split_lines(text, separator)
+        if lines and all(count == num_fields - 1 for count in map(str.count, lines, repeat(','))):
+            # Every record has all its fields, so column i is every num_fields-th field from i
+            fields = ','.join(lines).split(',')
+            return Table.from_columns({col: fields[i::num_fields] for i, col in enumerate(headers)}, col_types)
+
+    records = list(iter_records(text, num_fields))
+    return Table.from_columns(dict(zip(headers, map(list, zip(*records)))) if records else {}, col_types)
+
+
+def read_csv(file_path: str, col_types: Dict[str, str], columnar: bool = False, workers: Optional[int] = 1) -> List[Record] | Table:
+    """Read a whole CSV file through a memory map, as rows (`core.records.Record`) or as a `Table`.
+
+    The file is split into ranges at record boundaries (newlines outside quoted
+    fields). For a `Table` the ranges are parsed by `workers` processes (None
+    for every core), each returning typed column arrays that are cheap to send
+    back. Every range stores a column the same way: a number column holding
+    text in any range is text in all of them, as if the file were one range.
+    Rows cost about as much to send between processes as to parse, so they
+    are always parsed in this process, sharing one header and one intern pool
+    per column.
+    """
+    if os.path.getsize(file_path) == 0:
+        return Table() if columnar else []
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        headers, data_start = read_header(mapped)
+        parts = max(-(-(len(mapped) - data_start) // RANGE_BYTES), 1)
+        if columnar:
+            parts = max(parts, workers or os.cpu_count() or 1)
+        spans = split_ranges(mapped, data_start, parts)
+
+    if columnar:
+        parse = partial(parse_table, file_path=file_path, headers=headers, col_types=col_types)
+        tables = list(parallel_map(parse, spans, workers))
+        as_text = {
+            col for table in tables for col, column in table.columns.items()
+            if col_types.get(col) == 'number' and isinstance(column, DictColumn)
+        }
+        if as_text:
+            # Ranges that stored those columns as numbers no longer have their text; they are parsed again
+            text_types = {**col_types, **dict.fromkeys(as_text, 'string')}
+            parse = partial(parse_table, file_path=file_path, headers=headers, col_types=text_types)
+            again = [i for i, table in enumerate(tables) if any(isinstance(table.columns.get(col), NumberColumn) for col in as_text)]
+            for i, table in zip(again, parallel_map(parse, [spans[i] for i in again], workers)):
+                tables[i] = table
+        tables = [table for table in tables if table.length]
+        # A file of one range is the Table of that range, with nothing to stack
+        return tables[0] if len(tables) == 1 else Table.concat(tables)
+    header, pools = Header(headers), new_pools(len(headers))
+    rows: List[Record] = []
+    for span in spans:
+        rows.extend(parse_rows(span, file_path, header, pools))
+    return rows
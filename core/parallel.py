@@ -0,0 +1,55 @@
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+class Deferred(ABC):
+    """An item that `parallel_map` loads in the worker that processes it, e.g. a range of a file to read and parse there."""
+
+    @abstractmethod
+    def load(self) -> Any:
+        """The item itself, read and built in the process that will use it."""
+
+
+def loaded(items: Iterable[Any]) -> Iterator[Any]:
+    """The items with every `Deferred` one loaded, for passes over them outside `parallel_map`."""
+    return (item.load() if isinstance(item, Deferred) else item for item in items)
+
+
+def _load_and_call(fn: Callable[[Any], Any], item: Any) -> Any:
+    return fn(item.load() if isinstance(item, Deferred) else item)
+
+
+def parallel_map(fn: Callable[[Any], Any], items: Iterable[Any], workers: Optional[int] = 1) -> Iterator[Any]:
+    """`map(fn, items)` spread over `workers` processes, yielding results in input order.
+
+    `fn` and the items must be picklable (a top-level function, or a
+    `functools.partial` of one). At most two items per worker are in flight at
+    a time, so a lazy `items` iterator is never read far ahead of the results
+    the caller has consumed. `workers=None` uses every core; 1 runs in-process.
+    `Deferred` items are loaded by the worker before `fn` gets them.
+    """
+    fn = partial(_load_and_call, fn)
+    workers = workers or default_workers()
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+
+    # Imported here so single-process runs don't pay for it at start-up
+    from concurrent.futures import ProcessPoolExecutor
+
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(fn, item) for item in islice(items, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            for item in islice(items, 1):
+                pending.append(pool.submit(fn, item))
+            yield result
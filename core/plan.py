@@ -0,0 +1,60 @@
+from typing import Any, Dict, List
+
+from core.expressions import check_expression, compile_filter, expression_columns, filter_expression, format_expression
+from core.groupby import group_by_spec
+from core.schema import Schema
+
+
+class QueryPlan:
+    """Logical plan of one run over the clean -> filter -> compute -> aggregate -> analyze stages.
+
+    Cleaning works value by value and the filter only reads the columns it
+    names, so the filter can be pushed down to right after the load: it runs
+    on the raw values of those columns, cleaned on their own, and rows it
+    rejects are never cleaned or computed. The per-row steps left (missing data, dates, rounding
+    and the computed column) are fused into one pass over each row, or done
+    column by column by the implementations that work on whole columns.
+    Results are the same as running the stages one after another, which is
+    what an unoptimized plan (`optimize=False`) does.
+    """
+
+    def __init__(self, config: Dict[str, Any], schema: Schema, optimize: bool = True):
+        self.config = config
+        self.optimize = optimize
+        expression = filter_expression(config.get('filter'))
+        self.expression = check_expression(expression, schema) if expression is not None else None
+        self.filter_columns: List[str] = expression_columns(self.expression) if self.expression is not None else []
+        self.pushdown = optimize and self.expression is not None
+        # Called with a mapping of the filter columns' cleaned values
+        self.predicate = compile_filter(self.expression, schema) if self.pushdown else None
+
+    @property
+    def stage_config(self) -> Dict[str, Any]:
+        """The config the remaining stages run with: without the filter once it has been pushed down."""
+        return {**self.config, 'filter': {'apply': False}} if self.pushdown else self.config
+
+    def steps(self) -> List[str]:
+        condition = f"filter {format_expression(self.expression)}" if self.expression is not None else None
+        clean = f"clean (missing: {self.config.get('missing_data_action', 'keep')}, dates, rounding)"
+        compute = f"compute {self.config['compute']}" if self.config.get('compute') else None
+
+        steps = ['load']
+        if self.pushdown:
+            steps.append(f"{condition}  [pushed down, on raw values]")
+        if self.optimize:
+            steps.append(f"{clean} + {compute}  [fused, one pass]" if compute else f"{clean}  [one pass]")
+        else:
+            steps.append(clean)
+            if condition is not None:
+                steps.append(condition)
+            if compute:
+                steps.append(compute)
+        group_by = group_by_spec(self.config)
+        if group_by is not None:
+            keys, aggregates = group_by
+            steps.append(f"group by {', '.join(keys) or '(all rows)'}: {', '.join(aggregates)}  [hash aggregation, one pass]")
+        steps.append('analyze')
+        return steps
+
+    def explain(self) -> str:
+        return "\n".join(f"{number}. {step}" for number, step in enumerate(self.steps(), 1))
@@ -0,0 +1,217 @@
+import math
+import random
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_K = 200
+DEFAULT_EXACT_LIMIT = 100_000
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.99)
+
+
+class QuantileSketch:
+    """Streaming quantiles of a numeric column: exact for small inputs, a KLL sketch beyond that.
+
+    Up to `exact_limit` values are buffered and quantiles are exact. Past the
+    limit the buffer is folded into a KLL sketch (Karnin, Lang and Liberty,
+    2016). The sketch keeps O(k log(n/k)) values in levels of weight 2**h and
+    compacts a full level by sorting it and promoting every other item. Larger
+    `k` means more memory and a smaller rank error. Sketches built over
+    different chunks can be combined with `merge`.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, exact_limit: int = DEFAULT_EXACT_LIMIT, seed: int = 0):
+        self.k = k
+        self.exact_limit = exact_limit
+        self.count = 0
+        self._exact: Optional[array] = array('d')
+        self._levels: List[List[float]] = []
+        self._size = 0
+        self._capacity = 0
+        # A fixed seed keeps results reproducible run to run
+        self._random = random.Random(seed)
+
+    @property
+    def is_exact(self) -> bool:
+        return self._exact is not None
+
+    def update(self, value: float) -> "QuantileSketch":
+        """Add one value and return self, so the sketch can be used with `reduce`."""
+        self.count += 1
+        if self._exact is not None:
+            self._exact.append(value)
+            if len(self._exact) > self.exact_limit:
+                self._to_sketch()
+            return self
+
+        self._levels[0].append(value)
+        self._size += 1
+        if self._size >= self._capacity:
+            self._compress()
+        return self
+
+    def extend(self, values: Sequence[float]) -> "QuantileSketch":
+        """Add many values at once and return self.
+
+        Much cheaper than calling `update` per value once the sketch is no longer
+        exact: the values are compacted as one block, the way `merge` does, which
+        costs a few sorts instead of one small compaction every few values.
+        """
+        self.count += len(values)
+        if self._exact is not None:
+            self._exact.extend(values)
+            if len(self._exact) > self.exact_limit:
+                self._to_sketch()
+            return self
+
+        self._levels[0].extend(values)
+        self._size += len(values)
+        if self._size >= self._capacity:
+            self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold `other` into self and return self; `other` is left unchanged."""
+        if other.count == 0:
+            return self
+
+        self.count += other.count
+        if self._exact is not None and other._exact is not None and len(self._exact) + len(other._exact) <= self.exact_limit:
+            self._exact.extend(other._exact)
+            return self
+
+        if self._exact is not None:
+            self._to_sketch()
+        if other._exact is not None:
+            self._levels[0].extend(other._exact)
+        else:
+            while len(self._levels) < len(other._levels):
+                self._grow()
+            for h, level in enumerate(other._levels):
+                self._levels[h].extend(level)
+        self._size = sum(len(level) for level in self._levels)
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """Values at fractions `qs` (0..1) of the distribution.
+
+        Exact values interpolate between the two closest ranks, the same way the
+        median has always been computed. Sketched values are the first retained
+        item whose cumulative weight reaches the requested rank.
+        """
+        if self.count == 0:
+            return [None for _ in qs]
+
+        if self._exact is not None:
+            values = sorted(self._exact)
+            return [_interpolate(values, q) for q in qs]
+
+        weighted = sorted((value, 1 << h) for h, level in enumerate(self._levels) for value in level)
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for q in qs:
+            target = q * total
+            cumulative = 0
+            result = weighted[-1][0]
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    result = value
+                    break
+            results.append(result)
+        return results
+
+    def rank_error(self) -> float:
+        """Normalized rank error of any one quantile: 0.0 when exact.
+
+        Otherwise this is the bound the KLL sketch meets with 99% confidence
+        (2.296 / k**0.9723, the Apache DataSketches estimate).
+        """
+        if self._exact is not None:
+            return 0.0
+        return 2.296 / self.k ** 0.9723
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain data for JSON, including the random state so a restored sketch compacts as this one would."""
+        version, internal, gauss = self._random.getstate()
+        return {
+            'k': self.k,
+            'exact_limit': self.exact_limit,
+            'count': self.count,
+            'exact': self._exact.tolist() if self._exact is not None else None,
+            'levels': self._levels,
+            'random': [version, list(internal), gauss],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data['k'], data['exact_limit'])
+        sketch.count = data['count']
+        sketch._exact = array('d', data['exact']) if data['exact'] is not None else None
+        sketch._levels = [[float(value) for value in level] for level in data['levels']]
+        sketch._size = sum(len(level) for level in sketch._levels)
+        sketch._capacity = sum(sketch._level_capacity(h) for h in range(len(sketch._levels)))
+        version, internal, gauss = data['random']
+        sketch._random.setstate((version, tuple(internal), gauss))
+        return sketch
+
+    def _to_sketch(self) -> None:
+        values = self._exact
+        self._exact = None
+        self._grow()
+        self._levels[0].extend(values)
+        self._size = len(values)
+        self._compress()
+
+    def _level_capacity(self, h: int) -> int:
+        # Lower levels get geometrically (2/3) smaller capacities than the top one
+        return max(2, math.ceil(self.k * (2 / 3) ** (len(self._levels) - h - 1)))
+
+    def _grow(self) -> None:
+        self._levels.append([])
+        self._capacity = sum(self._level_capacity(h) for h in range(len(self._levels)))
+
+    def _compress(self) -> None:
+        while self._size >= self._capacity:
+            for h, level in enumerate(self._levels):
+                if len(level) >= self._level_capacity(h):
+                    if h + 1 == len(self._levels):
+                        self._grow()
+                    level.sort()
+                    offset = self._random.randint(0, 1)
+                    # An odd item out stays behind at this level
+                    keep = [level.pop()] if len(level) % 2 else []
+                    self._levels[h + 1].extend(level[offset::2])
+                    self._levels[h] = keep
+                    break
+            self._size = sum(len(level) for level in self._levels)
+
+
+def _interpolate(sorted_values: List[float], q: float) -> float:
+    position = q * (len(sorted_values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    if position == lower:
+        return sorted_values[lower]
+    if q == 0.5:
+        # Keep the plain two-middle-values average the median has always used
+        return (sorted_values[lower] + sorted_values[upper]) / 2
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def sketch_from_options(options: Optional[Dict[str, Any]] = None) -> QuantileSketch:
+    """New sketch configured from the pipeline's optional `quantiles` config: {'k': ..., 'exact_limit': ...}."""
+    options = options or {}
+    return QuantileSketch(options.get('k', DEFAULT_K), options.get('exact_limit', DEFAULT_EXACT_LIMIT))
+
+
+def percentile_report(sketch: QuantileSketch, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+    """Percentiles of one column keyed 'p50', 'p90', ... as shown in the analysis report."""
+    percentiles = list(percentiles)
+    return {
+        f"p{100 * q:g}": value
+        for q, value in zip(percentiles, sketch.quantiles(percentiles))
+    }
@@ -0,0 +1,123 @@
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Distinct values a column's intern pool may hold; a column with more is high-cardinality and its pool is cleared
+POOL_LIMIT = 4096
+# Records interned between checks of the pool sizes
+_POOL_CHECK_ROWS = 16_384
+
+
+class Header:
+    """Column names shared by many records, with the position of each one's value.
+
+    Adding or removing a column gives another shared header, cached here, so
+    rows that gain the same computed column keep sharing one header.
+    """
+
+    __slots__ = ('names', 'positions', '_with', '_without')
+
+    def __init__(self, names: Iterable[str]):
+        self.positions: Dict[str, int] = {name: position for position, name in enumerate(names)}
+        self.names = tuple(self.positions)
+        self._with: Dict[str, "Header"] = {}
+        self._without: Dict[str, "Header"] = {}
+
+    def with_name(self, name: str) -> "Header":
+        header = self._with.get(name)
+        if header is None:
+            header = self._with[name] = Header(self.names + (name,))
+        return header
+
+    def without(self, name: str) -> "Header":
+        header = self._without.get(name)
+        if header is None:
+            header = self._without[name] = Header(tuple(col for col in self.names if col != name))
+        return header
+
+
+class Record(MutableMapping):
+    """One row as a list of values over a shared `Header`: a mutable mapping like the row dicts, in about a third of the memory.
+
+    A dict per row keeps its own hash table of the column names; a record
+    keeps only its values. Reads, writes, `get`, `keys`, `values` and `items`
+    behave as a dict's, so the stages work on records unchanged, and a record
+    compares equal to the dict with the same items.
+    """
+
+    __slots__ = ('_header', '_values')
+
+    def __init__(self, header: Header, values: List[Any]):
+        self._header = header
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._header.positions[key]]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        position = self._header.positions.get(key)
+        return default if position is None else self._values[position]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        position = self._header.positions.get(key)
+        if position is None:
+            self._header = self._header.with_name(key)
+            self._values.append(value)
+        else:
+            self._values[position] = value
+
+    def __delitem__(self, key: str) -> None:
+        position = self._header.positions[key]
+        self._header = self._header.without(key)
+        del self._values[position]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._header.positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._header.names)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def keys(self):
+        return self._header.positions.keys()
+
+    def values(self) -> List[Any]:
+        return self._values
+
+    def items(self) -> List[tuple]:
+        return list(zip(self._header.names, self._values))
+
+    def copy(self) -> "Record":
+        return Record(self._header, self._values.copy())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The row as a plain dict, built without going through `__getitem__`; faster for code that writes most values."""
+        return dict(zip(self._header.names, self._values))
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+def make_records(header: Sequence[str] | Header, records: Iterable[List[Any]], pools: Optional[List[Dict[Any, Any]]] = None) -> List[Record]:
+    """`Record`s of parsed CSV records (lists of field values in `header` order), with repeated values interned.
+
+    Each column's values go through its pool in `pools`, so a value repeated
+    in many rows (a region, a category, a date) is stored once. Pools that
+    outgrow `POOL_LIMIT` are cleared, which keeps the pools of unique-valued
+    columns small. Pass the same `pools` for every part of one file.
+    """
+    header = header if isinstance(header, Header) else Header(header)
+    pools = pools if pools is not None else new_pools(len(header.names))
+    rows: List[Record] = []
+    for count, record in enumerate(records, 1):
+        rows.append(Record(header, list(map(dict.setdefault, pools, record, record))))
+        if count % _POOL_CHECK_ROWS == 0:
+            for pool in pools:
+                if len(pool) > POOL_LIMIT:
+                    pool.clear()
+    return rows
+
+
+def new_pools(num_fields: int) -> List[Dict[Any, Any]]:
+    return [{} for _ in range(num_fields)]
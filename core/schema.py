@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.utils import SAMPLE_SIZE, infer_column_types, sample_column_values
+
+# Rows read to infer a schema; inference never looks past them
+DEFAULT_SAMPLE_ROWS = 1_000
+
+# Formats tried, in order, when detecting a date column's format
+DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%d-%m-%Y', '%m-%d-%Y', '%d/%m/%Y', '%m/%d/%Y')
+
+
+class Schema(dict):
+    """Column name -> type ('number', 'date' or 'string'), inferred once and shared by every stage.
+
+    A Schema is a dict of column types, so it can go anywhere the stages used to
+    take the result of `infer_column_types`. It also records the detected
+    format of each date column, so values are parsed with one known format
+    instead of trying every pattern per value.
+    """
+
+    def __init__(self, types: Optional[Dict[str, str]] = None, date_formats: Optional[Dict[str, Optional[str]]] = None):
+        super().__init__(types or {})
+        self.date_formats: Dict[str, Optional[str]] = dict(date_formats or {})
+
+    @classmethod
+    def infer(cls, rows: Iterable[Dict[str, Any]], sample_rows: int = DEFAULT_SAMPLE_ROWS) -> "Schema":
+        """Infer column types and date formats from at most the first `sample_rows` rows."""
+        sample = list(islice(rows, sample_rows))
+        types = infer_column_types(sample)
+        date_cols = [col for col, col_type in types.items() if col_type == 'date']
+        samples = sample_column_values(sample, date_cols, SAMPLE_SIZE)
+        return cls(types, {col: detect_date_format(samples[col]) for col in date_cols})
+
+    @classmethod
+    def load(cls, file_path: str, rows: Optional[Iterable[Dict[str, Any]]] = None) -> "Schema":
+        """Read a schema file, filling in columns it does not mention by inference over `rows`.
+
+        The file is JSON, either a plain {"column": "type"} mapping or
+        {"types": {...}, "date_formats": {"column": "%d-%m-%Y"}}.
+        """
+        with open(file_path, 'r', encoding='utf-8') as file:
+            spec = json.load(file)
+
+        types = spec.get('types', {}) if 'types' in spec else spec
+        date_formats = spec.get('date_formats', {}) if 'types' in spec else {}
+        for col, col_type in types.items():
+            if col_type not in ('number', 'date', 'string'):
+                raise ValueError(f"Unknown type '{col_type}' for column '{col}' in schema file '{file_path}'")
+
+        inferred = cls.infer(rows) if rows is not None else cls()
+        return inferred.with_overrides(types, date_formats)
+
+    def with_overrides(self, types: Dict[str, str], date_formats: Optional[Dict[str, str]] = None) -> "Schema":
+        """Return a copy with the given column types (and date formats) replacing the inferred ones."""
+        merged_formats = {col: fmt for col, fmt in self.date_formats.items() if types.get(col, 'date') == 'date'}
+        merged_formats.update(date_formats or {})
+        return Schema({**self, **types}, merged_formats)
+
+
+def detect_date_format(values: List[Any]) -> Optional[str]:
+    """First format in DATE_FORMATS that parses every sample, or None if the samples mix formats."""
+    for fmt in DATE_FORMATS:
+        try:
+            for value in values:
+                datetime.strptime(str(value).strip().split()[0], fmt)
+            return fmt
+        except (ValueError, IndexError):
+            continue
+    return None
@@ -0,0 +1,250 @@
+import hashlib
+import heapq
+import math
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from core.table import DictColumn, Table
+
+# 2**12 registers: 4 KB per column and a 1.6% standard error on distinct counts
+DEFAULT_PRECISION = 12
+# Values a top-k summary tracks; more than it reports, so the reported ones are rarely evicted
+DEFAULT_CAPACITY = 64
+DEFAULT_TOP_K = 5
+# Rows counted at a time, which bounds the exact counts held before they are folded into the sketches
+_CHUNK_ROWS = 16_384
+
+
+class HyperLogLog:
+    """Approximate count of distinct values in fixed memory (Flajolet et al., 2007).
+
+    Each value's 64-bit hash picks one of 2**precision registers, which keeps
+    the longest run of leading zeros seen in the rest of the hash. Adding a
+    value twice changes nothing, and two sketches merge by taking the larger of
+    each register, so chunks and workers can be counted apart.
+    """
+
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def update(self, values: Iterable[str]) -> "HyperLogLog":
+        """Add values and return self; pass each distinct value once, since repeats only cost time."""
+        registers = self.registers
+        rest_bits = 64 - self.precision
+        rest_mask = (1 << rest_bits) - 1
+        # Python's own str hash differs between processes, and sketches are merged across workers and runs
+        blake2b, from_bytes = hashlib.blake2b, int.from_bytes
+        for value in values:
+            hashed = from_bytes(blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=8).digest())
+            index = hashed >> rest_bits
+            rank = rest_bits - (hashed & rest_mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold `other` into self and return self; `other` is left unchanged."""
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of precision {self.precision} and {other.precision}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        zeros = self.registers.count(0)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -rank for rank in self.registers)
+        # Linear counting is the better estimate while many registers are still empty
+        if zeros and raw <= 2.5 * m:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def relative_error(self) -> float:
+        """Standard error of `estimate` relative to the true count."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain data for JSON, the registers as hex; `from_dict` reads it back."""
+        return {'precision': self.precision, 'registers': self.registers.hex()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(data['precision'])
+        registers = bytearray.fromhex(data['registers'])
+        if len(registers) != len(sketch.registers):
+            raise ValueError(f"Expected {len(sketch.registers)} HyperLogLog registers, got {len(registers)}")
+        sketch.registers = registers
+        return sketch
+
+
+class TopK:
+    """The most frequent values of a column, with at most `capacity` counters (Space-Saving, Metwally et al., 2005).
+
+    Each tracked value has a count that is never below its true count, and an
+    error: the true count is at least count - error. A value that is not
+    tracked occurs at most `floor` times. While no more than `capacity`
+    distinct values were seen, the counts are exact and `floor` is 0.
+    Summaries of different chunks merge as in Agarwal et al.'s mergeable
+    summaries (2012): counts are added, a value missing from one side is
+    taken to have that side's `floor`, and the largest `capacity` are kept.
+    """
+
+    __slots__ = ('capacity', 'counts', 'errors', 'floor', 'total')
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+        self.errors: Dict[Any, int] = {}
+        self.floor = 0
+        self.total = 0
+
+    def update(self, counts: Mapping[Any, int]) -> "TopK":
+        """Add the exact counts of one chunk of values and return self."""
+        return self._combine(counts, {}, 0, sum(counts.values()))
+
+    def merge(self, other: "TopK") -> "TopK":
+        """Fold `other` into self and return self; `other` is left unchanged."""
+        return self._combine(other.counts, other.errors, other.floor, other.total)
+
+    def _combine(self, counts: Mapping[Any, int], errors: Mapping[Any, int], floor: int, total: int) -> "TopK":
+        merged = {value: count + counts.get(value, floor) for value, count in self.counts.items()}
+        merged_errors = {
+            value: error + (errors.get(value, 0) if value in counts else floor)
+            for value, error in self.errors.items()
+        }
+        for value, count in counts.items():
+            if value not in merged:
+                merged[value] = count + self.floor
+                merged_errors[value] = errors.get(value, 0) + self.floor
+        self.floor += floor
+        self.total += total
+
+        if len(merged) > self.capacity:
+            kept = heapq.nlargest(self.capacity + 1, merged.items(), key=itemgetter(1))
+            # The largest dropped count bounds every value no longer tracked
+            self.floor = max(self.floor, kept.pop()[1])
+            merged = dict(kept)
+            merged_errors = {value: merged_errors[value] for value in merged}
+        self.counts, self.errors = merged, merged_errors
+        return self
+
+    def top(self, k: int = DEFAULT_TOP_K) -> List[Tuple[Any, int, int]]:
+        """Up to `k` values with the largest counts as (value, count, error), ties in value order.
+
+        Only values certain to occur more often than any untracked value are
+        listed, so a column of unique values has none.
+        """
+        ranked = sorted(
+            ((value, count) for value, count in self.counts.items() if count - self.errors[value] > self.floor),
+            key=lambda item: (-item[1], item[0])
+        )
+        return [(value, count, self.errors[value]) for value, count in islice(ranked, k)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain data for JSON; counts are [value, count, error] lists so values need not be strings."""
+        return {
+            'capacity': self.capacity,
+            'counts': [[value, count, self.errors[value]] for value, count in self.counts.items()],
+            'floor': self.floor,
+            'total': self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TopK":
+        summary = cls(data['capacity'])
+        summary.counts = {value: count for value, count, _ in data['counts']}
+        summary.errors = {value: error for value, _, error in data['counts']}
+        summary.floor, summary.total = data['floor'], data['total']
+        return summary
+
+
+class StringSketch:
+    """Distinct count and most frequent values of one string column, in fixed memory and mergeable across chunks."""
+
+    __slots__ = ('distinct', 'frequent')
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, capacity: int = DEFAULT_CAPACITY):
+        self.distinct = HyperLogLog(precision)
+        self.frequent = TopK(capacity)
+
+    def update(self, counts: Mapping[str, int]) -> "StringSketch":
+        """Add the exact counts of one chunk of a column's values and return self."""
+        self.distinct.update(counts)
+        self.frequent.update(counts)
+        return self
+
+    def merge(self, other: "StringSketch") -> "StringSketch":
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'distinct': self.distinct.to_dict(), 'frequent': self.frequent.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StringSketch":
+        sketch = cls.__new__(cls)
+        sketch.distinct = HyperLogLog.from_dict(data['distinct'])
+        sketch.frequent = TopK.from_dict(data['frequent'])
+        return sketch
+
+
+def string_columns(schema: Optional[Mapping[str, str]]) -> List[str]:
+    """The columns the schema types as 'string'; dates and numbers get statistics of their own. None without a schema."""
+    return [col for col, col_type in (schema or {}).items() if col_type == 'string']
+
+
+def string_counts(rows, columns: Iterable[str]) -> Dict[str, Counter]:
+    """Occurrences of each non-empty string value of `columns`, per column, in a chunk of rows or a `Table`.
+
+    A column that is absent, or has no string value in the chunk, is left out.
+    """
+    counts = {}
+    for col in columns:
+        if isinstance(rows, Table):
+            column = rows.columns.get(col)
+            if not isinstance(column, DictColumn):
+                continue
+            dictionary = column.dictionary
+            col_counts = Counter({dictionary[code]: count for code, count in Counter(column.codes).items()})
+        elif not rows:
+            continue
+        else:
+            try:
+                col_counts = Counter(map(itemgetter(col), rows))
+            except KeyError:
+                # Some row lacks the column; count it there as missing
+                col_counts = Counter([row.get(col) for row in rows])
+        for missing in [value for value in col_counts if not isinstance(value, str) or not value]:
+            del col_counts[missing]
+        if col_counts:
+            counts[col] = col_counts
+    return counts
+
+
+def update_string_sketches(sketches: Dict[str, StringSketch], rows, columns: Iterable[str]) -> Dict[str, StringSketch]:
+    """Fold `columns` of `rows` (a list of rows or a `Table`) into `sketches`, a chunk at a time, and return it."""
+    columns = list(columns)
+    if not columns:
+        return sketches
+    chunks = [rows] if isinstance(rows, Table) else (rows[start:start + _CHUNK_ROWS] for start in range(0, len(rows), _CHUNK_ROWS))
+    for chunk in chunks:
+        for col, counts in string_counts(chunk, columns).items():
+            sketch = sketches.get(col)
+            if sketch is None:
+                sketch = sketches[col] = StringSketch()
+            sketch.update(counts)
+    return sketches
+
+
+def string_report(sketches: Mapping[str, StringSketch], k: int = DEFAULT_TOP_K) -> Dict[str, Dict[str, Any]]:
+    """The report sections of string column sketches: distinct counts and their error, and top values."""
+    return {
+        'distinct': {col: sketch.distinct.estimate() for col, sketch in sketches.items()},
+        'distinct_error': {col: sketch.distinct.relative_error() for col, sketch in sketches.items()},
+        'top_values': {col: sketch.frequent.top(k) for col, sketch in sketches.items()},
+    }
@@ -0,0 +1,75 @@
+import glob
+import mmap
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.io import BATCH_READERS, batch_reader, is_output_file
+from core.mmap_csv import parse_rows, read_header, split_ranges
+from core.parallel import Deferred
+
+# Bytes sampled after the header of a CSV file to estimate the length of its records
+_SAMPLE_BYTES = 1 << 16
+_GLOB_CHARS = '*?['
+
+
+def is_pattern(path: str) -> bool:
+    return any(char in path for char in _GLOB_CHARS)
+
+
+def expand_dataset(path: str) -> List[str]:
+    """The files a dataset path names, sorted by name.
+
+    That is the file itself, or the CSV, JSON and NDJSON files in a directory
+    (not its subdirectories), or the files of those types that a glob pattern
+    such as `exports/sales_*.csv` matches. Empty files are left out, and so is
+    the output of earlier runs (see `is_output_file`), which is not a dataset.
+    """
+    if os.path.isdir(path):
+        names = [os.path.join(path, name) for name in os.listdir(path)]
+    elif is_pattern(path):
+        names = glob.glob(path)
+    else:
+        return [path]
+    return sorted(
+        name for name in names
+        if name.endswith(tuple(BATCH_READERS)) and not is_output_file(name)
+        and os.path.isfile(name) and os.path.getsize(name) > 0
+    )
+
+
+def source_root(path: str) -> str:
+    """What the output of a directory or glob is named after: the directory, or the last directory of a pattern before any wildcard."""
+    if is_pattern(path):
+        parts = os.path.normpath(path).split(os.sep)
+        path = os.sep.join(parts[:next(i for i, part in enumerate(parts) if is_pattern(part))]) or '.'
+    # Absolute, so that '.' (and so 'sales_*.csv') still has a name
+    return os.path.abspath(path)
+
+
+class FileRange(Deferred):
+    """The rows of one dataset file, or of a byte range of whole records of a CSV file, read and parsed when loaded."""
+
+    def __init__(self, path: str, span: Optional[Tuple[int, int]] = None, headers: Optional[List[str]] = None):
+        self.path = path
+        self.span = span
+        self.headers = headers
+
+    def load(self) -> List[Dict[str, Any]]:
+        if self.span is None:
+            return [row for batch in batch_reader(self.path)(self.path, 1 << 20) for row in batch]
+        return parse_rows(self.span, self.path, self.headers)
+
+
+def file_ranges(paths: List[str], batch_size: int) -> Iterator[FileRange]:
+    """The rows of `paths`, in order, as ranges of about `batch_size` rows each; a JSON file is one range."""
+    for path in paths:
+        if not path.endswith('.csv'):
+            yield FileRange(path)
+            continue
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            headers, start = read_header(mapped)
+            sample = mapped[start:start + _SAMPLE_BYTES]
+            record_bytes = max(len(sample) // max(sample.count(b'\n'), 1), 1)
+            spans = split_ranges(mapped, start, -(-(len(mapped) - start) // (record_bytes * batch_size)))
+        for span in spans:
+            yield FileRange(path, span, headers)
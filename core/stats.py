@@ -0,0 +1,73 @@
+import math
+from typing import Any, Dict, Iterable
+
+
+class RunningStats:
+    """One-pass count, mean, variance, min and max of a numeric column.
+
+    The mean and the sum of squared differences (M2) are updated with Welford's
+    algorithm, so no values are kept. Two accumulators built over different
+    chunks of a column can be combined with `merge` (Chan et al.'s pairwise
+    update), which gives the same result as one pass over both chunks.
+    """
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0, min: float = math.inf, max: float = -math.inf):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = min
+        self.max = max
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> "RunningStats":
+        stats = cls()
+        for value in values:
+            stats.update(value)
+        return stats
+
+    def update(self, value: float) -> "RunningStats":
+        """Add one value and return self, so the accumulator can be used with `reduce`."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        return self
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Fold `other` into self and return self; `other` is left unchanged."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2, self.min, self.max = other.count, other.mean, other.m2, other.min, other.max
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def to_dict(self) -> Dict[str, float]:
+        """Plain data for JSON; `from_dict` reads it back."""
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        return cls(data['count'], data['mean'], data['m2'], data['min'], data['max'])
+
+    @property
+    def variance(self) -> float:
+        """Population variance, matching what the analysis report has always shown."""
+        return self.m2 / self.count if self.count else 0.0
+
+    def __repr__(self) -> str:
+        return f"RunningStats(count={self.count}, mean={self.mean}, variance={self.variance}, min={self.min}, max={self.max})"
@@ -0,0 +1,304 @@
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from core.utils import infer_column_types
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value == "" or value != value
+
+
+class NumberColumn:
+    """Floats stored contiguously in an `array('d')`. Missing values are stored as NaN and read back as None."""
+
+    def __init__(self, values: Optional[array] = None):
+        self.values = values if values is not None else array('d')
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> Optional[float]:
+        value = self.values[index]
+        return None if value != value else value
+
+    def __setitem__(self, index: int, value: Any) -> None:
+        self.values[index] = float('nan') if _is_missing(value) else float(value)
+
+    def __iter__(self) -> Iterator[Optional[float]]:
+        return (None if value != value else value for value in self.values)
+
+    def append(self, value: Any) -> None:
+        self.values.append(float('nan') if _is_missing(value) else float(value))
+
+    def take(self, indices: Iterable[int]) -> "NumberColumn":
+        values = self.values
+        return NumberColumn(array('d', (values[i] for i in indices)))
+
+    def map(self, fn) -> "Column":
+        return column_from_values(map(fn, self))
+
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values)
+
+
+class DictColumn:
+    """Values stored as `array('i')` codes into a dictionary of the distinct values.
+
+    Used for string and date columns, whose values repeat heavily. Missing values
+    ("" or None) are kept as ordinary dictionary entries.
+    """
+
+    def __init__(self, codes: Optional[array] = None, dictionary: Optional[List[Any]] = None):
+        self.codes = codes if codes is not None else array('i')
+        self.dictionary: List[Any] = dictionary if dictionary is not None else []
+        self._lookup: Dict[Any, int] = {value: code for code, value in enumerate(self.dictionary)}
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any]) -> "DictColumn":
+        values = values if isinstance(values, list) else list(values)
+        # dict.fromkeys keeps first-seen order; both passes run in C
+        lookup = {value: code for code, value in enumerate(dict.fromkeys(values))}
+        return cls(array('i', map(lookup.__getitem__, values)), list(lookup))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.dictionary[self.codes[index]]
+
+    def __setitem__(self, index: int, value: Any) -> None:
+        self.codes[index] = self.encode(value)
+
+    def __iter__(self) -> Iterator[Any]:
+        dictionary = self.dictionary
+        return (dictionary[code] for code in self.codes)
+
+    def encode(self, value: Any) -> int:
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.dictionary)
+            self.dictionary.append(value)
+            self._lookup[value] = code
+        return code
+
+    def append(self, value: Any) -> None:
+        self.codes.append(self.encode(value))
+
+    def take(self, indices: Iterable[int]) -> "DictColumn":
+        """Select rows, keeping only the dictionary entries the selected rows still use."""
+        codes = self.codes
+        dictionary = self.dictionary
+        column = DictColumn()
+        column.codes = array('i', (column.encode(dictionary[codes[i]]) for i in indices))
+        return column
+
+    def map(self, fn) -> "Column":
+        """Apply `fn` once per distinct value instead of once per row."""
+        mapped = [fn(value) for value in self.dictionary]
+        if all(isinstance(value, float) for value in mapped):
+            return NumberColumn(array('d', (mapped[code] for code in self.codes)))
+
+        column = DictColumn()
+        remap = [column.encode(value) for value in mapped]
+        column.codes = array('i', (remap[code] for code in self.codes))
+        return column
+
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes) + sum(len(str(value)) for value in self.dictionary)
+
+
+Column = NumberColumn | DictColumn
+
+
+def column_from_values(values: Iterable[Any]) -> Column:
+    """Build a NumberColumn when every value is numeric or missing, a DictColumn otherwise."""
+    values = list(values)
+    if all(_is_missing(value) or isinstance(value, (int, float)) for value in values):
+        return NumberColumn(array('d', (float('nan') if _is_missing(value) else value for value in values)))
+    return DictColumn.from_values(values)
+
+
+class Row(MutableMapping):
+    """Dict-like view of one row of a Table; writes go straight to the column storage."""
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table: "Table", index: int):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self.table.columns[key][self.index]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.table.set_value(key, self.index, value)
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("Columns cannot be removed through a row")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table.columns)
+
+    def __len__(self) -> int:
+        return len(self.table.columns)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class Table:
+    """Column-oriented dataset: number columns as `array('d')`, string and date columns dictionary-encoded.
+
+    Iterating a Table yields `Row` views, so code written against a list of row
+    dicts runs on it unchanged; column-wise code can use `column`, `filter`,
+    `take` and `with_column` directly.
+    """
+
+    def __init__(self, columns: Optional[Dict[str, Column]] = None, length: int = 0):
+        self.columns: Dict[str, Column] = columns if columns is not None else {}
+        self.length = length
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[List[Dict[str, Any]]], col_types: Optional[Dict[str, str]] = None) -> "Table":
+        """Build a Table from row batches (e.g. `core.io.iter_csv`), one batch in memory at a time.
+
+        Without `col_types` (e.g. a `core.schema.Schema`) they are inferred from the
+        first batch. A number column that later meets a non-numeric value falls back
+        to dictionary encoding.
+        """
+        table = cls()
+        for batch in batches:
+            if not table.columns and batch:
+                col_types = col_types if col_types is not None else infer_column_types(batch)
+                table.columns = {
+                    col: NumberColumn() if col_types.get(col) == 'number' else DictColumn()
+                    for col in batch[0].keys()
+                }
+            for col, column in table.columns.items():
+                try:
+                    for row in batch:
+                        column.append(row.get(col))
+                except (TypeError, ValueError):
+                    column = table.columns[col] = DictColumn.from_values(list(column)[:table.length])
+                    for row in batch:
+                        column.append(row.get(col))
+            table.length += len(batch)
+        return table
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "Table":
+        return cls.from_batches([rows])
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List[Any]], col_types: Dict[str, str]) -> "Table":
+        """Build a Table from lists of column values, storing number columns that hold a non-numeric value dictionary-encoded."""
+        table = cls(length=len(next(iter(columns.values()), [])))
+        for col, values in columns.items():
+            if col_types.get(col) == 'number':
+                try:
+                    try:
+                        numbers = array('d', map(float, values))
+                    except (TypeError, ValueError):
+                        # Some values are missing (or not numbers at all)
+                        nan = float('nan')
+                        numbers = array('d', [nan if value in ('', None) else float(value) for value in values])
+                    table.columns[col] = NumberColumn(numbers)
+                    continue
+                except (TypeError, ValueError):
+                    pass
+            table.columns[col] = DictColumn.from_values(values)
+        return table
+
+    @classmethod
+    def concat(cls, tables: Iterable["Table"]) -> "Table":
+        """Stack Tables with the same columns, e.g. ones parsed from different parts of a file.
+
+        A column stored as numbers in one part and dictionary-encoded in another
+        ends up dictionary-encoded.
+        """
+        tables = list(tables)
+        if not tables:
+            return cls()
+
+        table = cls(length=sum(part.length for part in tables))
+        for col in tables[0].columns:
+            parts = [part.columns[col] for part in tables]
+            if all(isinstance(part, NumberColumn) for part in parts):
+                values = array('d')
+                for part in parts:
+                    values.extend(part.values)
+                table.columns[col] = NumberColumn(values)
+                continue
+
+            column = DictColumn()
+            for part in parts:
+                if isinstance(part, NumberColumn):
+                    part = DictColumn.from_values(part)
+                remap = [column.encode(value) for value in part.dictionary]
+                column.codes.extend(array('i', [remap[code] for code in part.codes]))
+            table.columns[col] = column
+        return table
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Row]:
+        return (Row(self, index) for index in range(self.length))
+
+    def __getitem__(self, key: int | slice) -> Any:
+        if isinstance(key, slice):
+            return self.take(range(*key.indices(self.length)))
+        if key < 0:
+            key += self.length
+        if not 0 <= key < self.length:
+            raise IndexError("Table index out of range")
+        return Row(self, key)
+
+    def __setitem__(self, key: slice, rows: Iterable[Dict[str, Any]]) -> None:
+        """Support `table[:] = rows`, the in-place replacement the imperative stages use to filter."""
+        if key != slice(None):
+            raise TypeError("Only full-slice assignment is supported on a Table")
+
+        rows = list(rows)
+        if all(isinstance(row, Row) and row.table is self for row in rows):
+            replaced = self.take([row.index for row in rows])
+        else:
+            replaced = Table.from_rows([dict(row) for row in rows])
+        self.columns = replaced.columns
+        self.length = replaced.length
+
+    def keys(self) -> List[str]:
+        return list(self.columns.keys())
+
+    def column(self, name: str) -> Column:
+        return self.columns[name]
+
+    def set_value(self, col: str, index: int, value: Any) -> None:
+        column = self.columns.get(col)
+        if column is None:
+            column = NumberColumn(array('d', [float('nan')]) * self.length) if value is None or isinstance(value, (int, float)) else DictColumn(array('i', [0]) * self.length, [None])
+            self.columns[col] = column
+        try:
+            column[index] = value
+        except (TypeError, ValueError):
+            column = self.columns[col] = DictColumn.from_values(column)
+            column[index] = value
+
+    def take(self, indices: Iterable[int]) -> "Table":
+        indices = list(indices)
+        return Table({col: column.take(indices) for col, column in self.columns.items()}, len(indices))
+
+    def filter(self, mask: Iterable[bool]) -> "Table":
+        return self.take(index for index, keep in enumerate(mask) if keep)
+
+    def with_column(self, name: str, column: Column) -> "Table":
+        """Return a new Table sharing every column except `name`, which is added or replaced."""
+        return Table({**self.columns, name: column}, self.length)
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self]
+
+    def nbytes(self) -> int:
+        """Approximate size of the column storage in bytes."""
+        return sum(column.nbytes() for column in self.columns.values())
@@ -1,6 +1,26 @@
-from typing import List, Dict, Any
+from typing import Iterable, List, Dict, Any
 import re
 
+# Number of non-empty values per column that type inference looks at
+SAMPLE_SIZE = 20
+
+def sample_column_values(rows: Iterable[Dict[str, Any]], cols: List[str], size: int) -> Dict[str, List[Any]]:
+    """Collect up to `size` non-empty values per column, reading rows only until every column has enough."""
+    samples: Dict[str, List[Any]] = {col: [] for col in cols}
+    pending = set(cols)
+    for row in rows:
+        for col in list(pending):
+            v = row.get(col)
+            # skip None or empty strings
+            if v in (None, ""):
+                continue
+            samples[col].append(v)
+            if len(samples[col]) >= size:
+                pending.discard(col)
+        if not pending:
+            break
+    return samples
+
 def infer_column_types(dataset: List[Dict[str, Any]]) -> Dict[str, str]:
     types: Dict[str, str] = {}
     if not dataset:
@@ -10,18 +30,17 @@ def infer_column_types(dataset: List[Dict[str, Any]]) -> Dict[str, str]:
     date_pattern1 = re.compile(r"^\d{4}[-/]\d{1,2}[-/]\d{1,2}$")
     date_pattern2 = re.compile(r"^\d{1,2}[-/]\d{1,2}[-/]\d{4}$")
 
+    samples_by_col = sample_column_values(dataset, cols, SAMPLE_SIZE)
     for col in cols:
-        values = [row.get(col) for row in dataset]
-        # skip None or empty strings
-        samples = [v for v in values if v not in (None, "")]
+        samples = samples_by_col[col]
         if not samples:
             types[col] = "string"
             continue
 
         num_count = 0
         date_count = 0
-        total = min(len(samples), 20)
-        for v in samples[:20]:
+        total = len(samples)
+        for v in samples:
             s = str(v).strip()
             # numeric?
             try:
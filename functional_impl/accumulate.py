@@ -0,0 +1,30 @@
+"""Transient accumulators for `reduce`.
+
+Building a fresh dict or list on every step (`{**acc, key: ...}`, `acc + [item]`)
+copies the whole accumulator per row and makes a reduction quadratic. The helpers
+below update the accumulator in place and return it instead. That is safe as long
+as the accumulator is the initial value created for that one `reduce` call and
+never escapes before the reduction finishes, so the enclosing function stays pure.
+"""
+from typing import Any, Callable, Dict, Hashable, List
+
+
+def assoc(acc: Dict[Hashable, Any], key: Hashable, value: Any) -> Dict[Hashable, Any]:
+    """Set `acc[key]` and return `acc`."""
+    acc[key] = value
+    return acc
+
+def update_with(acc: Dict[Hashable, Any], key: Hashable, fn: Callable[[Any], Any], default: Any) -> Dict[Hashable, Any]:
+    """Replace `acc[key]` (or `default` when absent) with `fn` of it and return `acc`."""
+    acc[key] = fn(acc.get(key, default))
+    return acc
+
+def add_to(acc: Dict[Hashable, Any], key: Hashable, value: Any) -> Dict[Hashable, Any]:
+    """Add `value` to the running total under `key` and return `acc`."""
+    acc[key] = acc.get(key, 0) + value
+    return acc
+
+def append_to(acc: Dict[Hashable, List[Any]], key: Hashable, value: Any) -> Dict[Hashable, List[Any]]:
+    """Append `value` to the list under `key` and return `acc`."""
+    acc.setdefault(key, []).append(value)
+    return acc
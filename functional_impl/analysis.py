@@ -1,139 +1,19 @@
-from typing import Any, List, Dict
+import copy
+from typing import Any, List, Dict, Optional
 from functools import reduce
 
-def _calculate_mean(data: List[Dict[str, Any]]) -> dict[str, float]:
-    if not data:
-        return {}
-    
-    cols_sum = dict(reduce(
-        lambda acc, row: {**acc, **dict(map(
-            lambda col: (col[0], acc.get(col[0], 0) + col[1]) if isinstance(col[1], (int, float)) else (col[0], acc.get(col[0], 0)),
-            row.items()
-        ))},
-        data,
-        {}
-    ))
-    
-    return dict(map(
-        lambda col: (col, cols_sum[col] / len(data)),
-        cols_sum.keys()
-    ))
-
-def _calculate_median(data: List[Dict[str, Any]]) -> Dict[str, float]:
-    if not data:
-        return {}
-    
-    numeric_pairs = reduce(
-        lambda accumulated_pairs, row: accumulated_pairs + list(filter(
-            lambda key_value: isinstance(key_value[1], (int, float)),
-            row.items()
-        )),
-        data,
-        []
-    )
-    
-    if not numeric_pairs:
-        return {}
-    
-    grouped_by_key = reduce(
-        lambda grouped_values, key_value_pair: {
-            **grouped_values, 
-            key_value_pair[0]: grouped_values.get(key_value_pair[0], []) + [key_value_pair[1]]
-        },
-        numeric_pairs, 
-        {}
-    )
-
-    return dict(map(
-        lambda key_values: (key_values[0], _median(sorted(key_values[1]))),
-        grouped_by_key.items()
-    ))
-
-def _median(sorted_values: List[float]) -> float:
-
-    value_count = len(sorted_values)
-    middle_index = value_count // 2
-    
-    if value_count % 2 == 1:
-        return sorted_values[middle_index]
-    else:
-        lower_middle = sorted_values[middle_index - 1]
-        upper_middle = sorted_values[middle_index]
-        return (lower_middle + upper_middle) / 2
-
-def _calculate_variance(data: List[Dict[str, Any]]) -> Dict[str, float]:
-    if not data:
-        return {}
-
-    numeric_pairs = reduce(
-        lambda accumulated_pairs, row: accumulated_pairs + list(filter(
-            lambda key_value: isinstance(key_value[1], (int, float)),
-            row.items()
-        )),
-        data,
-        []
-    )
-    
-    if not numeric_pairs:
-        return {}
- 
-    grouped_by_key = reduce(
-        lambda grouped_values, key_value_pair: {
-            **grouped_values, 
-            key_value_pair[0]: grouped_values.get(key_value_pair[0], []) + [key_value_pair[1]]
-        },
-        numeric_pairs, 
-        {}
-    )
-
-    return dict(map(
-        lambda key_values: (key_values[0], _variance(key_values[1])),
-        grouped_by_key.items()
-    ))
-
-def _variance(values: List[float]) -> float:
-
-    value_count = len(values)
-    mean_value = reduce(
-        lambda accumulated_sum, value: accumulated_sum + value, 
-        values, 
-        0
-    ) / value_count
-
-    sum_squared_differences = reduce(
-        lambda accumulated_squared_diffs, value: accumulated_squared_diffs + (value - mean_value) ** 2,
-        values,
-        0
-    )
-
-    return sum_squared_differences / value_count
+from core.quantiles import DEFAULT_PERCENTILES, percentile_report, sketch_from_options
+from core.schema import Schema
+from core.sketches import string_columns, string_report, update_string_sketches
+from core.stats import RunningStats
+from functional_impl.accumulate import add_to, assoc, update_with
 
-def _monthly_trend(data: List[Dict[str, Any]], date_col: str, value_col: str) -> Dict[str, float]:
+def _monthly_trend(monthly_sales: Dict[str, float]) -> Dict[str, float]:
     # Calculate monthly trend (percentage change month-to-month)
-    
-    if not data:
-        return {}
 
-    month_value_pairs = list(filter(
-        lambda pair: pair is not None,
-        map(
-            lambda row: _extract_month_value(row, date_col, value_col),
-            data
-        )
-    ))
-    
-    if not month_value_pairs:
+    if not monthly_sales:
         return {}
 
-    monthly_sales = reduce(
-        lambda grouped_sales, month_value: {
-            **grouped_sales,
-            month_value[0]: grouped_sales.get(month_value[0], 0) + month_value[1]
-        },
-        month_value_pairs,
-        {}
-    )
-    
     sorted_months = sorted(monthly_sales.keys())
 
     return dict(filter(
@@ -145,24 +25,24 @@ def _monthly_trend(data: List[Dict[str, Any]], date_col: str, value_col: str) ->
     ))
 
 def _extract_month_value(row: Dict[str, Any], date_col: str, value_col: str) -> tuple:
-    
+
     date = row.get(date_col)
     value = row.get(value_col)
-    
+
     if not isinstance(value, (int, float)):
         return None
-    
+
     if isinstance(date, str) and len(date) >= 7:
         month = date[:7]  # "YYYY-MM"
         return (month, value)
-    
+
     return None
 
 def _calculate_month_change(sorted_months: List[str], monthly_sales: Dict[str, float], current_index: int) -> tuple:
 
     current_month = sorted_months[current_index]
     previous_month = sorted_months[current_index - 1]
-    
+
     current_sales = monthly_sales[current_month]
     previous_sales = monthly_sales[previous_month]
 
@@ -170,16 +50,97 @@ def _calculate_month_change(sorted_months: List[str], monthly_sales: Dict[str, f
         return None
 
     percentage_change = ((current_sales - previous_sales) / previous_sales) * 100
-    
+
     return (current_month, percentage_change)
 
-def analyze(data) -> dict[str, dict[str, Any]]:
-    if not data:
+def empty_summary() -> Dict[str, Any]:
+    return {'stats': {}, 'sketches': {}, 'strings': {}, 'monthly': {}}
+
+def _fold_value(summary: Dict[str, Any], key_value: tuple, quantiles: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    col, value = key_value
+    if col not in summary['stats']:
+        assoc(summary['stats'], col, RunningStats())
+        assoc(summary['sketches'], col, sketch_from_options(quantiles))
+    summary['stats'][col].update(value)
+    summary['sketches'][col].update(value)
+    return summary
+
+def _fold_row(summary: Dict[str, Any], row: Dict[str, Any], quantiles: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    reduce(
+        lambda acc, key_value: _fold_value(acc, key_value, quantiles),
+        filter(lambda key_value: isinstance(key_value[1], (int, float)), row.items()),
+        summary
+    )
+    month_value = _extract_month_value(row, 'Sale_Date', 'Sales_Amount')
+    if month_value is not None:
+        add_to(summary['monthly'], month_value[0], month_value[1])
+    return summary
+
+def summarize(data: List[Dict[str, Any]], quantiles: Optional[Dict[str, Any]] = None, schema: Optional[Schema] = None) -> Dict[str, Any]:
+    """Reduce rows in one pass to the state `finalize` needs.
+
+    That is a `RunningStats` and a `QuantileSketch` per numeric column, a
+    `StringSketch` per column `schema` types as 'string', and total sales per
+    month. Its size does not grow with the number of rows once the sketches
+    leave exact mode. `quantiles` configures the quantile sketches (see
+    `core.quantiles.sketch_from_options`).
+    """
+    summary = reduce(lambda summary, row: _fold_row(summary, row, quantiles), data, empty_summary())
+    update_string_sketches(summary['strings'], data, string_columns(schema))
+    return summary
+
+def merge_summaries(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge the summary of another batch into `left` and return it.
+
+    `left` must be an accumulator owned by the caller's reduce; `right` is left untouched.
+    """
+    reduce(
+        lambda stats, col_stats: update_with(stats, col_stats[0], lambda running: running.merge(col_stats[1]), RunningStats()),
+        right['stats'].items(),
+        left['stats']
+    )
+    reduce(
+        lambda sketches, col_sketch: (
+            update_with(sketches, col_sketch[0], lambda sketch: sketch.merge(col_sketch[1]), None)
+            if col_sketch[0] in sketches else assoc(sketches, col_sketch[0], copy.deepcopy(col_sketch[1]))
+        ),
+        right['sketches'].items(),
+        left['sketches']
+    )
+    reduce(
+        lambda strings, col_sketch: (
+            update_with(strings, col_sketch[0], lambda sketch: sketch.merge(col_sketch[1]), None)
+            if col_sketch[0] in strings else assoc(strings, col_sketch[0], copy.deepcopy(col_sketch[1]))
+        ),
+        right['strings'].items(),
+        left['strings']
+    )
+    reduce(lambda monthly, month_value: add_to(monthly, month_value[0], month_value[1]), right['monthly'].items(), left['monthly'])
+    return left
+
+def finalize(summary: Dict[str, Any], quantiles: Optional[Dict[str, Any]] = None) -> dict[str, dict[str, Any]]:
+    """Build the analysis report from a (merged) summary."""
+    stats = summary['stats']
+    if not stats and not summary['strings']:
         return {}
-    
+
+    percentiles = (quantiles or {}).get('percentiles', DEFAULT_PERCENTILES)
+    sketches = summary['sketches']
+
     return {
-        'mean': _calculate_mean(data),
-        'median': _calculate_median(data),
-        'variance': _calculate_variance(data),
-        'trend': _monthly_trend(data, 'Sale_Date', 'Sales_Amount'),
+        'mean': dict(map(lambda item: (item[0], item[1].mean), stats.items())),
+        'median': dict(map(lambda item: (item[0], item[1].quantile(0.5)), sketches.items())),
+        'variance': dict(map(lambda item: (item[0], item[1].variance), stats.items())),
+        'min': dict(map(lambda item: (item[0], item[1].min), stats.items())),
+        'max': dict(map(lambda item: (item[0], item[1].max), stats.items())),
+        'percentiles': dict(map(lambda item: (item[0], percentile_report(item[1], percentiles)), sketches.items())),
+        'quantile_error': dict(map(lambda item: (item[0], item[1].rank_error()), sketches.items())),
+        'trend': _monthly_trend(summary['monthly']),
+        **string_report(summary['strings']),
     }
+
+def analyze(data, quantiles: Optional[Dict[str, Any]] = None, schema: Optional[Schema] = None) -> dict[str, dict[str, Any]]:
+    if not data:
+        return {}
+
+    return finalize(summarize(data, quantiles, schema), quantiles)
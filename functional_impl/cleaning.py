@@ -1,11 +1,22 @@
-from typing import List, Dict, Any
+from typing import Callable, Iterable, List, Dict, Any, Optional
 import re
 from datetime import datetime
 from functools import reduce
+from itertools import chain
 
-from core.utils import infer_column_types
+from core.dates import DateStandardizer
+from core.table import Table
+from core.schema import Schema
+from functional_impl.accumulate import add_to, update_with
 
-def _handle_missing_data(data: List[Dict[str, Any]], config: Dict[str, Any], col_types: Dict[str, str]) -> List[Dict[str, Any]]:
+# Fallback formats, tried when a value does not match the column's detected format
+_DATE_PATTERNS = [
+    ('%Y-%m-%d', re.compile(r"^\d{4}([-/])\d{1,2}\1\d{1,2}")),
+    ('%d-%m-%Y', re.compile(r"^\d{1,2}([-/])\d{1,2}\1\d{4}")),
+    ('%m-%d-%Y', re.compile(r"^\d{1,2}([-/])\d{1,2}\1\d{4}")),
+]
+
+def _handle_missing_data(data: List[Dict[str, Any]], config: Dict[str, Any], col_types: Dict[str, str], col_defaults: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
     """Handle missing data according to config."""
     if 'missing_data_action' not in config:
         return data
@@ -15,7 +26,7 @@ def _handle_missing_data(data: List[Dict[str, Any]], config: Dict[str, Any], col
     if action == 'remove':
         return list(filter(lambda row: reduce(lambda acc, v: acc and v not in (None, ""), row.values(), True), data))
     elif action == 'fill':
-        col_defaults: Dict[str, Any] = reduce(
+        col_defaults = col_defaults if col_defaults is not None else reduce(
             lambda acc, col: {
                 **acc,
                 col: _calc_col_mean(col, data, col_types) if col_types.get(col) == 'number' else _calc_col_mode(col, data)
@@ -27,13 +38,17 @@ def _handle_missing_data(data: List[Dict[str, Any]], config: Dict[str, Any], col
     
     return data
 
-def _standardize_dates(data: List[Dict[str, Any]], config: Dict[str, Any], col_types: Dict[str, str]) -> List[Dict[str, Any]]:
-    """Standardize date format according to config."""
-    date_cols = reduce(lambda acc, col: acc + [col] if col_types.get(col) == 'date' else acc, col_types.keys(), [])
+def _standardize_dates(data: List[Dict[str, Any]], config: Dict[str, Any], col_types: Schema) -> List[Dict[str, Any]]:
+    """Standardize date format according to config, parsing each distinct date once."""
+    standardizers = dict(map(
+        lambda col: (col, DateStandardizer(col_types.date_formats.get(col), _parse_date)),
+        filter(lambda col: col_types.get(col) == 'date', col_types.keys())
+    ))
 
-    return list(map(lambda row: dict(map(
-        lambda col: (col, row[col] if col not in date_cols else _parse_date(str(row[col])).strftime('%Y-%m-%d')), row
-    )), data))
+    # Only the date columns are rebuilt; the other values are copied over as they are
+    return list(map(lambda row: {**row, **dict(map(
+        lambda item: (item[0], item[1](row[item[0]])), filter(lambda item: item[0] in row, standardizers.items())
+    ))}, data))
 
 def _standardize_numerical_precision(data: List[Dict[str, Any]], col_types: Dict[str, str]) -> List[Dict[str, Any]]:
     """Round numerical values to specified precision."""
@@ -50,39 +65,135 @@ def _calc_col_mean(col: str, data: List[Dict[str, Any]], col_types: Dict[str, st
     if col_types.get(col) != 'number':
         return 0.0
     
-    total = reduce(lambda acc, row: acc + float(row[col]), data, 0.0)
-    count = len(data)
+    # Missing values are what is being filled, so they are left out as in `fill_defaults`
+    total, count = reduce(
+        lambda acc, value: (acc[0] + float(value), acc[1] + 1),
+        filter(lambda value: value not in (None, ""), map(lambda row: row.get(col), data)),
+        (0.0, 0)
+    )
     return total / count if count > 0 else 0.0
 
 def _calc_col_mode(col: str, data: List[Dict[str, Any]]) -> Any:
     """Calculate mode of a column."""
     freq: Dict[Any, int] = reduce(
-        lambda acc, row: {
-            **acc,
-            row[col]: acc.get(row[col], 0) + 1
-        },
-        data,
+        lambda acc, value: add_to(acc, value, 1),
+        filter(lambda value: value not in (None, ""), map(lambda row: row.get(col), data)),
         {}
     )
-    return max(freq.items(), key=lambda x: x[1])[0]
+    return max(freq.items(), key=lambda x: x[1])[0] if freq else None
 
-def _parse_date(date_str: str) -> Any:
-    """Try to parse date string flexibly."""
+def _parse_date(date_str: str, fmt: Optional[str] = None) -> Any:
+    """Try to parse date string flexibly, starting with the column's detected format."""
     date = date_str.strip()
-    patterns = [
-        ('%Y-%m-%d', r"^\d{4}[-/]\d{1,2}[-/]\d{1,2}"),
-        ('%d-%m-%Y', r"^\d{1,2}[-/]\d{1,2}[-/]\d{4}"),
-        ('%m-%d-%Y', r"^\d{1,2}[-/]\d{1,2}[-/]\d{4}"),
-    ]
-    return reduce(lambda acc, fmt_pattern: (
-        acc or datetime.strptime(date.split()[0], fmt_pattern[0].replace('-', date[4]))
-    ), patterns, None)
-
-def clean(data: List[Dict[str, Any]], config: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Clean data according to config."""
-    col_types: Dict[str, str] = infer_column_types(data)
-    cleaned_data = _handle_missing_data(data, config, col_types)
+    hinted = _strptime_or_none(date.split()[0], fmt) if fmt is not None and date else None
+    if hinted is not None:
+        return hinted
+
+    # The first fallback format that reads the value, in the separator it uses; None (kept as it is) if none does
+    return next(filter(None, map(lambda fmt_pattern: _parse_date_as(date, *fmt_pattern), _DATE_PATTERNS)), None)
+
+def _parse_date_as(date: str, fmt: str, pattern: re.Pattern) -> Any:
+    match = pattern.match(date)
+    return _strptime_or_none(date.split()[0], fmt.replace('-', match.group(1))) if match else None
+
+def _count_defaults(acc: Dict[str, Any], col_value: tuple, col_types: Dict[str, str]) -> Dict[str, Any]:
+    """Fold one non-missing value into the running (sum, count) of a number column or the value counts of any other column."""
+    col, value = col_value
+    if col_types.get(col) == 'number':
+        update_with(acc['sums'], col, lambda total_count: (total_count[0] + float(value), total_count[1] + 1), (0.0, 0))
+    else:
+        update_with(acc['counts'], col, lambda counts: add_to(counts, value, 1), {})
+    return acc
+
+def fill_defaults(batches: Iterable[List[Dict[str, Any]]], col_types: Dict[str, str]) -> Dict[str, Any]:
+    """Compute the 'fill' values (column mean or mode) over a whole batched dataset in one pass."""
+    totals = reduce(
+        lambda acc, col_value: _count_defaults(acc, col_value, col_types),
+        filter(
+            lambda col_value: col_value[1] not in (None, ""),
+            chain.from_iterable(map(lambda row: row.items(), chain.from_iterable(batches)))
+        ),
+        {'sums': {}, 'counts': {}}
+    )
+    means = dict(map(lambda item: (item[0], item[1][0] / item[1][1]), totals['sums'].items()))
+    modes = dict(map(lambda item: (item[0], max(item[1].items(), key=lambda x: x[1])[0]), totals['counts'].items()))
+    return dict(map(
+        lambda col: (col, means.get(col, 0.0) if col_types.get(col) == 'number' else modes.get(col)),
+        col_types.keys()
+    ))
+
+def _strptime_or_none(date_str: str, fmt: str) -> Any:
+    try:
+        return datetime.strptime(date_str, fmt)
+    except ValueError:
+        return None
+
+def clean(data: List[Dict[str, Any]], config: Dict[str, Any], schema: Optional[Schema] = None, col_defaults: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Clean data according to config.
+
+    When cleaning one batch of a larger dataset, pass the `schema` and `col_defaults`
+    computed over the whole dataset so every batch is cleaned the same way.
+    """
+    col_types = schema if schema is not None else Schema.infer(data)
+    if isinstance(data, Table):
+        return _clean_table(data, config, col_types, col_defaults)
+
+    cleaned_data = _handle_missing_data(data, config, col_types, col_defaults)
     standardized_dates_data = _standardize_dates(cleaned_data, config, col_types)
     standardized_numerical_data = _standardize_numerical_precision(standardized_dates_data, col_types)
     
-    return standardized_numerical_data
\ No newline at end of file
+    return standardized_numerical_data
+
+def value_cleaners(config: Dict[str, Any], col_types: Schema, col_defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Callable[[Any], Any]]:
+    """Per column that `clean` changes, the function it applies to each value: fill, then date standardization, then rounding.
+
+    Rows with a missing value under 'remove' are not covered; dropping them is up to the caller.
+    """
+    fill = 'missing_data_action' in config and config.get('missing_data_action') == 'fill'
+    defaults = col_defaults if col_defaults is not None else {}
+    steps = dict(map(lambda col: (col, list(filter(None, [
+        (lambda v: defaults[col] if v in (None, "") else v) if fill else None,
+        DateStandardizer(col_types.date_formats.get(col), _parse_date) if col_types.get(col) == 'date' else None,
+        (lambda v: round(float(v), 2) if v not in (None, "") else v) if col_types.get(col) == 'number' else None,
+    ]))), col_types.keys()))
+    return dict(map(
+        lambda item: (item[0], reduce(lambda inner, step: (lambda v: step(inner(v))), item[1][1:], item[1][0])),
+        filter(lambda item: item[1], steps.items())
+    ))
+
+def has_missing(row: Dict[str, Any]) -> bool:
+    return not all(map(lambda v: v not in (None, ""), row.values()))
+
+def _clean_table(table: Table, config: Dict[str, Any], col_types: Schema, col_defaults: Optional[Dict[str, Any]]) -> Table:
+    """Column-wise `clean` for a Table: each step maps whole columns, string and date columns once per distinct value."""
+    action = config.get('missing_data_action', 'remove') if 'missing_data_action' in config else None
+
+    kept = table.filter(map(
+        lambda row: all(map(lambda v: v not in (None, ""), row.values())),
+        table
+    )) if action == 'remove' else table
+
+    defaults = (col_defaults if col_defaults is not None else fill_defaults([kept], col_types)) if action == 'fill' else {}
+    filled = reduce(
+        lambda acc, col: acc.with_column(col, acc.column(col).map(
+            lambda v: defaults[col] if v in (None, "") else v
+        )),
+        filter(lambda col: col in defaults, kept.keys()),
+        kept
+    )
+
+    dated = reduce(
+        lambda acc, col: acc.with_column(col, acc.column(col).map(
+            DateStandardizer(col_types.date_formats.get(col), _parse_date)
+        )),
+        filter(lambda col: col_types.get(col) == 'date', filled.keys()),
+        filled
+    )
+
+    return reduce(
+        lambda acc, col: acc.with_column(col, acc.column(col).map(
+            lambda v: round(float(v), 2) if v not in (None, "") else v
+        )),
+        filter(lambda col: col_types.get(col) == 'number', dated.keys()),
+        dated
+    )
@@ -1,10 +1,176 @@
-from typing import List, Dict, Any, Tuple
-from functional_impl.cleaning import clean
-from functional_impl.transformation import transform, aggregate_by_key
-from functional_impl.analysis import analyze
-
-def run_pipeline(config, dataset) -> Tuple[List[Dict[str, Any]], dict, dict | None]:
-    output_data = transform(clean(dataset, config), config)
-    analysis_summary = analyze(output_data)
-    
-    return output_data, analysis_summary, aggregate_by_key(output_data, config)
\ No newline at end of file
+from typing import TYPE_CHECKING, Callable, Iterable, List, Dict, Any, Optional, Tuple
+from functools import partial, reduce
+from core.groupby import GroupBy, aggregation_result, merge_aggregations
+from core.index import DatasetIndex, value_cleaner
+from core.metrics import PipelineMetrics
+from core.parallel import loaded, parallel_map
+from core.plan import QueryPlan
+from core.schema import Schema
+from core.table import Table
+from functional_impl.cleaning import clean, fill_defaults, has_missing, value_cleaners
+from functional_impl.transformation import transform, aggregate_by_key, computed_columns
+from functional_impl.analysis import analyze, summarize, merge_summaries, finalize, empty_summary
+
+if TYPE_CHECKING:
+    # Only needed by incremental runs; hashlib alone adds to every start-up
+    from core.incremental import PipelineState
+
+def run_pipeline(config, dataset, schema: Optional[Schema] = None, metrics: Optional[PipelineMetrics] = None, optimize: bool = True, index: Optional[DatasetIndex] = None) -> Tuple[List[Dict[str, Any]], dict, dict | None]:
+    """Run every stage over the whole dataset, recording each one in `metrics` if given.
+
+    The stages run as planned by `core.plan.QueryPlan`; with `optimize` off they run one after another.
+    A pushed-down filter is answered from `index` (a `core.index.DatasetIndex` over `dataset`) if given.
+    """
+    metrics = metrics if metrics is not None else PipelineMetrics()
+    schema = schema if schema is not None else metrics.measure('schema', Schema.infer, dataset)
+    col_defaults = (
+        metrics.measure('fill_defaults', fill_defaults, [dataset], schema)
+        if optimize and config.get('missing_data_action') == 'fill' else None
+    )
+    output_data = _clean_and_transform(dataset, QueryPlan(config, schema, optimize), schema, col_defaults, metrics, index)
+    analysis_summary = metrics.measure('analyze', analyze, output_data, config.get('quantiles'), schema)
+
+    aggregation = metrics.measure('aggregate', aggregate_by_key, output_data, config)
+    return output_data, analysis_summary, aggregation_result(aggregation, config)
+
+def clean_dataset(config, dataset, schema: Optional[Schema] = None, metrics: Optional[PipelineMetrics] = None) -> List[Dict[str, Any]]:
+    """Only the cleaning stage of `run_pipeline`, for rows that will be queried many times; `dataset` is left unchanged."""
+    metrics = metrics if metrics is not None else PipelineMetrics()
+    schema = schema if schema is not None else metrics.measure('schema', Schema.infer, dataset)
+    return metrics.measure('clean', clean, dataset, config, schema)
+
+def _pushed_filter(data: List[Dict[str, Any]], plan: QueryPlan, cleaners: Dict[str, Callable[[Any], Any]], remove: bool, index: Optional[DatasetIndex] = None) -> List[Dict[str, Any]]:
+    """Keep the rows whose filter columns, cleaned on their own, match the plan's predicate; looked up in `index` if given."""
+    if index is not None:
+        ids = index.select(plan.expression, value_cleaner(cleaners), remove)
+        return data.take(ids) if isinstance(data, Table) else list(map(data.__getitem__, ids))
+
+    identity = lambda v: v
+    cols = list(map(lambda col: (col, cleaners.get(col, identity)), plan.filter_columns))
+    if isinstance(data, Table) and len(cols) == 1:
+        col, clean_value = cols[0]
+        keep_value = lambda v: not (remove and v in (None, "")) and plan.predicate({col: clean_value(v)})
+        # Mapped once per distinct value of a dictionary-encoded column
+        return data.filter(data.column(col).map(keep_value))
+
+    keep = lambda row: (
+        not (remove and any(map(lambda col: row.get(col[0]) in (None, ""), cols)))
+        and plan.predicate(dict(map(lambda col: (col[0], col[1](row.get(col[0]))), cols)))
+    )
+    if isinstance(data, Table):
+        return data.filter(map(keep, data))
+    return list(filter(keep, data))
+
+def _fused_clean_compute(data: List[Dict[str, Any]], cleaners: Dict[str, Callable[[Any], Any]], computed: Dict[str, Callable[[Dict[str, Any]], Any]], remove: bool) -> List[Dict[str, Any]]:
+    """`clean` followed by the computed columns of `transform`, in one pass over the rows."""
+    clean_row = lambda row: {**row, **dict(map(
+        lambda item: (item[0], item[1](row[item[0]])), filter(lambda item: item[0] in row, cleaners.items())
+    ))}
+    add_computed = lambda row: {**row, **dict(map(lambda item: (item[0], item[1](row)), computed.items()))} if computed else row
+    return list(map(lambda row: add_computed(clean_row(row)), filter(lambda row: not has_missing(row), data) if remove else data))
+
+def _clean_and_transform(data: List[Dict[str, Any]], plan: QueryPlan, schema: Schema, col_defaults: Optional[Dict[str, Any]], metrics: PipelineMetrics, index: Optional[DatasetIndex] = None) -> List[Dict[str, Any]]:
+    """Clean, filter and compute `data` as `plan` says, recording each step in `metrics`.
+
+    Under 'fill' an optimized plan needs the `col_defaults` of the whole dataset,
+    since the rows the filter drops are never seen by the cleaning.
+    """
+    config = plan.config
+    if not plan.optimize:
+        cleaned_data = metrics.measure('clean', clean, data, config, schema, col_defaults)
+        return metrics.measure('transform', transform, cleaned_data, config, schema)
+
+    remove = 'missing_data_action' in config and config.get('missing_data_action', 'remove') == 'remove'
+    cleaners = value_cleaners(config, schema, col_defaults)
+    kept = metrics.measure('filter', _pushed_filter, data, plan, cleaners, remove, index) if plan.pushdown else data
+    if isinstance(kept, Table):
+        # A Table is cleaned column by column, so there is no per-row pass to fuse into
+        cleaned_table = metrics.measure('clean', clean, kept, config, schema, col_defaults)
+        return metrics.measure('transform', transform, cleaned_table, plan.stage_config, schema)
+    return metrics.measure('clean+compute', _fused_clean_compute, kept, cleaners, computed_columns(config), remove)
+
+def process_batch(
+    batch: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    schema: Schema,
+    col_defaults: Optional[Dict[str, Any]] = None,
+    keep_output: bool = True,
+    trace_memory: bool = False,
+    optimize: bool = True,
+) -> Tuple[List[Dict[str, Any]] | None, int, Dict[str, Any], GroupBy | None, PipelineMetrics]:
+    """Run one batch through every stage, returning its output rows (if kept), row count, summary, aggregation and stage metrics.
+
+    Defined at module level so it can be sent to worker processes.
+    """
+    metrics = PipelineMetrics(trace_memory)
+    output_batch = _clean_and_transform(batch, QueryPlan(config, schema, optimize), schema, col_defaults, metrics)
+    return (
+        output_batch if keep_output else None,
+        len(output_batch),
+        metrics.measure('analyze', summarize, output_batch, config.get('quantiles'), schema),
+        metrics.measure('aggregate', aggregate_by_key, output_batch, config),
+        metrics,
+    )
+
+def run_pipeline_stream(
+    config: Dict[str, Any],
+    load_batches: Callable[[], Iterable[List[Dict[str, Any]]]],
+    on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    schema: Optional[Schema] = None,
+    workers: Optional[int] = 1,
+    metrics: Optional[PipelineMetrics] = None,
+    optimize: bool = True,
+    state: Optional["PipelineState"] = None,
+) -> Tuple[int, dict, dict | None]:
+    """Run the pipeline one batch at a time so memory depends on the batch size, not the file size.
+
+    `load_batches` must return a fresh batch iterator on every call: without a
+    `schema` it is inferred from the first batch, and 'fill' needs a pass over the
+    whole dataset before cleaning. Each output batch is handed to `on_batch`
+    instead of being kept; the row count is returned in place of the output rows.
+    A batch may be a `core.parallel.Deferred`, such as a range of one of many
+    files, which is then read and parsed by the worker that processes it.
+
+    With `workers` > 1 (None for every core) batches are processed in that many
+    processes. Partial results are still merged in input order, so the result is
+    the same as with one worker. Stage metrics of every batch are added up in `metrics`.
+
+    With a `state` from an earlier run, the batches are merged into its row
+    count and partial results, and the merged ones are stored back in it; the
+    report and aggregation then cover every row processed so far.
+    """
+    metrics = metrics if metrics is not None else PipelineMetrics()
+    schema = schema if schema is not None else metrics.measure('schema', Schema.infer, next(loaded(load_batches()), []))
+    col_defaults = (
+        metrics.measure('fill_defaults', fill_defaults, loaded(load_batches()), schema)
+        if config.get('missing_data_action') == 'fill' else None
+    )
+
+    def fold(acc: Tuple[int, Dict[str, Any], GroupBy | None], result: tuple) -> Tuple[int, Dict[str, Any], GroupBy | None]:
+        output_batch, batch_rows, batch_summary, batch_aggregation, batch_metrics = result
+        metrics.merge(batch_metrics)
+        if on_batch is not None:
+            on_batch(output_batch)
+        return (
+            acc[0] + batch_rows,
+            merge_summaries(acc[1], batch_summary),
+            merge_aggregations(acc[2], batch_aggregation),
+        )
+
+    num_rows, summary, aggregation = reduce(
+        fold,
+        parallel_map(
+            partial(
+                process_batch, config=config, schema=schema, col_defaults=col_defaults,
+                keep_output=on_batch is not None, trace_memory=metrics.trace_memory, optimize=optimize
+            ),
+            load_batches(),
+            workers
+        ),
+        (state.num_rows, state.summary, state.aggregation) if state is not None and state.summary is not None
+        else (0, empty_summary(), None)
+    )
+    if state is not None:
+        state.num_rows, state.summary, state.aggregation = num_rows, summary, aggregation
+
+    return num_rows, metrics.measure('analyze', finalize, summary, config.get('quantiles')), aggregation_result(aggregation, config)
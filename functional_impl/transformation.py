@@ -1,38 +1,34 @@
-from typing import List, Dict, Any
-from functools import reduce
+from typing import Callable, List, Dict, Any, Optional
 
-from core.utils import infer_column_types
+from core.expressions import check_expression, compile_filter, expression_columns, filter_expression
+from core.groupby import GroupBy
+from core.table import Table, column_from_values
+from core.schema import Schema
 
 def _filter_rows(data: List[Dict[str, Any]], config: Dict[str, Any], col_types: Dict[str, str]) -> List[Dict[str, Any]]:
-    """Filter rows based on condition in config."""
-    if 'filter' not in config or not config['filter'].get('apply', False):
+    """Filter rows based on the condition or expression in config, compiled once into a single function of a row."""
+    expression = filter_expression(config.get('filter'))
+    if expression is None:
         return data
 
-    filter_config = config['filter']
-    col = filter_config.get('column')
-    operator = filter_config.get('operator')
-    value: Any = filter_config.get('value')
+    expression = check_expression(expression, col_types)
+    matches = compile_filter(expression, col_types)
+    if isinstance(data, Table):
+        cols = expression_columns(expression)
+        return data.filter(map(
+            lambda values: matches(dict(zip(cols, values))),
+            zip(*map(data.column, cols))
+        ))
 
-    if not col or not operator:
-        return data
-    
-    does_match = lambda row, val: (
-        (operator == '>' and row[col] > val) or
-        (operator == '<' and row[col] < val) or
-        (operator == '>=' and row[col] >= val) or
-        (operator == '<=' and row[col] <= val) or
-        (operator == '==' and row[col] == val) or
-        (operator == 'Exactly equal' and row[col] == val) or
-        (operator == 'Contains' and str(val) in str(row[col]))
-    )
+    return list(filter(matches, data))
 
-    convert_val = lambda v: (
-        float(v) if col_types.get(col) == 'number' else str(v).lower()
-    )
-    
-    return list(filter(lambda row: (
-        does_match({col: convert_val(row[col])}, convert_val(value))
-    ), data))
+_compute_profit = lambda row: (
+    (float(row.get('Unit_Price', 0)) - float(row.get('Unit_Cost', 0))) * float(row.get('Quantity_Sold', 0))
+)
+
+def computed_columns(config: Dict[str, Any]) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    """The columns `compute` in config adds, each as a function of a cleaned row."""
+    return {'Profit': _compute_profit} if config.get('compute') == 'Profit' else {}
 
 def _compute_new_column(data: List[Dict[str, Any]], config: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Compute a new column based on config."""
@@ -43,40 +39,27 @@ def _compute_new_column(data: List[Dict[str, Any]], config: Dict[str, Any]) -> L
     if compute_config is None:
         return data
     
-    compute_profit = lambda row: (
-        (float(row.get('Unit_Price', 0)) - float(row.get('Unit_Cost', 0))) * float(row.get('Quantity_Sold', 0))
-    )
-    
+    if isinstance(data, Table):
+        return data.with_column('Profit', column_from_values(map(_compute_profit, data))) if compute_config == 'Profit' else data
+
     return list(map(lambda row: (
-        {**row, 'Profit': compute_profit(row)} if compute_config == 'Profit' else row
+        {**row, 'Profit': _compute_profit(row)} if compute_config == 'Profit' else row
     ), data))
 
-def aggregate_by_key(data: List[Dict[str, Any]], config: Dict[str, Any]) -> dict | None:
-    """Aggregate data by a specified key."""
-    if 'aggregate' not in config:
-        return
-
-    if config['aggregate'] is None:
-        return 
-    
-    if config['aggregate'] == 'Aggregate total sales by region':
-        key_col = 'Region'
-        value_col = 'Sales_Amount'
+def aggregate_by_key(data: List[Dict[str, Any]], config: Dict[str, Any]) -> GroupBy | None:
+    """Aggregate data by the group-by in config, in one hash-aggregation pass; the partial result merges with `merge_aggregations`."""
+    group = GroupBy.from_config(config)
+    if group is None:
+        return None
 
-    return dict(reduce(
-        lambda acc, row: {
-            **acc, 
-            row[key_col]: acc.get(row[key_col], 0) + (
-                float(row.get(value_col, 0)) 
-                if row.get(value_col) not in (None, "") else 0.0
-            )
-        },
-        data,
-        {}
-    ))
+    if isinstance(data, Table):
+        # Only the columns the group-by reads are turned into rows
+        cols = list(filter(lambda col: col in data.columns, group.columns()))
+        return group.update(map(lambda values: dict(zip(cols, values)), zip(*map(data.column, cols))) if cols else data)
+    return group.update(data)
 
-def transform(data: List[Dict[str, Any]], config: Dict[str, Any]) -> List[Dict[str, Any]]:
-    col_types = infer_column_types(data)
+def transform(data: List[Dict[str, Any]], config: Dict[str, Any], schema: Optional[Schema] = None) -> List[Dict[str, Any]]:
+    col_types = schema if schema is not None else Schema.infer(data)
     filtered_data = _filter_rows(data, config, col_types)
     computed_data = _compute_new_column(filtered_data, config)
     return computed_data    
\ No newline at end of file
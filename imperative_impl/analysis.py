@@ -1,130 +1,129 @@
-from typing import Any
+import copy
+from typing import Any, Dict, Optional
+
+from core.quantiles import DEFAULT_PERCENTILES, QuantileSketch, percentile_report, sketch_from_options
+from core.schema import Schema
+from core.sketches import StringSketch, string_columns, string_report, update_string_sketches
+from core.stats import RunningStats
 
 
 class DataAnalyzer:
-    def __init__(self, data):
+    def __init__(self, data=None, quantiles: Optional[Dict[str, Any]] = None, schema: Optional[Schema] = None):
         self.data = data
+        # Optional sketch settings: {'k': ..., 'exact_limit': ..., 'percentiles': [...]}
+        self.quantiles = quantiles or {}
+        # Columns the schema types as text get distinct-count and top-value sketches
+        self.string_columns = string_columns(schema)
+        self._reset()
+
+    def _reset(self) -> None:
+        # Mergeable analysis state, filled in one pass by `update`
+        self._stats: Dict[str, RunningStats] = {}
+        self._sketches: Dict[str, QuantileSketch] = {}
+        self._strings: Dict[str, StringSketch] = {}
+        self._monthly_sales: Dict[str, float] = {}
 
     def analyze(self):
         if not self.data:
             return {}
 
-        summary: dict[str, dict[str, Any]] = {
-            'mean': self._calculate_mean(),
-            'median': self._calculate_median(),
-            'variance': self._calculate_variance(),
-            'trend': self._monthly_trend('Sale_Date', 'Sales_Amount'),
-        }
+        self._reset()
+        self.update(self.data)
+        return self.report()
 
-        return summary
-
-    def _calculate_mean(self):
-        if not self.data:
-            return {}
-        
-        means = {}
-        for record in self.data:
-            for key, value in record.items():
-                if isinstance(value, (int, float)):
-                    if key not in means:
-                        means[key] = {'sum': 0, 'count': 0}
-                    means[key]['sum'] += value
-                    means[key]['count'] += 1
-        
-        return {key: means[key]['sum'] / means[key]['count'] for key in means if means[key]['count'] > 0}
-    
-    def _calculate_median(self):
-        if not self.data:
-            return {}
-        
-        values = {}
-        for record in self.data:
-            for key, value in record.items():
+    def update(self, rows) -> None:
+        """Fold one batch of rows into the running analysis state."""
+        for row in rows:
+            for key, value in row.items():
                 if isinstance(value, (int, float)):
-                    if key not in values:
-                        values[key] = []
-                        values[key].append(value)
-            
-        medians = {}
-        for key in values:
-            sorted_values = sorted(values[key])
-            n = len(sorted_values)
-            if n % 2 == 1:
-                medians[key] = sorted_values[n // 2]
+                    if key not in self._stats:
+                        self._stats[key] = RunningStats()
+                        self._sketches[key] = sketch_from_options(self.quantiles)
+                    self._stats[key].update(value)
+                    self._sketches[key].update(value)
+
+            date = row.get('Sale_Date')
+            value = row.get('Sales_Amount')
+            if isinstance(value, (int, float)) and isinstance(date, str) and len(date) >= 7:
+                month = date[:7]
+                self._monthly_sales[month] = self._monthly_sales.get(month, 0) + value
+
+        # String columns are counted a chunk of rows at a time, then folded into their sketches
+        update_string_sketches(self._strings, rows, self.string_columns)
+
+    def merge(self, other: "DataAnalyzer") -> None:
+        """Fold the state of an analyzer that saw a different chunk of the data into this one."""
+        for key, stats in other._stats.items():
+            if key not in self._stats:
+                self._stats[key] = RunningStats()
+                self._sketches[key] = copy.deepcopy(other._sketches[key])
             else:
-                medians[key] = (sorted_values[n // 2 - 1] + sorted_values[n // 2]) / 2
-        
-        return medians
-    
-    def _calculate_variance(self):
-        if not self.data:
-            return {}
+                self._sketches[key].merge(other._sketches[key])
+            self._stats[key].merge(stats)
 
-        # Identify numerical columns
-        numeric_columns = {}
-        for row in self.data:
-            for key, value in row.items():
-                if isinstance(value, (int, float)):
-                    numeric_columns.setdefault(key, []).append(value)
+        for key, sketch in other._strings.items():
+            if key not in self._strings:
+                self._strings[key] = copy.deepcopy(sketch)
+            else:
+                self._strings[key].merge(sketch)
 
-        variances = {}
+        for month, sales in other._monthly_sales.items():
+            self._monthly_sales[month] = self._monthly_sales.get(month, 0) + sales
 
-        for col, values in numeric_columns.items():
-            n = len(values)
-            if n == 0:
-                variances[col] = None
-                continue
+    def summary(self) -> Dict[str, Any]:
+        """The mergeable state, shaped like the functional and numpy summaries, e.g. to carry it to a later run."""
+        return {'stats': self._stats, 'sketches': self._sketches, 'strings': self._strings, 'monthly': self._monthly_sales}
 
-            # Calculate mean manually
-            mean = sum(values) / len(values)
-        
-            # Calculate variance manually
-            sq_diff_sum = 0
-            for v in values:
-                sq_diff_sum += (v - mean) ** 2
-            
-            variance = sq_diff_sum / n   # population variance
-
-            variances[col] = variance
-
-        return variances
-    
-    def _monthly_trend(self, date_col, value_col):
-        
-        if not self.data:
+    @classmethod
+    def from_summary(cls, summary: Dict[str, Any], quantiles: Optional[Dict[str, Any]] = None) -> "DataAnalyzer":
+        """An analyzer that continues from a state returned by `summary`."""
+        analyzer = cls(quantiles=quantiles)
+        analyzer._stats, analyzer._sketches = summary['stats'], summary['sketches']
+        analyzer._strings, analyzer._monthly_sales = summary['strings'], summary['monthly']
+        return analyzer
+
+    def report(self):
+        """Build the analysis report from everything passed to `update` so far."""
+        if not self._stats and not self._strings:
             return {}
 
-        monthly_sales = {}
-        
-        for row in self.data:
-            date = row.get(date_col)
-            value = row.get(value_col)
-            
-            if not isinstance(value, (int, float)):
-                continue
+        summary: dict[str, dict[str, Any]] = {
+            'mean': {key: stats.mean for key, stats in self._stats.items()},
+            'median': {key: sketch.quantile(0.5) for key, sketch in self._sketches.items()},
+            'variance': {key: stats.variance for key, stats in self._stats.items()},
+            'min': {key: stats.min for key, stats in self._stats.items()},
+            'max': {key: stats.max for key, stats in self._stats.items()},
+            'percentiles': self._calculate_percentiles(),
+            'quantile_error': {key: sketch.rank_error() for key, sketch in self._sketches.items()},
+            'trend': self._monthly_trend(),
+            **string_report(self._strings),
+        }
+
+        return summary
+
+    def _calculate_percentiles(self):
+        percentiles = self.quantiles.get('percentiles', DEFAULT_PERCENTILES)
+        return {key: percentile_report(sketch, percentiles) for key, sketch in self._sketches.items()}
 
-            if isinstance(date, str) and len(date) >= 7:
-                month = date[:7] 
-                monthly_sales[month] = monthly_sales.get(month, 0) + value
-        
+    def _monthly_trend(self):
+        monthly_sales = self._monthly_sales
         if not monthly_sales:
             return {}
-        
+
         sorted_months = sorted(monthly_sales.keys())
         trend = {}
-        
+
         for i in range(1, len(sorted_months)):
             current_month = sorted_months[i]
             previous_month = sorted_months[i - 1]
-            
+
             current_sales = monthly_sales[current_month]
             previous_sales = monthly_sales[previous_month]
-            
+
             if previous_sales == 0:
                 continue
-            
+
             percentage_change = ((current_sales - previous_sales) / previous_sales) * 100
             trend[current_month] = percentage_change
-        
-        return trend
 
+        return trend
@@ -1,20 +1,136 @@
-from typing import List, Dict, Any
+from typing import Callable, Iterable, List, Dict, Any, Optional
 import re
 from datetime import datetime
+from functools import partial
 
-from core.utils import infer_column_types
+from core.dates import DateStandardizer
+from core.schema import Schema
+
+# Fallback formats, tried when a value does not match the column's detected format
+_DATE_PATTERNS = [
+    ('%Y-%m-%d', re.compile(r"^\d{4}([-/])\d{1,2}\1\d{1,2}")),
+    ('%d-%m-%Y', re.compile(r"^\d{1,2}([-/])\d{1,2}\1\d{4}")),
+    ('%m-%d-%Y', re.compile(r"^\d{1,2}([-/])\d{1,2}\1\d{4}")),
+]
+
+def _fill_value(default: Any, value: Any) -> Any:
+    return default if value in (None, "") else value
+
+def _keep_on_error(standardize: Callable[[Any], Any], value: Any) -> Any:
+    try:
+        return standardize(value)
+    except Exception:
+        return value
+
+def _round_value(value: Any, precision: int = 2) -> Any:
+    try:
+        return round(float(value), precision)
+    except Exception:
+        return value
+
+def _apply_all(steps: List[Callable[[Any], Any]], value: Any) -> Any:
+    for step in steps:
+        value = step(value)
+    return value
 
 class DataCleaner:
-    def __init__(self, data: List[Dict[str, Any]], config: Dict[str, Any]):
+    def __init__(self, data: List[Dict[str, Any]], config: Dict[str, Any], schema: Optional[Schema] = None, fill_values: Optional[Dict[str, Any]] = None):
         self.data = data
         self.config = config
-        self.col_types: Dict[str, str] = infer_column_types(data)
+        self.col_types: Schema = schema if schema is not None else Schema.infer(data)
+        self.fill_values: Dict[str, Any] = dict(fill_values or {})
+        self._row_steps: Optional[tuple] = None
+
+    @staticmethod
+    def compute_fill_values(batches: Iterable[List[Dict[str, Any]]], col_types: Dict[str, str]) -> Dict[str, Any]:
+        """Compute the 'fill' value of every column (mean or mode) over a batched dataset in one pass."""
+        sums: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        freqs: Dict[str, Dict[Any, int]] = {}
+        for batch in batches:
+            for row in batch:
+                for col, value in row.items():
+                    if value in (None, ""):
+                        continue
+                    if col_types.get(col) == 'number':
+                        try:
+                            sums[col] = sums.get(col, 0.0) + float(value)
+                            counts[col] = counts.get(col, 0) + 1
+                        except Exception:
+                            continue
+                    else:
+                        freq = freqs.setdefault(col, {})
+                        freq[value] = freq.get(value, 0) + 1
+
+        fill_values: Dict[str, Any] = {}
+        for col, col_type in col_types.items():
+            if col_type == 'number':
+                fill_values[col] = sums[col] / counts[col] if counts.get(col) else 0.0
+            elif freqs.get(col):
+                fill_values[col] = max(freqs[col].items(), key=lambda x: x[1])[0]
+            else:
+                fill_values[col] = None
+        return fill_values
 
     def clean(self) -> None:
         self._handle_missing_data()
         self._standardize_dates()
         self._standardize_numerical_precision()
 
+    def value_cleaners(self) -> Dict[str, Callable[[Any], Any]]:
+        """Per column that `clean` changes, the function it applies to each value: fill, then date standardization, then rounding.
+
+        Under 'fill', `fill_values` must hold every column. Dropping the rows with
+        a missing value under 'remove' is left to the caller.
+        """
+        fill = 'missing_data_action' in self.config and self.config.get('missing_data_action') == 'fill'
+        cleaners: Dict[str, Callable[[Any], Any]] = {}
+        for col, col_type in self.col_types.items():
+            steps: List[Callable[[Any], Any]] = []
+            if fill:
+                steps.append(partial(_fill_value, self.fill_values.get(col)))
+            if col_type == 'date':
+                steps.append(partial(_keep_on_error, DateStandardizer(self.col_types.date_formats.get(col), self._parse_date)))
+            elif col_type == 'number':
+                steps.append(_round_value)
+            if len(steps) == 1:
+                cleaners[col] = steps[0]
+            elif steps:
+                cleaners[col] = partial(_apply_all, steps)
+        return cleaners
+
+    def clean_row(self, row: Dict[str, Any]) -> None:
+        """Fill, standardize the dates of and round one row in place, as `clean` does to every row.
+
+        Used by the fused clean + compute pass, so each row is visited once.
+        Under 'fill', `fill_values` must hold every column. Dropping the rows
+        with a missing value under 'remove' is left to the caller.
+        """
+        if self._row_steps is None:
+            self._row_steps = (
+                'missing_data_action' in self.config and self.config.get('missing_data_action') == 'fill',
+                [(col, DateStandardizer(self.col_types.date_formats.get(col), self._parse_date)) for col, dtype in self.col_types.items() if dtype == 'date'],
+                [col for col, dtype in self.col_types.items() if dtype == 'number'],
+            )
+        fill, standardizers, num_cols = self._row_steps
+
+        if fill:
+            for col, value in row.items():
+                if value in (None, ""):
+                    row[col] = self.fill_values.get(col)
+        for col, standardize in standardizers:
+            if col in row:
+                try:
+                    row[col] = standardize(row[col])
+                except Exception:
+                    pass
+        for col in num_cols:
+            if col in row:
+                try:
+                    row[col] = round(float(row[col]), 2)
+                except Exception:
+                    pass
+
     def _handle_missing_data(self) -> None:
         """Handle missing data according to config."""
         if 'missing_data_action' not in self.config:
@@ -22,49 +138,51 @@ class DataCleaner:
 
         action = self.config.get('missing_data_action', 'remove')
         if action == 'remove':
-            self.data = [row for row in self.data if all(v not in (None, "") for v in row.values())]
+            self.data[:] = [row for row in self.data if all(v not in (None, "") for v in row.values())]
         elif action == 'fill':
-            col_means: Dict[str, float] = {}
-            col_modes: Dict[str, Any] = {}
             for row in self.data:
                 for col, value in row.items():
                     if value in (None, ""):
-                        col_type = self.col_types.get(col, 'string')
-                        if col_type == 'number':
-                            row[col] = col_means.setdefault(col, self._calc_col_mean(col))
-                        elif col_type == 'date':
-                            row[col] = col_modes.setdefault(col, self._calc_col_mode(col))
-                        else:
-                            row[col] = col_modes.setdefault(col, self._calc_col_mode(col))
+                        if col not in self.fill_values:
+                            col_type = self.col_types.get(col, 'string')
+                            if col_type == 'number':
+                                self.fill_values[col] = self._calc_col_mean(col)
+                            else:
+                                self.fill_values[col] = self._calc_col_mode(col)
+                        row[col] = self.fill_values[col]
 
     def _standardize_dates(self) -> None:
-        """Standardize date format according to config."""
-        date_cols = [col for col, dtype in self.col_types.items() if dtype == 'date']
+        """Standardize date format according to config, parsing each distinct date once."""
+        standardizers = {
+            col: DateStandardizer(self.col_types.date_formats.get(col), self._parse_date)
+            for col, dtype in self.col_types.items() if dtype == 'date'
+        }
 
         for row in self.data:
-            for col in date_cols:
+            for col, standardize in standardizers.items():
                 if col in row:
                     try:
-                        parsed = self._parse_date(str(row[col]))
-                        if parsed:
-                            row[col] = parsed.strftime('%Y-%m-%d')
+                        row[col] = standardize(row[col])
                     except Exception:
                         pass
 
-    def _parse_date(self, date_str: str) -> Any:
-        """Try to parse date string flexibly."""
+    @staticmethod
+    def _parse_date(date_str: str, fmt: Optional[str] = None) -> Any:
+        """Try to parse date string flexibly, starting with the column's detected format."""
         date_str = date_str.strip()
-        patterns = [
-            ('%Y-%m-%d', r"^\d{4}[-/]\d{1,2}[-/]\d{1,2}"),
-            ('%d-%m-%Y', r"^\d{1,2}[-/]\d{1,2}[-/]\d{4}"),
-            ('%m-%d-%Y', r"^\d{1,2}[-/]\d{1,2}[-/]\d{4}"),
-        ]
-
-        for fmt, pattern in patterns:
-            if re.match(pattern, date_str):
+        if fmt is not None:
+            try:
+                return datetime.strptime(date_str.split()[0], fmt)
+            except Exception:
+                pass
+
+        for fmt, pattern in _DATE_PATTERNS:
+            match = pattern.match(date_str)
+            if match:
                 try:
                     date_part = date_str.split()[0]
-                    return datetime.strptime(date_part, fmt.replace('-', date_str[4]))
+                    # Written with the separator the value uses
+                    return datetime.strptime(date_part, fmt.replace('-', match.group(1)))
                 except Exception:
                     pass
         return None
@@ -1,16 +1,226 @@
-from typing import List, Dict, Any, Tuple
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Iterable, List, Dict, Any, Optional, Tuple
+from core.groupby import GroupBy, aggregation_result
+from core.index import DatasetIndex, value_cleaner
+from core.metrics import PipelineMetrics
+from core.parallel import loaded, parallel_map
+from core.plan import QueryPlan
+from core.records import Record
+from core.schema import Schema
+from core.table import Table
 from imperative_impl.cleaning import DataCleaner
 from imperative_impl.transformation import DataTransformer
 from imperative_impl.analysis import DataAnalyzer
 
-def run_pipeline(config, dataset) -> Tuple[List[Dict[str, Any]], dict, dict | None]:
-    cleaner = DataCleaner(dataset, config)
-    cleaner.clean()
+if TYPE_CHECKING:
+    # Only needed by incremental runs; hashlib alone adds to every start-up
+    from core.incremental import PipelineState
 
-    transformer = DataTransformer(dataset, config)
-    transformer.transform()
+def run_pipeline(config, dataset, schema: Optional[Schema] = None, metrics: Optional[PipelineMetrics] = None, optimize: bool = True, index: Optional[DatasetIndex] = None) -> Tuple[List[Dict[str, Any]], dict, dict | None]:
+    """Run every stage over the whole dataset, recording each one in `metrics` if given.
 
-    analyzer = DataAnalyzer(dataset)
-    analysis_results = analyzer.analyze()
+    The stages run as planned by `core.plan.QueryPlan`; with `optimize` off they run one after another.
+    A pushed-down filter is answered from `index` (a `core.index.DatasetIndex` over `dataset`) if given;
+    the dataset is then left unchanged, since it will be queried again.
+    """
+    if metrics is None:
+        metrics = PipelineMetrics()
+    if schema is None:
+        with metrics.stage('schema', len(dataset)):
+            schema = Schema.infer(dataset)
+    fill_values = None
+    if optimize and config.get('missing_data_action') == 'fill':
+        with metrics.stage('fill_defaults', len(dataset)):
+            fill_values = DataCleaner.compute_fill_values([dataset], schema)
 
-    return dataset, analysis_results, transformer.aggregate_by_key()
\ No newline at end of file
+    transformer = _clean_and_transform(dataset, QueryPlan(config, schema, optimize), schema, fill_values, metrics, index)
+
+    with metrics.stage('analyze', len(transformer.data)):
+        analyzer = DataAnalyzer(transformer.data, config.get('quantiles'), schema)
+        analysis_results = analyzer.analyze()
+
+    with metrics.stage('aggregate', len(transformer.data)):
+        aggregation = transformer.aggregate_by_key()
+
+    return transformer.data, analysis_results, aggregation_result(aggregation, config)
+
+def clean_dataset(config, dataset, schema: Optional[Schema] = None, metrics: Optional[PipelineMetrics] = None) -> List[Dict[str, Any]]:
+    """Only the cleaning stage of `run_pipeline`, for rows that will be queried many times; `dataset` is left unchanged."""
+    if metrics is None:
+        metrics = PipelineMetrics()
+    if schema is None:
+        with metrics.stage('schema', len(dataset)):
+            schema = Schema.infer(dataset)
+    data = dataset[:] if isinstance(dataset, Table) else [dict(row) for row in dataset]
+    with metrics.stage('clean', len(data)) as stage:
+        cleaner = DataCleaner(data, config, schema)
+        cleaner.clean()
+        stage.rows_out = len(cleaner.data)
+    return cleaner.data
+
+def _clean_and_transform(data, plan: QueryPlan, schema: Schema, fill_values: Optional[Dict[str, Any]], metrics: PipelineMetrics, index: Optional[DatasetIndex] = None) -> DataTransformer:
+    """Clean, filter and compute `data` as `plan` says, recording each step in `metrics`.
+
+    Under 'fill' an optimized plan needs the `fill_values` of the whole dataset,
+    since the rows the filter drops are never seen by the cleaning. With an
+    `index` the rows are cleaned as copies, leaving `data` as it was.
+    """
+    config = plan.config
+    if index is not None and not plan.pushdown:
+        data = data[:] if isinstance(data, Table) else [dict(row) for row in data]
+    if not plan.optimize:
+        with metrics.stage('clean', len(data)) as stage:
+            cleaner = DataCleaner(data, config, schema, fill_values)
+            cleaner.clean()
+            stage.rows_out = len(cleaner.data)
+
+        with metrics.stage('transform', len(cleaner.data)) as stage:
+            transformer = DataTransformer(cleaner.data, config, schema)
+            transformer.transform()
+            stage.rows_out = len(transformer.data)
+        return transformer
+
+    remove = 'missing_data_action' in config and config.get('missing_data_action', 'remove') == 'remove'
+    cleaner = DataCleaner(data, config, schema, fill_values)
+    rows = data
+    if plan.pushdown and index is not None:
+        with metrics.stage('filter', len(rows)) as stage:
+            ids = index.select(plan.expression, value_cleaner(cleaner.value_cleaners()), remove)
+            rows = data = data.take(ids) if isinstance(data, Table) else [dict(data[i]) for i in ids]
+            stage.rows_out = len(rows)
+    elif plan.pushdown:
+        with metrics.stage('filter', len(rows)) as stage:
+            value_cleaners = cleaner.value_cleaners()
+            cols = [(col, value_cleaners.get(col)) for col in plan.filter_columns]
+            kept = []
+            for row in rows:
+                values = {}
+                for col, clean_value in cols:
+                    value = row.get(col)
+                    if remove and value in (None, ""):
+                        break
+                    values[col] = clean_value(value) if clean_value is not None else value
+                else:
+                    if plan.predicate(values):
+                        kept.append(row)
+            rows = kept
+            stage.rows_out = len(rows)
+
+    # One pass per row: drop it if a value is missing, clean its values, then add the computed column
+    with metrics.stage('clean+compute', len(rows)) as stage:
+        transformer = DataTransformer([], plan.stage_config, schema)
+        compute = config.get('compute') is not None
+        output = []
+        # Rows of a Table see the computed column as soon as the first row gets it, so only its own columns are checked
+        columns = data.keys() if isinstance(data, Table) else None
+        for row in rows:
+            if remove and any(value in (None, "") for value in (row.values() if columns is None else map(row.__getitem__, columns))):
+                continue
+            if row.__class__ is Record:
+                # Cleaning rewrites most values; a dict takes the writes without a method call each
+                row = row.to_dict()
+            cleaner.clean_row(row)
+            if compute:
+                transformer.compute_row(row)
+            output.append(row)
+
+        if isinstance(data, Table):
+            # Keep a Table a Table: its rows were cleaned in place, so only the kept ones are selected
+            data[:] = output
+            output = data
+        transformer.data = output
+        stage.rows_out = len(output)
+    return transformer
+
+def process_batch(
+    batch: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    schema: Schema,
+    fill_values: Optional[Dict[str, Any]] = None,
+    keep_output: bool = True,
+    trace_memory: bool = False,
+    optimize: bool = True,
+) -> Tuple[List[Dict[str, Any]] | None, int, DataAnalyzer, GroupBy | None, PipelineMetrics]:
+    """Run one batch through every stage, returning its output rows (if kept), row count, analyzer, aggregation and stage metrics.
+
+    Defined at module level so it can be sent to worker processes.
+    """
+    metrics = PipelineMetrics(trace_memory)
+    transformer = _clean_and_transform(batch, QueryPlan(config, schema, optimize), schema, fill_values, metrics)
+
+    with metrics.stage('analyze', len(transformer.data)):
+        analyzer = DataAnalyzer(quantiles=config.get('quantiles'), schema=schema)
+        analyzer.update(transformer.data)
+
+    with metrics.stage('aggregate', len(transformer.data)):
+        aggregation = transformer.aggregate_by_key()
+
+    output = transformer.data if keep_output else None
+    return output, len(transformer.data), analyzer, aggregation, metrics
+
+def run_pipeline_stream(
+    config: Dict[str, Any],
+    load_batches: Callable[[], Iterable[List[Dict[str, Any]]]],
+    on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    schema: Optional[Schema] = None,
+    workers: Optional[int] = 1,
+    metrics: Optional[PipelineMetrics] = None,
+    optimize: bool = True,
+    state: Optional["PipelineState"] = None,
+) -> Tuple[int, dict, dict | None]:
+    """Run the pipeline one batch at a time so memory depends on the batch size, not the file size.
+
+    `load_batches` must return a fresh batch iterator on every call: without a
+    `schema` it is inferred from the first batch, and 'fill' needs a pass over the
+    whole dataset before cleaning. Each output batch is handed to `on_batch`
+    instead of being kept; the row count is returned in place of the output rows.
+    A batch may be a `core.parallel.Deferred`, such as a range of one of many
+    files, which is then read and parsed by the worker that processes it.
+
+    With `workers` > 1 (None for every core) batches are processed in that many
+    processes. Partial results are still merged in input order, so the result is
+    the same as with one worker. Stage metrics of every batch are added up in `metrics`.
+
+    With a `state` from an earlier run, the batches are merged into its row
+    count and partial results, and the merged ones are stored back in it; the
+    report and aggregation then cover every row processed so far.
+    """
+    if metrics is None:
+        metrics = PipelineMetrics()
+    if schema is None:
+        with metrics.stage('schema'):
+            schema = Schema.infer(next(loaded(load_batches()), []))
+    fill_values = None
+    if config.get('missing_data_action') == 'fill':
+        with metrics.stage('fill_defaults'):
+            fill_values = DataCleaner.compute_fill_values(loaded(load_batches()), schema)
+
+    process = partial(
+        process_batch, config=config, schema=schema, fill_values=fill_values,
+        keep_output=on_batch is not None, trace_memory=metrics.trace_memory, optimize=optimize
+    )
+    if state is not None and state.summary is not None:
+        analyzer = DataAnalyzer.from_summary(state.summary, config.get('quantiles'))
+        aggregation, num_rows = state.aggregation, state.num_rows
+    else:
+        analyzer = DataAnalyzer(quantiles=config.get('quantiles'))
+        aggregation = None
+        num_rows = 0
+    for output, batch_rows, batch_analyzer, partial_aggregation, batch_metrics in parallel_map(process, load_batches(), workers):
+        metrics.merge(batch_metrics)
+        analyzer.merge(batch_analyzer)
+        if partial_aggregation is not None:
+            if aggregation is None:
+                aggregation = partial_aggregation
+            else:
+                aggregation.merge(partial_aggregation)
+
+        num_rows += batch_rows
+        if on_batch is not None:
+            on_batch(output)
+    if state is not None:
+        state.summary, state.aggregation, state.num_rows = analyzer.summary(), aggregation, num_rows
+
+    with metrics.stage('analyze'):
+        report = analyzer.report()
+    return num_rows, report, aggregation_result(aggregation, config)
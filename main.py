@@ -1,38 +1,387 @@
 import argparse
-from core.io import load_csv, load_json, output_summary, output_analysis
-from core.cli_menu import main_menu
-from functional_impl.runner import run_pipeline
-from core.io import save_csv
+import importlib
+from core.io import (
+    BATCH_READERS, COMPRESSIONS, DEFAULT_BATCH_SIZE, CsvBatchWriter, batch_reader, load_csv, load_json, load_ndjson,
+    output_aggregation, output_analysis, output_file_path, output_stream_summary, output_summary, partition_key, save_csv,
+)
+from core.config import COMPUTE_CHOICES, config_from_args, load_config, validate_config
+from core.index import DatasetIndex
+from core.metrics import PipelineMetrics
+from core.parallel import loaded
+from core.plan import QueryPlan
+from core.schema import DEFAULT_SAMPLE_ROWS, Schema
+from core.sources import expand_dataset, file_ranges, source_root
+
+# Interchangeable implementations of run_pipeline / run_pipeline_stream / clean_dataset
+IMPLEMENTATIONS = {
+    'functional': 'functional_impl.runner',
+    'imperative': 'imperative_impl.runner',
+    'numpy': 'numpy_impl.runner',
+}
+
+INCREMENTAL_FILL_ERROR = "--incremental cannot fill missing values: the fill values depend on every row, old and new; use --missing remove"
 
 def main():
     parser = argparse.ArgumentParser(description="Data pipeline processor")
     parser.add_argument(
         "dataset",
         type=str,
-        help="Path to the input dataset CSV file"
+        help="Path to the input dataset CSV file, or a directory or glob pattern of dataset files to process together"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Stream the dataset through the pipeline in batches of this many rows instead of loading it whole"
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Load a CSV dataset into a column-oriented table instead of one dict per row"
+    )
+    parser.add_argument(
+        "--schema",
+        type=str,
+        default=None,
+        help="JSON file of column types (and date formats) to use instead of inferring them"
+    )
+    parser.add_argument(
+        "--impl",
+        choices=sorted(IMPLEMENTATIONS),
+        default="functional",
+        help="Pipeline implementation to run (numpy needs the numpy package)"
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Print the wall time, CPU time, rows in/out and peak memory of every stage"
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=str,
+        default=None,
+        help="Also write the stage metrics to this JSON file"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Process batches in this many worker processes (0 for one per core); implies streaming"
+    )
+    parser.add_argument(
+        "--compress",
+        choices=sorted(COMPRESSIONS),
+        default=None,
+        help="Compress the CSV output"
+    )
+    parser.add_argument(
+        "--partition-by",
+        type=str,
+        default=None,
+        metavar="COLUMN[:month]",
+        help="Write one output file per value of COLUMN (or per month of a date column) into <name>_output/"
+    )
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=None,
+        help="Parse a CSV loaded as a columnar table in this many worker processes (0 for one per core)"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Keep the parsed dataset in a binary columnar cache next to it and reuse it on later runs"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Cache directory to use instead of the one next to the dataset; implies --cache"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=512,
+        help="Size limit of the cache directory in MB; least recently used entries are evicted first (default: 512)"
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Print the query plan (pushed-down filter, fused stages) before running it"
+    )
+    parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Run the stages one after another over every row, without filter pushdown or stage fusion"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Process only the rows appended to a CSV since the last incremental run and merge them into its saved results; implies streaming"
+    )
+    parser.add_argument(
+        "--state-file",
+        type=str,
+        default=None,
+        help="Where --incremental keeps its state (default: <name>.state in .pipeline_cache/ next to the dataset); implies --incremental"
+    )
+    batch = parser.add_argument_group(
+        "batch mode",
+        "Run without the interactive menu; the flags below override the values in --config"
+    )
+    batch.add_argument(
+        "--config",
+        type=str,
+        default=None,
+        help="JSON file with the pipeline options the menu would otherwise ask for"
+    )
+    batch.add_argument("--missing", choices=['remove', 'fill'], default=None, help="How to handle missing data (default: remove)")
+    conditions = batch.add_mutually_exclusive_group()
+    conditions.add_argument(
+        "--filter",
+        nargs=3,
+        metavar=("COLUMN", "OPERATOR", "VALUE"),
+        default=None,
+        help="Keep the rows matching a condition, e.g. --filter Sales_Amount '>' 3000 or --filter Region contains North"
+    )
+    conditions.add_argument(
+        "--where",
+        type=str,
+        default=None,
+        metavar="EXPRESSION",
+        help="Keep the rows matching a filter expression, e.g. --where \"Region in ('North', 'West') and Sales_Amount > 1000\""
+    )
+    batch.add_argument("--compute", choices=['Profit', 'none'], default=None, help="New column to compute (default: none)")
+    batch.add_argument("--aggregate", choices=['region', 'none'], default=None, help="Aggregate total sales by key (default: none)")
+    batch.add_argument(
+        "--group-by",
+        nargs="+",
+        default=None,
+        metavar="KEY",
+        help="Group the output rows by these columns (COLUMN or DATE_COLUMN:month), e.g. --group-by Region Sale_Date:month"
     )
+    batch.add_argument(
+        "--agg",
+        nargs="+",
+        default=None,
+        metavar="FUNC[:COLUMN]",
+        help="Aggregates of each group: count, or sum, mean, min, max, count_distinct, median of a column (default: count)"
+    )
+    batch.add_argument("--output", choices=['csv', 'summary'], default=None, help="Save the output to CSV or print a summary (default: summary)")
 
     args = parser.parse_args()
     dataset_path = args.dataset
-    dataset = None
-    if dataset_path.endswith('.csv'):
-        dataset = load_csv(dataset_path)
-    elif dataset_path.endswith('.json'):
-        dataset = load_json(dataset_path)
+    # A directory or glob is streamed file range by file range, parsed in the worker processes
+    paths = expand_dataset(dataset_path)
+    multi_file = paths != [dataset_path]
+    if multi_file and not paths:
+        print(f"No CSV, JSON or NDJSON files found in '{dataset_path}'.")
+        return
+    if not multi_file and not dataset_path.endswith(tuple(BATCH_READERS)):
+        print("Unsupported file format. Please provide a CSV, JSON or NDJSON (.ndjson/.jsonl) file.")
+        return
+
+    batch_mode = args.config is not None or any(
+        value is not None for value in (args.missing, args.filter, args.where, args.compute, args.aggregate, args.group_by, args.agg, args.output)
+    )
+    try:
+        batch_config = config_from_args(args, load_config(args.config) if args.config else None) if batch_mode else None
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot read config file: {e}")
+
+    incremental = args.incremental or args.state_file is not None
+    if incremental and (multi_file or not dataset_path.endswith('.csv')):
+        parser.error("--incremental needs a single CSV dataset")
+
+    try:
+        runner = importlib.import_module(IMPLEMENTATIONS[args.impl])
+    except ImportError as e:
+        print(f"The {args.impl} implementation is not available: {e}")
+        return
+
+    # Stages are always timed; memory is only traced when the metrics are asked for
+    metrics = PipelineMetrics(trace_memory=args.metrics or args.metrics_json is not None)
+    shown_metrics = metrics if args.metrics else None
+    with metrics.stage('schema'):
+        schema = load_schema(paths[0], args.schema)
+    if batch_config is not None:
+        try:
+            batch_config = validate_config(batch_config, schema)
+        except ValueError as e:
+            parser.error(str(e))
+        if incremental and batch_config.get('missing_data_action') == 'fill':
+            parser.error(INCREMENTAL_FILL_ERROR)
+    if args.partition_by:
+        try:
+            partition_key(args.partition_by)
+        except ValueError as e:
+            parser.error(str(e))
+        column = args.partition_by.partition(':')[0]
+        if column not in schema and column not in COMPUTE_CHOICES:
+            parser.error(f"Unknown partition column '{column}'")
+    save_path = output_file_path(source_root(dataset_path) if multi_file else dataset_path, args.compress, args.partition_by is not None)
+
+    if args.batch_size or args.workers is not None or incremental or multi_file:
+        state_path = None
+        if incremental:
+            from core.incremental import default_state_path
+            state_path = args.state_file or default_state_path(dataset_path)
+        # Several files default to one worker per core
+        workers = args.workers if args.workers is not None else 0 if multi_file else 1
+        run_streaming(
+            runner, dataset_path, args.batch_size or DEFAULT_BATCH_SIZE, schema, workers, metrics, shown_metrics, batch_config,
+            save_path, args.compress, args.partition_by, not args.no_optimize, args.explain, state_path, paths if multi_file else None
+        )
     else:
-        print("Unsupported file format. Please provide a CSV or JSON file.")
+        dataset = None
+        with metrics.stage('load') as stage:
+            if dataset_path.endswith('.csv'):
+                cache = None
+                if args.cache or args.cache_dir:
+                    from core.cache import DatasetCache, default_cache_dir
+                    cache = DatasetCache(args.cache_dir or default_cache_dir(dataset_path), int(args.cache_size * 2 ** 20))
+                # The numpy implementation reads its columns straight out of a Table
+                dataset = load_csv(
+                    dataset_path, columnar=args.columnar or args.impl == 'numpy', schema=schema, cache=cache,
+                    workers=1 if args.load_workers is None else args.load_workers or None
+                )
+            elif dataset_path.endswith('.json'):
+                dataset = load_json(dataset_path)
+            else:
+                dataset = load_ndjson(dataset_path)
+            stage.rows_out = len(dataset)
+
+        if not dataset:
+            return
+
+        # Interactive sessions can query the dataset again; the columns they filter on are indexed as they go
+        index = DatasetIndex(dataset, schema) if batch_config is None else None
+        while True:
+            config = choose_config(batch_config, dataset, schema)
+            print(config)
+            if args.explain:
+                print(QueryPlan(config, schema, not args.no_optimize).explain())
+            output, analyzing_report, aggregation = runner.run_pipeline(config, dataset, schema, metrics, not args.no_optimize, index)
+            saving = config.get('output') == "Save to CSV"
+            if saving:
+                with metrics.stage('save', len(output)):
+                    save_csv(output, save_path, args.compress, args.partition_by)
+            output_aggregation(aggregation)
+            output_analysis(analyzing_report, shown_metrics)
+            if not saving:
+                output_summary(output)
+            if batch_config is not None:
+                break
+            from core.cli_menu import ask_again
+            if not ask_again():
+                break
+
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+
+def choose_config(batch_config: dict | None, sample, schema: Schema) -> dict:
+    """Use the batch-mode config if there is one, otherwise ask for the options interactively."""
+    if batch_config is not None:
+        return batch_config
+    # InquirerPy takes most of the start-up time, so batch runs never import it
+    from core.cli_menu import main_menu
+    return main_menu(sample, schema)
+
+def load_schema(dataset_path: str, schema_path: str | None) -> Schema:
+    """Infer the schema once from the first rows of the dataset, applying a schema file on top if given."""
+    iter_batches = batch_reader(dataset_path)
+    sample = next(iter(iter_batches(dataset_path, DEFAULT_SAMPLE_ROWS)), [])
+    return Schema.load(schema_path, sample) if schema_path else Schema.infer(sample)
+
+def run_streaming(
+    runner, dataset_path: str, batch_size: int, schema: Schema, workers: int | None = 1,
+    metrics: PipelineMetrics | None = None, shown_metrics: PipelineMetrics | None = None,
+    batch_config: dict | None = None, save_path: str | None = None,
+    compression: str | None = None, partition_by: str | None = None,
+    optimize: bool = True, explain: bool = False, state_path: str | None = None, paths: list | None = None,
+) -> None:
+    """Run the pipeline over the dataset in batches, never holding the whole file or output in memory.
+
+    `workers` > 1 spreads the batches over that many processes; 0 uses every core.
+    Stages are recorded in `metrics`; `shown_metrics` are printed with the report.
+    Without a `batch_config` the options are asked for interactively. Saved
+    output goes to `save_path` (by default next to the dataset), compressed and
+    partitioned as `CsvBatchWriter` does with `compression` and `partition_by`.
+    `optimize` and `explain` are as for `core.plan.QueryPlan`; `explain` prints the plan.
+
+    With a `state_path` the run is incremental: only the CSV records appended
+    since the run that saved the state there are processed, their results are
+    merged into the saved ones and saved output is appended to. A state saved
+    with other options, or a dataset changed other than by appending, starts
+    over from the first row.
+
+    With `paths` (the files of a directory or glob `dataset_path`) the files
+    are processed in order as one dataset. They are split into ranges of
+    about `batch_size` rows, and each range is read and parsed by the worker
+    that cleans and transforms it.
+    """
+    metrics = metrics if metrics is not None else PipelineMetrics()
+    if paths is not None:
+        load_batches = lambda: file_ranges(paths, batch_size)
+    else:
+        iter_batches = batch_reader(dataset_path)
+        load_batches = lambda: iter_batches(dataset_path, batch_size)
+
+    first_batch = next((batch for batch in loaded(load_batches()) if batch), [])
+    if not first_batch:
         return
-    
-    if dataset or not len(dataset) == 0:
-        config = main_menu(dataset)
-        print(config)
-        output, analyzing_report, aggregation = run_pipeline(config, dataset)
-        output_analysis(analyzing_report)
-        if config.get('output') == "Save to CSV":
-            output_path = dataset_path.rsplit('/', 1)[0] + '/' + dataset_path.rsplit('/', 1)[1].rsplit('.', 1)[0] + '_output.' + dataset_path.rsplit('.', 1)[1]
-            save_csv(output, output_path)
+
+    config = choose_config(batch_config, first_batch, schema)
+    print(config)
+    if explain:
+        print(QueryPlan(config, schema, optimize).explain())
+    saving = config.get('output') == "Save to CSV"
+    if saving:
+        save_path = save_path or output_file_path(dataset_path, compression, partition_by is not None)
+
+    state = None
+    if state_path is not None:
+        if config.get('missing_data_action') == 'fill':
+            print(INCREMENTAL_FILL_ERROR)
+            return
+        from core.incremental import PipelineState, complete_end, iter_appended, load_state, output_sizes, restore_output, save_state, state_key
+        # Saved output only holds the earlier rows if it went to the same place
+        key = state_key({**config, 'save_path': save_path if saving else None}, schema, runner.__name__)
+        state = load_state(state_path, dataset_path, key)
+        if state is None:
+            state = PipelineState(key)
         else:
-            output_summary(output)
+            print(f"Resuming after {state.num_rows} output rows; processing the rows appended since")
+            if saving:
+                restore_output(save_path, state.output_sizes)
+        start, end = state.offset, complete_end(dataset_path)
+        load_batches = lambda: iter_appended(dataset_path, start, end, batch_size)
+
+    columns: list = list(state.columns) if state is not None else []
+    def remember_columns(batch):
+        if batch and not columns:
+            columns.extend(batch[0].keys())
+
+    if saving:
+        # A resumed run adds to the output of the earlier ones
+        with CsvBatchWriter(save_path, compression, partition_by, append=state is not None and state.offset > 0) as writer:
+            def save_batch(batch):
+                remember_columns(batch)
+                with metrics.stage('save', len(batch)):
+                    writer.write(batch)
+
+            num_rows, analyzing_report, aggregation = runner.run_pipeline_stream(config, load_batches, save_batch, schema, workers or None, metrics, optimize, state)
+    else:
+        num_rows, analyzing_report, aggregation = runner.run_pipeline_stream(config, load_batches, remember_columns, schema, workers or None, metrics, optimize, state)
+    output_aggregation(aggregation)
+    output_analysis(analyzing_report, shown_metrics)
+    if not saving:
+        output_stream_summary(num_rows, columns)
+
+    if state is not None:
+        state.offset, state.columns = end, columns
+        state.output_sizes = output_sizes(save_path) if saving else {}
+        save_state(state_path, dataset_path, state)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,130 @@
+import copy
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from core.quantiles import DEFAULT_PERCENTILES, percentile_report, sketch_from_options
+from core.schema import Schema
+from core.sketches import StringSketch, string_columns, string_report
+from core.stats import RunningStats
+from numpy_impl.frame import Categorical, Frame, as_float, numeric_mask, numeric_values
+
+
+def empty_summary() -> Dict[str, Any]:
+    return {'stats': {}, 'sketches': {}, 'strings': {}, 'monthly': {}}
+
+
+def _monthly_sales(frame: Frame, date_col: str = 'Sale_Date', value_col: str = 'Sales_Amount') -> Dict[str, float]:
+    dates = frame.get(date_col)
+    values = frame.get(value_col)
+    if not isinstance(dates, Categorical) or values is None:
+        return {}
+
+    # Month ("YYYY-MM") of every distinct date, or -1 when it has none
+    month_index: Dict[str, int] = {}
+    category_month = np.array([
+        month_index.setdefault(value[:7], len(month_index)) if isinstance(value, str) and len(value) >= 7 else -1
+        for value in dates.categories
+    ], dtype=np.int64)
+    if not month_index:
+        return {}
+
+    months = category_month[dates.codes]
+    valid = (months >= 0) & numeric_mask(values)
+    totals = np.bincount(months[valid], weights=as_float(values)[valid], minlength=len(month_index))
+    rows = np.bincount(months[valid], minlength=len(month_index))
+    return {month: total for month, total, count in zip(month_index, totals.tolist(), rows.tolist()) if count}
+
+
+def _string_counts(column: Categorical) -> Dict[str, int]:
+    """Occurrences of each non-empty string category, counted over the codes in one pass."""
+    counts = np.bincount(column.codes, minlength=len(column.categories)).tolist()
+    return {
+        value: count for value, count in zip(column.categories, counts)
+        if count and isinstance(value, str) and value
+    }
+
+
+def _monthly_trend(monthly_sales: Dict[str, float]) -> Dict[str, float]:
+    """Percentage change of total sales from each month to the next, over the sorted months."""
+    if not monthly_sales:
+        return {}
+
+    months = sorted(monthly_sales)
+    sales = np.array([monthly_sales[month] for month in months])
+    previous, current = sales[:-1], sales[1:]
+    nonzero = previous != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = ((current - previous) / previous) * 100
+    return {month: value for month, value, keep in zip(months[1:], change.tolist(), nonzero.tolist()) if keep}
+
+
+def summarize(frame: Frame, quantiles: Optional[Dict[str, Any]] = None, schema: Optional[Schema] = None) -> Dict[str, Any]:
+    """Reduce a frame to the same mergeable state the other implementations build row by row.
+
+    That is a `RunningStats` and a `QuantileSketch` per numeric column, a
+    `StringSketch` per column `schema` types as 'string', and total sales per
+    month, each computed with whole-column operations.
+    """
+    summary = empty_summary()
+    strings = set(string_columns(schema))
+    for col, column in frame.items():
+        if col in strings and isinstance(column, Categorical):
+            counts = _string_counts(column)
+            if counts:
+                summary['strings'][col] = StringSketch().update(counts)
+        values = numeric_values(column)
+        if not len(values):
+            continue
+        mean = float(values.mean())
+        summary['stats'][col] = RunningStats(
+            len(values), mean, float(np.square(values - mean).sum()), float(values.min()), float(values.max())
+        )
+        # Pre-sorted values make the sketch's own sorts close to linear
+        summary['sketches'][col] = sketch_from_options(quantiles).extend(np.sort(values).tolist())
+    summary['monthly'] = _monthly_sales(frame)
+    return summary
+
+
+def merge_summaries(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge the summary of another batch into `left` and return it; `right` is left untouched."""
+    for col, stats in right['stats'].items():
+        left['stats'].setdefault(col, RunningStats()).merge(stats)
+    for col, sketch in right['sketches'].items():
+        if col in left['sketches']:
+            left['sketches'][col].merge(sketch)
+        else:
+            left['sketches'][col] = copy.deepcopy(sketch)
+    for col, sketch in right['strings'].items():
+        if col in left['strings']:
+            left['strings'][col].merge(sketch)
+        else:
+            left['strings'][col] = copy.deepcopy(sketch)
+    for month, sales in right['monthly'].items():
+        left['monthly'][month] = left['monthly'].get(month, 0) + sales
+    return left
+
+
+def finalize(summary: Dict[str, Any], quantiles: Optional[Dict[str, Any]] = None) -> dict[str, dict[str, Any]]:
+    """Build the analysis report from a (merged) summary."""
+    stats = summary['stats']
+    if not stats and not summary['strings']:
+        return {}
+
+    percentiles = (quantiles or {}).get('percentiles', DEFAULT_PERCENTILES)
+    sketches = summary['sketches']
+    return {
+        'mean': {col: running.mean for col, running in stats.items()},
+        'median': {col: sketch.quantile(0.5) for col, sketch in sketches.items()},
+        'variance': {col: running.variance for col, running in stats.items()},
+        'min': {col: running.min for col, running in stats.items()},
+        'max': {col: running.max for col, running in stats.items()},
+        'percentiles': {col: percentile_report(sketch, percentiles) for col, sketch in sketches.items()},
+        'quantile_error': {col: sketch.rank_error() for col, sketch in sketches.items()},
+        'trend': _monthly_trend(summary['monthly']),
+        **string_report(summary['strings']),
+    }
+
+
+def analyze(frame: Frame, quantiles: Optional[Dict[str, Any]] = None, schema: Optional[Schema] = None) -> dict[str, dict[str, Any]]:
+    return finalize(summarize(frame, quantiles, schema), quantiles)
@@ -0,0 +1,143 @@
+from typing import Any, Dict, Iterable, List, Optional
+import re
+from datetime import datetime
+
+import numpy as np
+
+from core.dates import DateStandardizer
+from core.schema import Schema
+from numpy_impl.frame import Categorical, Frame, as_float, frame_length, is_missing, take, to_frame
+
+PRECISION = 2
+
+# Fallback formats, tried when a value does not match the column's detected format
+_DATE_PATTERNS = [
+    ('%Y-%m-%d', re.compile(r"^\d{4}([-/])\d{1,2}\1\d{1,2}")),
+    ('%d-%m-%Y', re.compile(r"^\d{1,2}([-/])\d{1,2}\1\d{4}")),
+    ('%m-%d-%Y', re.compile(r"^\d{1,2}([-/])\d{1,2}\1\d{4}")),
+]
+
+
+def _handle_missing_data(frame: Frame, config: Dict[str, Any], col_types: Schema, col_defaults: Optional[Dict[str, Any]] = None) -> Frame:
+    """Handle missing data according to config."""
+    if 'missing_data_action' not in config:
+        return frame
+
+    action = config.get('missing_data_action', 'remove')
+    if action == 'remove':
+        keep = np.ones(frame_length(frame), dtype=bool)
+        for column in frame.values():
+            keep &= ~is_missing(column)
+        return take(frame, keep)
+    elif action == 'fill':
+        defaults = col_defaults if col_defaults is not None else fill_defaults([frame], col_types)
+        return {col: _fill(column, defaults.get(col)) for col, column in frame.items()}
+
+    return frame
+
+
+def _fill(column, default: Any):
+    if isinstance(column, Categorical):
+        return column.map(lambda value: default if value in (None, "") else value)
+    return np.where(np.isnan(column), np.nan if default is None else default, column)
+
+
+def fill_defaults(frames: Iterable[Frame], col_types: Schema) -> Dict[str, Any]:
+    """Compute the 'fill' values (column mean or mode) over a whole dataset, one frame at a time."""
+    sums: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    freqs: Dict[str, Dict[Any, int]] = {}
+    for frame in frames:
+        for col, column in frame.items():
+            present = ~is_missing(column)
+            if col_types.get(col) == 'number':
+                values = as_float(column)[present]
+                values = values[~np.isnan(values)]
+                sums[col] = sums.get(col, 0.0) + float(values.sum())
+                counts[col] = counts.get(col, 0) + len(values)
+            elif isinstance(column, Categorical):
+                freq = freqs.setdefault(col, {})
+                per_category = np.bincount(column.codes[present], minlength=len(column.categories))
+                for value, count in zip(column.categories, per_category.tolist()):
+                    if count:
+                        freq[value] = freq.get(value, 0) + count
+
+    fill_values: Dict[str, Any] = {}
+    for col, col_type in col_types.items():
+        if col_type == 'number':
+            fill_values[col] = sums[col] / counts[col] if counts.get(col) else 0.0
+        elif freqs.get(col):
+            fill_values[col] = max(freqs[col].items(), key=lambda x: x[1])[0]
+        else:
+            fill_values[col] = None
+    return fill_values
+
+
+def fill_defaults_from_batches(batches: Iterable[List[Dict[str, Any]]], col_types: Schema) -> Dict[str, Any]:
+    return fill_defaults((to_frame(batch, col_types) for batch in batches), col_types)
+
+
+def _standardize_dates(frame: Frame, col_types: Schema) -> Frame:
+    """Standardize date columns to YYYY-MM-DD, parsing each distinct value once."""
+    return {
+        col: column.map(DateStandardizer(col_types.date_formats.get(col), _parse_date))
+        if col_types.get(col) == 'date' and isinstance(column, Categorical) else column
+        for col, column in frame.items()
+    }
+
+
+def _parse_date(date_str: str, fmt: Optional[str] = None) -> Any:
+    """Try to parse date string flexibly, starting with the column's detected format."""
+    date_str = date_str.strip()
+    if fmt is not None:
+        try:
+            return datetime.strptime(date_str.split()[0], fmt)
+        except (ValueError, IndexError):
+            pass
+
+    for fmt, pattern in _DATE_PATTERNS:
+        match = pattern.match(date_str)
+        if match:
+            try:
+                # Written with the separator the value uses
+                return datetime.strptime(date_str.split()[0], fmt.replace('-', match.group(1)))
+            except (ValueError, IndexError):
+                pass
+    return None
+
+
+def _round(values: np.ndarray, precision: int = PRECISION) -> np.ndarray:
+    """`np.round`, with values close to a rounding boundary redone by Python's `round` so results match it exactly."""
+    rounded = np.round(values, precision)
+    scaled = values * 10 ** precision
+    # The scaling above can be off by an ulp, which only matters right next to a .5
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) <= np.abs(scaled) * 1e-12 + 1e-9
+    for index in np.flatnonzero(near_half).tolist():
+        rounded[index] = round(float(values[index]), precision)
+    return rounded
+
+
+def _standardize_numerical_precision(frame: Frame, col_types: Schema) -> Frame:
+    """Round numerical values to specified precision."""
+    def round_value(value: Any) -> Any:
+        try:
+            return round(float(value), PRECISION)
+        except (TypeError, ValueError):
+            return value
+
+    return {
+        col: (column.map(round_value) if isinstance(column, Categorical) else _round(column))
+        if col_types.get(col) == 'number' else column
+        for col, column in frame.items()
+    }
+
+
+def clean(frame: Frame, config: Dict[str, Any], col_types: Schema, col_defaults: Optional[Dict[str, Any]] = None) -> Frame:
+    """Clean a frame according to config.
+
+    When cleaning one batch of a larger dataset, pass the `col_defaults`
+    computed over the whole dataset so every batch is filled the same way.
+    """
+    cleaned = _handle_missing_data(frame, config, col_types, col_defaults)
+    dated = _standardize_dates(cleaned, col_types)
+    return _standardize_numerical_precision(dated, col_types)
@@ -0,0 +1,137 @@
+from array import array
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.schema import Schema
+from core.table import DictColumn, NumberColumn, Table
+
+
+class Categorical:
+    """A string or date column: `int32` codes into a list of distinct values, kept in order of first appearance.
+
+    Per-value work (date parsing, string comparisons) runs once per distinct
+    value through `map`; everything per-row is an array operation on the codes.
+    """
+
+    def __init__(self, codes: np.ndarray, categories: List[Any]):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_values(cls, values: List[Any]) -> "Categorical":
+        column = DictColumn.from_values(values)
+        return cls(np.frombuffer(column.codes, dtype=np.int32), column.dictionary)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def take(self, selection: np.ndarray) -> "Categorical":
+        """Select rows by mask or indices, dropping categories no selected row uses."""
+        codes = self.codes[selection]
+        used, first_seen = np.unique(codes, return_index=True)
+        used = used[np.argsort(first_seen)]
+        remap = np.zeros(len(self.categories), dtype=np.int32)
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        return Categorical(remap[codes], [self.categories[code] for code in used])
+
+    def map(self, fn: Callable[[Any], Any]) -> "Categorical":
+        """Apply `fn` once per category, merging categories that map to the same value."""
+        lookup: Dict[Any, int] = {}
+        remap = np.array([lookup.setdefault(fn(value), len(lookup)) for value in self.categories], dtype=np.int32)
+        return Categorical(remap[self.codes] if len(remap) else self.codes, list(lookup))
+
+    def matches(self, predicate: Callable[[Any], bool]) -> np.ndarray:
+        """Row mask of `predicate`, evaluated once per category."""
+        per_category = np.array([bool(predicate(value)) for value in self.categories], dtype=bool)
+        return per_category[self.codes] if len(per_category) else np.zeros(len(self.codes), dtype=bool)
+
+
+Column = np.ndarray | Categorical
+Frame = Dict[str, Column]
+
+
+def _to_float(value: Any) -> float:
+    return np.nan if value in (None, "") else float(value)
+
+
+def _number_array(values: List[Any]) -> Optional[np.ndarray]:
+    try:
+        return np.array([_to_float(value) for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_frame(data, schema: Schema) -> Frame:
+    """Columns of a list of row dicts or a `core.table.Table` as arrays.
+
+    Number columns become `float64` arrays with NaN for missing values, unless
+    some value is not numeric; those and every other column become `Categorical`.
+    """
+    if isinstance(data, Table):
+        return {
+            col: np.frombuffer(column.values, dtype=np.float64) if isinstance(column, NumberColumn)
+            else Categorical(np.frombuffer(column.codes, dtype=np.int32), list(column.dictionary))
+            for col, column in data.columns.items()
+        }
+
+    if not data:
+        return {}
+
+    frame: Frame = {}
+    for col in data[0].keys():
+        values = [row.get(col) for row in data]
+        numbers = _number_array(values) if schema.get(col) == 'number' else None
+        frame[col] = numbers if numbers is not None else Categorical.from_values(values)
+    return frame
+
+
+def to_table(frame: Frame) -> Table:
+    """Wrap a frame as a `core.table.Table`, which the rest of the program reads like a list of rows."""
+    columns = {}
+    for col, column in frame.items():
+        if isinstance(column, Categorical):
+            columns[col] = DictColumn(array('i', column.codes.astype(np.int32).tobytes()), column.categories)
+        else:
+            columns[col] = NumberColumn(array('d', column.astype(np.float64).tobytes()))
+    return Table(columns, frame_length(frame))
+
+
+def frame_length(frame: Frame) -> int:
+    return len(next(iter(frame.values()))) if frame else 0
+
+
+def take(frame: Frame, selection: np.ndarray) -> Frame:
+    return {col: column.take(selection) if isinstance(column, Categorical) else column[selection] for col, column in frame.items()}
+
+
+def is_missing(column: Column) -> np.ndarray:
+    if isinstance(column, Categorical):
+        return column.matches(lambda value: value in (None, ""))
+    return np.isnan(column)
+
+
+def as_float(column: Column) -> np.ndarray:
+    """Column as floats, with NaN wherever a value is missing or not numeric."""
+    if not isinstance(column, Categorical):
+        return column
+
+    def convert(value: Any) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    per_category = np.array([convert(value) for value in column.categories], dtype=np.float64)
+    return per_category[column.codes] if len(per_category) else np.zeros(len(column.codes))
+
+
+def numeric_mask(column: Column) -> np.ndarray:
+    """Rows the analysis counts as numbers: floats that are not missing."""
+    if isinstance(column, Categorical):
+        return column.matches(lambda value: isinstance(value, (int, float)) and not isinstance(value, bool))
+    return ~np.isnan(column)
+
+
+def numeric_values(column: Column) -> np.ndarray:
+    return as_float(column)[numeric_mask(column)]
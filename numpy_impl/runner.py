@@ -0,0 +1,161 @@
+from typing import TYPE_CHECKING, Callable, Iterable, List, Dict, Any, Optional, Tuple
+from functools import partial
+
+from core.groupby import GroupBy, aggregation_result, merge_aggregations
+from core.index import CleanValues, DatasetIndex
+from core.metrics import PipelineMetrics
+from core.parallel import loaded, parallel_map
+from core.plan import QueryPlan
+from core.schema import Schema
+from core.table import Table
+from numpy_impl.analysis import analyze, summarize, merge_summaries, finalize, empty_summary
+from numpy_impl.cleaning import clean, fill_defaults, fill_defaults_from_batches
+from numpy_impl.frame import Categorical, Frame, frame_length, is_missing, take, to_frame, to_table
+from numpy_impl.transformation import expression_mask, transform, aggregate_by_key
+
+if TYPE_CHECKING:
+    # Only needed by incremental runs; hashlib alone adds to every start-up
+    from core.incremental import PipelineState
+
+def run_pipeline(config, dataset, schema: Optional[Schema] = None, metrics: Optional[PipelineMetrics] = None, optimize: bool = True, index: Optional[DatasetIndex] = None) -> Tuple[Table, dict, dict | None]:
+    """Run the pipeline on whole columns at once; the output rows come back as a `core.table.Table`.
+
+    A pushed-down filter is answered from `index` (a `core.index.DatasetIndex` over `dataset`) if given.
+    """
+    metrics = metrics if metrics is not None else PipelineMetrics()
+    schema = schema if schema is not None else metrics.measure('schema', Schema.infer, dataset)
+    frame = _run_stages(dataset, QueryPlan(config, schema, optimize), schema, None, metrics, index)
+    with metrics.stage('analyze', frame_length(frame)):
+        analysis = analyze(frame, config.get('quantiles'), schema)
+    with metrics.stage('aggregate', frame_length(frame)):
+        aggregation = aggregate_by_key(frame, config)
+
+    return to_table(frame), analysis, aggregation_result(aggregation, config)
+
+def clean_dataset(config, dataset, schema: Optional[Schema] = None, metrics: Optional[PipelineMetrics] = None) -> Table:
+    """Only the cleaning stage of `run_pipeline`, for rows that will be queried many times; `dataset` is left unchanged."""
+    metrics = metrics if metrics is not None else PipelineMetrics()
+    schema = schema if schema is not None else metrics.measure('schema', Schema.infer, dataset)
+    with metrics.stage('clean', len(dataset)) as stage:
+        frame = clean(to_frame(dataset, schema), config, schema)
+        stage.rows_out = frame_length(frame)
+    return to_table(frame)
+
+def _run_stages(data, plan: QueryPlan, schema: Schema, col_defaults: Optional[Dict[str, Any]], metrics: PipelineMetrics, index: Optional[DatasetIndex] = None) -> Frame:
+    """Clean (including the conversion to columns) and transform `data` as `plan` says, recording each stage in `metrics`.
+
+    A pushed-down filter converts the rows to columns and is evaluated on its
+    column cleaned on its own, so only the matching rows are cleaned and
+    computed. With an `index` only the matching rows are converted. Every step
+    already works on whole columns, so there is no per-row pass to fuse.
+    """
+    config = plan.config
+    frame = None
+    if plan.pushdown and index is not None:
+        with metrics.stage('filter', len(data)) as stage:
+            if col_defaults is None and config.get('missing_data_action') == 'fill':
+                col_defaults = fill_defaults([to_frame(data, schema)], schema)
+            remove = 'missing_data_action' in config and config.get('missing_data_action', 'remove') == 'remove'
+            ids = index.select(plan.expression, _clean_values(config, schema, col_defaults), remove)
+            frame = to_frame(data.take(ids) if isinstance(data, Table) else [data[i] for i in ids], schema)
+            stage.rows_out = frame_length(frame)
+    elif plan.pushdown:
+        with metrics.stage('filter', len(data)) as stage:
+            frame = to_frame(data, schema)
+            if col_defaults is None and config.get('missing_data_action') == 'fill':
+                col_defaults = fill_defaults([frame], schema)
+            frame = _pushed_filter(frame, plan, schema, col_defaults)
+            stage.rows_out = frame_length(frame)
+    with metrics.stage('clean', len(data) if frame is None else frame_length(frame)) as stage:
+        frame = clean(to_frame(data, schema) if frame is None else frame, config, schema, col_defaults)
+        stage.rows_out = frame_length(frame)
+    with metrics.stage('transform', frame_length(frame)) as stage:
+        frame = transform(frame, plan.stage_config, schema)
+        stage.rows_out = frame_length(frame)
+    return frame
+
+def _pushed_filter(frame: Frame, plan: QueryPlan, schema: Schema, col_defaults: Optional[Dict[str, Any]]) -> Frame:
+    """Keep the rows whose filter columns, cleaned on their own, match the plan's filter expression."""
+    raw = {col: frame[col] for col in plan.filter_columns if col in frame}
+    remove = 'missing_data_action' in plan.config and plan.config.get('missing_data_action', 'remove') == 'remove'
+    # Dropping rows with missing values is left to the full cleaning; only these columns' are checked here
+    column_config = {key: value for key, value in plan.config.items() if key != 'missing_data_action' or not remove}
+    mask = expression_mask(clean(raw, column_config, schema, col_defaults), plan.expression, schema)
+    if remove:
+        for column in raw.values():
+            mask &= ~is_missing(column)
+    return take(frame, mask)
+
+def _clean_values(config: Dict[str, Any], schema: Schema, col_defaults: Optional[Dict[str, Any]]) -> CleanValues:
+    """Clean a list of raw values of one column as `clean` cleans that column, for `DatasetIndex.select`."""
+    # Rows with missing values are dropped by the index itself
+    column_config = {key: value for key, value in config.items() if key != 'missing_data_action' or value != 'remove'}
+
+    def clean_values(col: str, values: List[Any]) -> List[Any]:
+        column = clean(to_frame([{col: value} for value in values], schema), column_config, schema, col_defaults).get(col)
+        if column is None:
+            return list(values)
+        if isinstance(column, Categorical):
+            return [column.categories[code] for code in column.codes.tolist()]
+        return [None if value != value else value for value in column.tolist()]
+
+    return clean_values
+
+def process_batch(
+    batch: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    schema: Schema,
+    col_defaults: Optional[Dict[str, Any]] = None,
+    keep_output: bool = True,
+    trace_memory: bool = False,
+    optimize: bool = True,
+) -> Tuple[Table | None, int, Dict[str, Any], GroupBy | None, PipelineMetrics]:
+    """Run one batch through every stage, returning its output rows (if kept), row count, summary, aggregation and stage metrics.
+
+    Defined at module level so it can be sent to worker processes.
+    """
+    metrics = PipelineMetrics(trace_memory)
+    frame = _run_stages(batch, QueryPlan(config, schema, optimize), schema, col_defaults, metrics)
+    with metrics.stage('analyze', frame_length(frame)):
+        summary = summarize(frame, config.get('quantiles'), schema)
+    with metrics.stage('aggregate', frame_length(frame)):
+        aggregation = aggregate_by_key(frame, config)
+    return to_table(frame) if keep_output else None, frame_length(frame), summary, aggregation, metrics
+
+def run_pipeline_stream(
+    config: Dict[str, Any],
+    load_batches: Callable[[], Iterable[List[Dict[str, Any]]]],
+    on_batch: Optional[Callable[[Table], None]] = None,
+    schema: Optional[Schema] = None,
+    workers: Optional[int] = 1,
+    metrics: Optional[PipelineMetrics] = None,
+    optimize: bool = True,
+    state: Optional["PipelineState"] = None,
+) -> Tuple[int, dict, dict | None]:
+    """Run the pipeline one batch at a time, with the same contract as the other implementations' `run_pipeline_stream`."""
+    metrics = metrics if metrics is not None else PipelineMetrics()
+    schema = schema if schema is not None else metrics.measure('schema', Schema.infer, next(loaded(load_batches()), []))
+    col_defaults = (
+        metrics.measure('fill_defaults', fill_defaults_from_batches, loaded(load_batches()), schema)
+        if config.get('missing_data_action') == 'fill' else None
+    )
+
+    process = partial(
+        process_batch, config=config, schema=schema, col_defaults=col_defaults,
+        keep_output=on_batch is not None, trace_memory=metrics.trace_memory, optimize=optimize
+    )
+    num_rows, summary, aggregation = (
+        (state.num_rows, state.summary, state.aggregation) if state is not None and state.summary is not None
+        else (0, empty_summary(), None)
+    )
+    for output, batch_rows, batch_summary, batch_aggregation, batch_metrics in parallel_map(process, load_batches(), workers):
+        metrics.merge(batch_metrics)
+        num_rows += batch_rows
+        summary = merge_summaries(summary, batch_summary)
+        aggregation = merge_aggregations(aggregation, batch_aggregation)
+        if on_batch is not None:
+            on_batch(output)
+    if state is not None:
+        state.num_rows, state.summary, state.aggregation = num_rows, summary, aggregation
+
+    return num_rows, metrics.measure('analyze', finalize, summary, config.get('quantiles')), aggregation_result(aggregation, config)
@@ -0,0 +1,176 @@
+from typing import Any, Dict, List, Optional, Tuple
+from functools import reduce
+import operator as op
+
+import numpy as np
+
+from core.expressions import Expression, Logical, check_expression, compile_filter, filter_expression
+from core.groupby import GroupBy, month_of
+from core.quantiles import QuantileSketch
+from core.schema import Schema
+from numpy_impl.frame import Categorical, Column, Frame, as_float, frame_length, is_missing, take
+
+_COMPARISONS = {
+    '>': op.gt,
+    '<': op.lt,
+    '>=': op.ge,
+    '<=': op.le,
+    '==': op.eq,
+    '!=': op.ne,
+}
+
+
+def _filter_rows(frame: Frame, config: Dict[str, Any], col_types: Schema) -> Frame:
+    """Filter rows based on condition in config."""
+    mask = filter_mask(frame, config, col_types)
+    return frame if mask is None else take(frame, mask)
+
+
+def filter_mask(frame: Frame, config: Dict[str, Any], col_types: Schema) -> Optional[np.ndarray]:
+    """Boolean mask of the rows matching the filter condition or expression in config, or None when there is no filter."""
+    expression = filter_expression(config.get('filter'))
+    if expression is None:
+        return None
+    return expression_mask(frame, check_expression(expression, col_types), col_types)
+
+
+def expression_mask(frame: Frame, expression: Expression, col_types: Schema) -> np.ndarray:
+    """Evaluate a checked filter expression over whole columns: one vectorized mask per condition, combined with & | ~."""
+    if isinstance(expression, Logical):
+        masks = [expression_mask(frame, operand, col_types) for operand in expression.operands]
+        if expression.operator == 'not':
+            return ~masks[0]
+        return reduce(np.logical_and if expression.operator == 'and' else np.logical_or, masks)
+
+    col, operator, values = expression
+    if col not in frame:
+        return np.zeros(frame_length(frame), dtype=bool)
+
+    column = frame[col]
+    if col_types.get(col, 'string') == 'number' and operator != 'contains':
+        # NaN (missing or not numeric) compares False, so those rows are dropped
+        numbers = as_float(column)
+        if operator == 'in':
+            return np.isin(numbers, np.array(values, dtype=float))
+        if operator == 'between':
+            return (numbers >= values[0]) & (numbers <= values[1])
+        return _COMPARISONS[operator](numbers, values[0])
+
+    # Any other condition is the compiled row filter, run once per distinct value
+    matches = compile_filter(expression, col_types)
+    if not isinstance(column, Categorical):
+        return np.array([x == x and matches({col: x}) for x in column.tolist()], dtype=bool)
+    return column.matches(lambda row_value: matches({col: row_value}))
+
+
+def _compute_new_column(frame: Frame, config: Dict[str, Any]) -> Frame:
+    """Compute a new column based on config."""
+    if 'compute' not in config:
+        return frame
+
+    compute_config = config['compute']
+    if compute_config is None:
+        return frame
+
+    if compute_config == 'Profit':
+        zeros = np.zeros(frame_length(frame))
+        unit_price = as_float(frame['Unit_Price']) if 'Unit_Price' in frame else zeros
+        unit_cost = as_float(frame['Unit_Cost']) if 'Unit_Cost' in frame else zeros
+        quantity = as_float(frame['Quantity_Sold']) if 'Quantity_Sold' in frame else zeros
+        # A NaN Profit is read back as None, like a Profit that could not be computed
+        return {**frame, 'Profit': (unit_price - unit_cost) * quantity}
+
+    return frame
+
+
+def _key_column(frame: Frame, col: str, unit: str) -> Categorical:
+    """A group key column as categories, the values the row-based implementations group by."""
+    column = frame.get(col)
+    if column is None:
+        return Categorical(np.zeros(frame_length(frame), dtype=np.int32), [None])
+    if not isinstance(column, Categorical):
+        column = Categorical.from_values([None if x != x else x for x in column.tolist()])
+    return column.map(month_of) if unit == 'month' else column
+
+
+def _group_ids(frame: Frame, group: GroupBy) -> Tuple[np.ndarray, List[Tuple[Any, ...]]]:
+    """The group of every row, numbered in order of first appearance, and the key of every group."""
+    length = frame_length(frame)
+    columns = [_key_column(frame, col, unit) for col, unit in group.keys]
+    if not columns:
+        return np.zeros(length, dtype=np.intp), [()]
+
+    # The codes of all keys as one integer per row, unless their combinations overflow int64
+    sizes = [max(len(column.categories), 1) for column in columns]
+    if np.prod(sizes, dtype=float) < 2 ** 62:
+        combined = np.zeros(length, dtype=np.int64)
+        for column, size in zip(columns, sizes):
+            combined = combined * size + column.codes
+        _, first_seen, inverse = np.unique(combined, return_index=True, return_inverse=True)
+    else:
+        _, first_seen, inverse = np.unique(np.stack([column.codes for column in columns], axis=1), axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first_seen)
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    firsts = first_seen[order]
+    keys = list(zip(*[[column.categories[code] for code in column.codes[firsts].tolist()] for column in columns]))
+    return rank[inverse.ravel()], keys
+
+
+def _partials(function: str, column: Optional[Column], ids: np.ndarray, num_groups: int) -> List[Any]:
+    """One aggregate's partial state for every group, laid out as `GroupBy.empty_state` is; `column` None counts rows."""
+    if column is None:
+        return np.bincount(ids, minlength=num_groups).tolist()
+
+    if function in ('count', 'count_distinct'):
+        present = ~is_missing(column)
+        if function == 'count':
+            return np.bincount(ids[present], minlength=num_groups).tolist()
+        distinct: List[set] = [set() for _ in range(num_groups)]
+        if isinstance(column, Categorical):
+            pairs = np.unique(np.stack([ids[present], column.codes[present]], axis=1), axis=0)
+            for group_id, code in pairs.tolist():
+                distinct[group_id].add(column.categories[code])
+        else:
+            for group_id, value in zip(ids[present].tolist(), column[present].tolist()):
+                distinct[group_id].add(value)
+        return distinct
+
+    values = as_float(column)
+    numeric = ~np.isnan(values)
+    ids, values = ids[numeric], values[numeric]
+    counts = np.bincount(ids, minlength=num_groups)
+    if function in ('sum', 'mean'):
+        # bincount adds the values of each group in row order, the same sums a row loop gives
+        sums = np.bincount(ids, weights=values, minlength=num_groups).tolist()
+        return sums if function == 'sum' else [[total, count] for total, count in zip(sums, counts.tolist())]
+    if function in ('min', 'max'):
+        extremes = np.full(num_groups, np.inf if function == 'min' else -np.inf)
+        (np.fmin if function == 'min' else np.fmax).at(extremes, ids, values)
+        return [value if count else None for value, count in zip(extremes.tolist(), counts.tolist())]
+
+    order = np.argsort(ids, kind='stable')
+    chunks = np.split(values[order], np.cumsum(counts)[:-1])
+    return [QuantileSketch().extend(chunk.tolist()) for chunk in chunks]
+
+
+def aggregate_by_key(frame: Frame, config: Dict[str, Any]) -> GroupBy | None:
+    """Aggregate data by the group-by in config: every aggregate of every group computed with whole-array operations."""
+    group = GroupBy.from_config(config)
+    if group is None:
+        return None
+    if not frame_length(frame):
+        return group
+
+    ids, keys = _group_ids(frame, group)
+    # A column the frame lacks is missing on every row
+    absent = np.full(frame_length(frame), np.nan)
+    partials = [_partials(function, frame.get(col, absent) if col else None, ids, len(keys)) for function, col in group.aggregates]
+    for key, state in zip(keys, zip(*partials)):
+        group.add_partial(key, list(state))
+    return group
+
+
+def transform(frame: Frame, config: Dict[str, Any], col_types: Schema) -> Frame:
+    filtered = _filter_rows(frame, config, col_types)
+    return _compute_new_column(filtered, config)
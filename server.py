@@ -0,0 +1,273 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import validate_config
+from core.index import DatasetIndex
+from core.io import BATCH_READERS, COMPRESSIONS, load_csv, load_json, load_ndjson, output_file_path, save_csv
+from core.metrics import PipelineMetrics
+from core.table import Table
+from main import IMPLEMENTATIONS, load_schema
+
+DEFAULT_PORT = 8765
+DEFAULT_MEMORY_LIMIT = 1024 * 2 ** 20
+
+
+def _nbytes(data) -> int:
+    """Approximate in-memory size of a dataset: the column storage of a Table, or the first row's size times the row count."""
+    if isinstance(data, Table):
+        return data.nbytes()
+    if not data:
+        return 0
+    first = data[0]
+    return len(data) * (sys.getsizeof(first) + sum(sys.getsizeof(value) for value in first.values()))
+
+
+class LoadedDataset:
+    """One dataset held in memory: its raw rows and schema, and the cleaned rows per implementation and missing-data policy.
+
+    Cleaning is what every query on a dataset repeats, so it is done once per
+    (implementation, policy) and the cleaned rows are kept with a
+    `DatasetIndex` over them. Queries then run with the policy taken out of
+    their config: missing values are gone (or filled) already, and dates and
+    rounding come out the same when cleaned again.
+    """
+
+    def __init__(self, path: str, data, schema, stamp: Tuple[int, int]):
+        self.path = path
+        self.data = data
+        self.schema = schema
+        self.stamp = stamp
+        self.cleaned: Dict[Tuple[str, str], Tuple[Any, DatasetIndex]] = {}
+        self.lock = threading.Lock()
+
+    def nbytes(self) -> int:
+        return _nbytes(self.data) + sum(_nbytes(data) for data, _ in self.cleaned.values())
+
+    def cleaned_for(self, impl: str, policy: str) -> Tuple[Any, DatasetIndex]:
+        """The rows cleaned by `impl` under a missing-data `policy`, and their index; cleaned on first use."""
+        key = (impl, policy)
+        cleaned = self.cleaned.get(key)
+        if cleaned is not None:
+            return cleaned
+        with self.lock:
+            cleaned = self.cleaned.get(key)
+            if cleaned is None:
+                runner = importlib.import_module(IMPLEMENTATIONS[impl])
+                data = runner.clean_dataset({'missing_data_action': policy}, self.data, self.schema)
+                cleaned = self.cleaned[key] = (data, DatasetIndex(data, self.schema))
+        return cleaned
+
+
+class DatasetStore:
+    """Datasets loaded by path and kept in memory, least recently used evicted first once they take more than `max_bytes`.
+
+    A dataset whose file changed (size or mtime) since it was loaded is loaded again.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_LIMIT):
+        self.max_bytes = max_bytes
+        self.datasets: "OrderedDict[str, LoadedDataset]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._saving: Dict[str, threading.Lock] = {}
+
+    def get(self, path: str) -> LoadedDataset:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            dataset = self.datasets.get(path)
+            if dataset is not None and dataset.stamp == stamp:
+                self.datasets.move_to_end(path)
+                return dataset
+            loading = self._loading.setdefault(path, threading.Lock())
+
+        # One load per path at a time; other paths load concurrently
+        with loading:
+            with self._lock:
+                dataset = self.datasets.get(path)
+                if dataset is not None and dataset.stamp == stamp:
+                    self.datasets.move_to_end(path)
+                    return dataset
+            schema = load_schema(path, None)
+            if path.endswith('.csv'):
+                data = load_csv(path, columnar=True, schema=schema)
+            elif path.endswith('.json'):
+                data = load_json(path)
+            else:
+                data = load_ndjson(path)
+            dataset = LoadedDataset(path, data, schema, stamp)
+            with self._lock:
+                self.datasets[path] = dataset
+                self.datasets.move_to_end(path)
+            self.evict(keep=path)
+            return dataset
+
+    def save_lock(self, output_path: str) -> threading.Lock:
+        """The lock queries hold while writing `output_path`, so concurrent saves to it never interleave."""
+        with self._lock:
+            return self._saving.setdefault(os.path.abspath(output_path), threading.Lock())
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Drop least recently used datasets, never `keep`, until the rest fit in `max_bytes`."""
+        with self._lock:
+            sizes = {path: dataset.nbytes() for path, dataset in self.datasets.items()}
+            total = sum(sizes.values())
+            for path in list(self.datasets):
+                if total <= self.max_bytes:
+                    break
+                if path != keep:
+                    del self.datasets[path]
+                    total -= sizes[path]
+
+    def describe(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {'path': path, 'rows': len(dataset.data), 'bytes': dataset.nbytes(), 'cleaned': [list(key) for key in dataset.cleaned]}
+                for path, dataset in self.datasets.items()
+            ]
+
+
+def _jsonable_aggregation(aggregation: dict | None) -> Any:
+    """Group-by results keyed by tuples become a list of {"key": [...], "values": {...}}; the region totals stay a dict."""
+    if aggregation is None or not any(isinstance(key, tuple) for key in aggregation):
+        return aggregation
+    return [{'key': list(key), 'values': values} for key, values in aggregation.items()]
+
+
+def run_query(store: DatasetStore, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one query: {"dataset": path, "config": {...}, "impl": name}, with the config in the shape `main_menu` produces.
+
+    Returns the output row count, analysis report and aggregation, and the
+    output path when the config saves to CSV (optionally with "compress" and
+    "partition_by" as for the command line). Raises ValueError for a bad
+    request and OSError for a dataset that cannot be read.
+    """
+    path = request.get('dataset')
+    if not isinstance(path, str) or not path.endswith(tuple(BATCH_READERS)):
+        raise ValueError("'dataset' must be the path of a CSV, JSON or NDJSON file")
+    impl = request.get('impl', 'functional')
+    if impl not in IMPLEMENTATIONS:
+        raise ValueError(f"Unknown implementation '{impl}'; expected one of {', '.join(sorted(IMPLEMENTATIONS))}")
+    compression = request.get('compress')
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'; expected one of {', '.join(COMPRESSIONS)}")
+    runner = importlib.import_module(IMPLEMENTATIONS[impl])
+
+    dataset = store.get(path)
+    config = validate_config(request.get('config') or {}, dataset.schema)
+    data, index = dataset.cleaned_for(impl, config['missing_data_action'])
+    store.evict(keep=dataset.path)
+
+    metrics = PipelineMetrics()
+    query = {key: value for key, value in config.items() if key != 'missing_data_action'}
+    output, report, aggregation = runner.run_pipeline(query, data, dataset.schema, metrics, True, index)
+
+    output_path = None
+    if config.get('output') == "Save to CSV":
+        partition_by = request.get('partition_by')
+        output_path = output_file_path(dataset.path, compression, partition_by is not None)
+        # Every query saving this dataset the same way writes the same path; the last one to finish wins whole
+        with store.save_lock(output_path):
+            save_csv(output, output_path, compression, partition_by)
+    return {
+        'rows': len(output),
+        'analysis': report,
+        'aggregation': _jsonable_aggregation(aggregation),
+        'output_path': output_path,
+        'seconds': {name: stage.wall_seconds for name, stage in metrics.stages.items()},
+    }
+
+
+class PipelineHTTPServer(HTTPServer):
+    """HTTP server on localhost that answers each request on a thread of a pool of `workers`."""
+
+    def __init__(self, address: Tuple[str, int], store: DatasetStore, workers: int = 4):
+        super().__init__(address, PipelineRequestHandler)
+        self.store = store
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address) -> None:
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+class PipelineRequestHandler(BaseHTTPRequestHandler):
+    """`POST /query` runs a query (see `run_query`); `GET /datasets` lists the datasets held in memory."""
+
+    server: PipelineHTTPServer
+
+    def _reply(self, status: int, body: Any) -> None:
+        payload = json.dumps(body, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        if self.path != '/datasets':
+            self._reply(404, {'error': f"Unknown path '{self.path}'"})
+            return
+        self._reply(200, self.server.store.describe())
+
+    def do_POST(self) -> None:
+        if self.path != '/query':
+            self._reply(404, {'error': f"Unknown path '{self.path}'"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("The request must be a JSON object")
+            self._reply(200, run_query(self.server.store, request))
+        except (ValueError, KeyError) as e:
+            self._reply(400, {'error': str(e)})
+        except FileNotFoundError as e:
+            self._reply(404, {'error': str(e)})
+        except Exception as e:
+            self._reply(500, {'error': f"{type(e).__name__}: {e}"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident data pipeline server: keeps datasets loaded between queries")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=4, help="Requests handled at the same time (default: 4)")
+    parser.add_argument(
+        "--memory-limit",
+        type=float,
+        default=DEFAULT_MEMORY_LIMIT / 2 ** 20,
+        help="MB of loaded datasets to keep; least recently used ones are evicted first (default: 1024)"
+    )
+    args = parser.parse_args()
+
+    server = PipelineHTTPServer((args.host, args.port), DatasetStore(int(args.memory_limit * 2 ** 20)), max(args.workers, 1))
+    print(f"Serving on http://{args.host}:{server.server_port} (POST /query, GET /datasets)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
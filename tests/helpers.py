@@ -0,0 +1,49 @@
+"""What the tests share: the implementations to run, small generated datasets and running main.py in-process."""
+import contextlib
+import csv
+import importlib
+import io
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+from unittest import mock
+
+from benchmarks.generate import write_csv
+
+IMPLEMENTATIONS = ('functional_impl.runner', 'imperative_impl.runner', 'numpy_impl.runner')
+
+__all__ = ['IMPLEMENTATIONS', 'read_csv_rows', 'rounded', 'run_main', 'runners', 'write_csv']
+
+
+def runners() -> Iterator[Tuple[str, Any]]:
+    """Each implementation's runner module that can be imported, with its name; numpy is an optional extra."""
+    for name in IMPLEMENTATIONS:
+        try:
+            yield name, importlib.import_module(name)
+        except ImportError:
+            continue
+
+
+def run_main(*argv: str) -> str:
+    """Run main.py with these arguments and return what it printed."""
+    import main
+
+    printed = io.StringIO()
+    with mock.patch.object(sys, 'argv', ['main.py', *argv]), contextlib.redirect_stdout(printed):
+        main.main()
+    return printed.getvalue()
+
+
+def read_csv_rows(file_path: str) -> List[Dict[str, str]]:
+    with open(file_path, newline='', encoding='utf-8') as file:
+        return list(csv.DictReader(file))
+
+
+def rounded(value: Any, places: int = 6) -> Any:
+    """`value` with every float in it rounded, so results summed in a different order compare equal."""
+    if isinstance(value, float):
+        return round(value, places)
+    if isinstance(value, dict):
+        return {key: rounded(item, places) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(rounded(item, places) for item in value)
+    return value
@@ -0,0 +1,81 @@
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.cache import DatasetCache, read_table, write_table
+from core.io import iter_csv, load_csv
+from core.schema import Schema
+from core.table import Table
+from helpers import write_csv
+
+
+class CacheFileTest(unittest.TestCase):
+    """A Table written in the binary cache format reads back with the same columns and values."""
+
+    def test_round_trip(self):
+        table = Table.from_rows([
+            {'Region': 'North', 'Sales_Amount': 10.5, 'Note': None},
+            {'Region': 'Süd, "east"', 'Sales_Amount': None, 'Note': ''},
+            {'Region': 'North', 'Sales_Amount': -3.0, 'Note': 'x'},
+        ])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'table.colcache')
+            self.assertEqual(write_table(table, path), os.path.getsize(path))
+            read = read_table(path)
+        self.assertEqual(read.length, table.length)
+        self.assertEqual({col: type(column) for col, column in read.columns.items()}, {col: type(column) for col, column in table.columns.items()})
+        self.assertEqual(read.to_rows(), table.to_rows())
+        self.assertTrue(math.isnan(read.columns['Sales_Amount'].values[1]))
+
+    def test_other_file_is_rejected(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'table.colcache')
+            with open(path, 'wb') as file:
+                file.write(b'Region,Sales_Amount\n')
+            with self.assertRaises(ValueError):
+                read_table(path)
+
+
+class DatasetCacheTest(unittest.TestCase):
+    """Cached Tables are found by content: a copy hits, an edit misses, and the size limit evicts."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.dataset = os.path.join(tmp_dir.name, 'sales.csv')
+        write_csv(self.dataset, 200)
+        self.schema = Schema.infer(next(iter_csv(self.dataset, 100)))
+        self.cache = DatasetCache(os.path.join(tmp_dir.name, 'cache'))
+
+    def test_hit_matches_parse(self):
+        parsed = load_csv(self.dataset, schema=self.schema, cache=self.cache)
+        self.assertIsNotNone(self.cache.get(self.dataset, self.schema))
+        self.assertEqual(load_csv(self.dataset, schema=self.schema, cache=self.cache).to_rows(), parsed.to_rows())
+
+    def test_copy_hits_and_edit_misses(self):
+        load_csv(self.dataset, schema=self.schema, cache=self.cache)
+        copy = os.path.join(self.tmp_dir, 'copy.csv')
+        shutil.copy(self.dataset, copy)
+        self.assertIsNotNone(self.cache.get(copy, self.schema))
+        with open(copy, 'rb') as file:
+            first_record = file.readlines()[1]
+        with open(copy, 'ab') as file:
+            file.write(first_record)
+        self.assertIsNone(self.cache.get(copy, self.schema))
+
+    def test_other_types_miss(self):
+        load_csv(self.dataset, schema=self.schema, cache=self.cache)
+        self.assertIsNone(self.cache.get(self.dataset, Schema({**self.schema, 'Sales_Amount': 'string'})))
+
+    def test_size_limit(self):
+        cache = DatasetCache(self.cache.cache_dir, max_bytes=1)
+        load_csv(self.dataset, schema=self.schema, cache=cache)
+        self.assertEqual(cache._read_index(), {})
+        self.assertEqual([name for name in os.listdir(cache.cache_dir) if name.endswith('.colcache')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
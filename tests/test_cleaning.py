@@ -0,0 +1,60 @@
+import unittest
+
+from benchmarks.generate import generate_rows
+from core.schema import Schema
+from helpers import runners
+
+SCHEMA = Schema({'Sale_Date': 'date', 'Region': 'string', 'Sales_Amount': 'number'})
+
+
+class MixedDateTest(unittest.TestCase):
+    """Dates in any of the fallback formats are standardized, and any other text is kept, by every implementation."""
+
+    def test_fallback_formats(self):
+        rows = [
+            {'Sale_Date': '2023-02-03', 'Region': 'North', 'Sales_Amount': '1'},
+            {'Sale_Date': '2023/02/03', 'Region': 'North', 'Sales_Amount': '2'},
+            {'Sale_Date': '03-02-2023', 'Region': 'North', 'Sales_Amount': '3'},
+            {'Sale_Date': '03/02/2023', 'Region': 'North', 'Sales_Amount': '4'},
+            {'Sale_Date': '02/30/2023', 'Region': 'North', 'Sales_Amount': '5'},
+            {'Sale_Date': 'soon', 'Region': 'North', 'Sales_Amount': '6'},
+        ]
+        expected = ['2023-02-03', '2023-02-03', '2023-02-03', '2023-02-03', '02/30/2023', 'soon']
+        for name, runner in runners():
+            with self.subTest(runner=name):
+                output, _, _ = runner.run_pipeline({'missing_data_action': 'remove'}, [dict(row) for row in rows], SCHEMA)
+                self.assertEqual([row['Sale_Date'] for row in output], expected)
+
+    def test_generated_dataset(self):
+        rows = list(generate_rows(2000, seed=1, missing_rate=0.0, mixed_date_rate=0.2))
+        schema = Schema.infer(rows)
+        self.assertIsNone(schema.date_formats.get('Sale_Date'))
+        outputs = {}
+        for name, runner in runners():
+            with self.subTest(runner=name):
+                output, _, _ = runner.run_pipeline({'missing_data_action': 'remove'}, [dict(row) for row in rows], schema)
+                outputs[name] = [row['Sale_Date'] for row in output]
+                self.assertTrue(all(len(date) == 10 and date[4] == '-' for date in outputs[name]))
+        self.assertEqual(len(set(map(tuple, outputs.values()))), 1)
+
+
+class FillTest(unittest.TestCase):
+    """'fill' replaces a missing number with the mean of the values present, planned or not."""
+
+    def test_fill_with_mean_and_mode(self):
+        rows = [
+            {'Sale_Date': '2023-02-03', 'Region': 'North', 'Sales_Amount': '10'},
+            {'Sale_Date': '2023-02-04', 'Region': '', 'Sales_Amount': ''},
+            {'Sale_Date': '2023-02-05', 'Region': 'North', 'Sales_Amount': '30'},
+            {'Sale_Date': '2023-02-06', 'Region': 'West', 'Sales_Amount': '50'},
+        ]
+        for name, runner in runners():
+            for optimize in (True, False):
+                with self.subTest(runner=name, optimize=optimize):
+                    output, _, _ = runner.run_pipeline({'missing_data_action': 'fill'}, [dict(row) for row in rows], SCHEMA, None, optimize)
+                    self.assertEqual([row['Sales_Amount'] for row in output], [10.0, 30.0, 30.0, 50.0])
+                    self.assertEqual([row['Region'] for row in output], ['North', 'North', 'North', 'West'])
+
+
+if __name__ == '__main__':
+    unittest.main()
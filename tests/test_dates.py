@@ -0,0 +1,75 @@
+import unittest
+from datetime import datetime
+
+from core.dates import DateStandardizer, is_iso_date
+from core.schema import Schema, detect_date_format
+
+
+class CountingParser:
+    """A `(text, fmt)` date parser that records every call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, fmt):
+        self.calls.append(text)
+        try:
+            return datetime.strptime(text, fmt or '%d/%m/%Y')
+        except ValueError:
+            return None
+
+
+class DateStandardizerTest(unittest.TestCase):
+    """Each distinct raw value is parsed at most once, and ISO dates not at all."""
+
+    def test_parses_each_value_once(self):
+        parse = CountingParser()
+        standardize = DateStandardizer('%d/%m/%Y', parse)
+        values = ['03/02/2023', '04/02/2023', '03/02/2023', '03/02/2023', 'soon', 'soon']
+        self.assertEqual(list(map(standardize, values)), ['2023-02-03', '2023-02-04', '2023-02-03', '2023-02-03', 'soon', 'soon'])
+        self.assertEqual(parse.calls, ['03/02/2023', '04/02/2023', 'soon'])
+
+    def test_iso_fast_path(self):
+        parse = CountingParser()
+        standardize = DateStandardizer(None, parse)
+        self.assertEqual(standardize('2023-02-03'), '2023-02-03')
+        self.assertEqual(parse.calls, [])
+        # Not a real day, so it goes to the parser, which cannot read it either
+        self.assertEqual(standardize('2023-02-30'), '2023-02-30')
+        self.assertEqual(parse.calls, ['2023-02-30'])
+
+    def test_format_that_reads_iso_text_differently(self):
+        standardize = DateStandardizer('%Y-%d-%m', CountingParser())
+        self.assertFalse(standardize.iso_fast_path)
+        self.assertEqual(standardize('2023-03-02'), '2023-02-03')
+
+    def test_memo_size(self):
+        standardize = DateStandardizer(None, CountingParser(), max_size=2)
+        for value in ('2023-01-01', '2023-01-02', '2023-01-03'):
+            standardize(value)
+        self.assertEqual(list(standardize.memo), ['2023-01-02', '2023-01-03'])
+
+    def test_is_iso_date(self):
+        self.assertTrue(is_iso_date('2024-02-29'))
+        for text in ('2023-02-29', '2023-2-03', '2023/02/03', '２０２３-02-03', '2023-02-03 10:00'):
+            with self.subTest(text=text):
+                self.assertFalse(is_iso_date(text))
+
+
+class DateFormatDetectionTest(unittest.TestCase):
+    """A column's format is the first one that reads every sample, or None when they are mixed."""
+
+    def test_detect(self):
+        self.assertEqual(detect_date_format(['2023-02-03', '2023-12-31 10:00']), '%Y-%m-%d')
+        self.assertEqual(detect_date_format(['03/02/2023', '25/12/2023']), '%d/%m/%Y')
+        self.assertEqual(detect_date_format(['02/03/2023', '12/25/2023']), '%m/%d/%Y')
+        self.assertIsNone(detect_date_format(['2023-02-03', '03/02/2023']))
+
+    def test_schema_records_formats(self):
+        schema = Schema.infer([{'Sale_Date': '25-12-2023', 'Amount': '1'}, {'Sale_Date': '01-01-2024', 'Amount': '2'}])
+        self.assertEqual(schema['Sale_Date'], 'date')
+        self.assertEqual(schema.date_formats, {'Sale_Date': '%d-%m-%Y'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import math
+import unittest
+
+from core.config import validate_config
+from core.expressions import check_expression, compile_filter, filter_expression, parse_expression
+from core.schema import Schema
+from helpers import runners
+
+SCHEMA = Schema({'Region': 'string', 'Sales_Amount': 'number'})
+ROWS = [
+    {'Region': 'North', 'Sales_Amount': '1500.0'},
+    {'Region': 'South', 'Sales_Amount': '250.5'},
+    {'Region': 'West', 'Sales_Amount': '4000'},
+]
+
+
+class NonFiniteLiteralTest(unittest.TestCase):
+    """Filters on inf and nan, which have no Python literal form, must compile and run."""
+
+    def _matches(self, filter_config):
+        predicate = compile_filter(check_expression(filter_expression(filter_config), SCHEMA), SCHEMA)
+        return [row['Region'] for row in ROWS if predicate(row)]
+
+    def test_filter_condition(self):
+        # --filter COLUMN OPERATOR VALUE
+        self.assertEqual(self._matches({'apply': True, 'column': 'Sales_Amount', 'operator': '>', 'value': 'inf'}), [])
+        self.assertEqual(self._matches({'apply': True, 'column': 'Sales_Amount', 'operator': '<', 'value': 'inf'}), ['North', 'South', 'West'])
+        self.assertEqual(self._matches({'apply': True, 'column': 'Sales_Amount', 'operator': '==', 'value': 'nan'}), [])
+
+    def test_where_expression(self):
+        # --where EXPRESSION
+        self.assertEqual(self._matches({'apply': True, 'expression': "Sales_Amount > 1e400"}), [])
+        self.assertEqual(self._matches({'apply': True, 'expression': "Sales_Amount < 1e400 and Region != 'south'"}), ['North', 'West'])
+        self.assertEqual(self._matches({'apply': True, 'expression': "Sales_Amount between 1000 and 1e400"}), ['North', 'West'])
+        self.assertEqual(self._matches({'apply': True, 'expression': "Sales_Amount in (250.5, 1e400)"}), ['South'])
+
+    def test_pipelines(self):
+        configs = [
+            ({'filter': {'column': 'Sales_Amount', 'operator': '<', 'value': 'inf'}}, 3),
+            ({'filter': {'column': 'Sales_Amount', 'operator': '>', 'value': float('inf')}}, 0),
+            ({'filter': "Sales_Amount < 1e400 and Sales_Amount > 1000"}, 2),
+        ]
+        for name, runner in runners():
+            for config, expected in configs:
+                with self.subTest(runner=name, config=config):
+                    output, _, _ = runner.run_pipeline(validate_config(config, SCHEMA), [dict(row) for row in ROWS], SCHEMA)
+                    self.assertEqual(len(output), expected)
+                    self.assertTrue(all(math.isfinite(row['Sales_Amount']) for row in output))
+
+
+class ContainsTest(unittest.TestCase):
+    """`contains` searches the text of string columns; number columns are compared, not searched."""
+
+    def test_number_column_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "'contains' for number column 'Sales_Amount'"):
+            check_expression(parse_expression("Sales_Amount contains 30"), SCHEMA)
+        with self.assertRaisesRegex(ValueError, "Invalid operator"):
+            validate_config({'filter': "Region = 'North' or Sales_Amount contains '30'"}, SCHEMA)
+        with self.assertRaisesRegex(ValueError, "Invalid operator"):
+            validate_config({'filter': {'column': 'Sales_Amount', 'operator': 'contains', 'value': '30'}}, SCHEMA)
+
+    def test_string_column_keeps_the_literal(self):
+        expression = check_expression(parse_expression("Region contains 'TH'"), SCHEMA)
+        self.assertEqual(expression.values, ('TH',))
+        predicate = compile_filter(expression, SCHEMA)
+        self.assertEqual([row['Region'] for row in ROWS if predicate(row)], ['North', 'South'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from core.groupby import GroupBy, parse_aggregate, parse_key
+from core.schema import Schema
+from helpers import rounded, runners
+
+AGGREGATES = ['count', 'count:Region', 'sum:Sales_Amount', 'mean:Sales_Amount', 'min:Sales_Amount', 'max:Sales_Amount', 'count_distinct:Region', 'median:Sales_Amount']
+ROWS = [
+    {'Sale_Date': '2023-01-05', 'Region': 'North', 'Sales_Amount': 100.0},
+    {'Sale_Date': '2023-01-20', 'Region': 'West', 'Sales_Amount': 300.0},
+    {'Sale_Date': '2023-01-28', 'Region': 'North', 'Sales_Amount': 'n/a'},
+    {'Sale_Date': '2023-02-11', 'Region': '', 'Sales_Amount': 50.0},
+    {'Sale_Date': '2023-02-12', 'Region': 'North', 'Sales_Amount': 250.0},
+]
+EXPECTED = {
+    ('2023-01',): {
+        'count': 3, 'count(Region)': 3, 'sum(Sales_Amount)': 400.0, 'mean(Sales_Amount)': 200.0,
+        'min(Sales_Amount)': 100.0, 'max(Sales_Amount)': 300.0, 'count_distinct(Region)': 2, 'median(Sales_Amount)': 200.0,
+    },
+    ('2023-02',): {
+        'count': 2, 'count(Region)': 1, 'sum(Sales_Amount)': 300.0, 'mean(Sales_Amount)': 150.0,
+        'min(Sales_Amount)': 50.0, 'max(Sales_Amount)': 250.0, 'count_distinct(Region)': 1, 'median(Sales_Amount)': 150.0,
+    },
+}
+
+
+class GroupByTest(unittest.TestCase):
+    """Every aggregate of every group in one pass; missing and non-numeric values are skipped."""
+
+    def test_result(self):
+        self.assertEqual(GroupBy(['Sale_Date:month'], AGGREGATES).update(ROWS).result(), EXPECTED)
+
+    def test_merge_of_any_split(self):
+        for split in range(len(ROWS) + 1):
+            with self.subTest(split=split):
+                left = GroupBy(['Sale_Date:month'], AGGREGATES).update(ROWS[:split])
+                right = GroupBy(['Sale_Date:month'], AGGREGATES).update(ROWS[split:])
+                self.assertEqual(left.merge(right).result(), EXPECTED)
+
+    def test_several_keys(self):
+        result = GroupBy(['Region', 'Sale_Date:month'], ['count']).update(ROWS).result()
+        self.assertEqual(result, {
+            ('North', '2023-01'): {'count': 2}, ('West', '2023-01'): {'count': 1},
+            ('', '2023-02'): {'count': 1}, ('North', '2023-02'): {'count': 1},
+        })
+
+    def test_invalid_specs(self):
+        for parse, spec in ((parse_key, 'Region:year'), (parse_aggregate, 'sum'), (parse_aggregate, 'mode:Region')):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    parse(spec)
+
+
+class GroupByPipelineTest(unittest.TestCase):
+    """Every implementation aggregates a config's group-by the same way."""
+
+    def test_implementations_agree(self):
+        schema = Schema({'Sale_Date': 'date', 'Region': 'string', 'Sales_Amount': 'number'}, {'Sale_Date': '%Y-%m-%d'})
+        rows = [{col: str(value) for col, value in row.items()} for row in ROWS if row['Region'] and row['Sales_Amount'] != 'n/a']
+        config = {'missing_data_action': 'remove', 'group_by': {'keys': ['Region'], 'aggregates': AGGREGATES}}
+        expected = GroupBy(['Region'], AGGREGATES).update(ROWS[:2] + ROWS[4:]).result()
+        for name, runner in runners():
+            with self.subTest(runner=name):
+                _, _, aggregation = runner.run_pipeline(dict(config), [dict(row) for row in rows], schema)
+                self.assertEqual(rounded(aggregation), rounded(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
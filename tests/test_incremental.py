@@ -0,0 +1,114 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from core.groupby import GroupBy
+from core.incremental import PipelineState, complete_end, iter_appended, load_state, save_state, state_key
+from core.io import iter_csv
+from core.quantiles import QuantileSketch
+from core.schema import Schema
+from helpers import rounded, runners, write_csv
+
+CONFIG = {
+    'missing_data_action': 'remove',
+    'filter': {'apply': False},
+    'compute': 'Profit',
+    'group_by': {'keys': ['Region'], 'aggregates': ['count', 'sum:Sales_Amount', 'median:Sales_Amount', 'count_distinct:Product_ID']},
+}
+
+
+class IncrementalStateTest(unittest.TestCase):
+    """A run resumed from a saved state covers the same rows as one run over the whole file."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.dataset = os.path.join(tmp_dir.name, 'sales.csv')
+        self.state_path = os.path.join(tmp_dir.name, '.pipeline_cache', 'sales.csv.state')
+        write_csv(self.dataset, 300)
+        with open(self.dataset, 'rb') as file:
+            self.lines = file.read().splitlines(keepends=True)
+        self.schema = Schema.infer(next(iter_csv(self.dataset, 100)))
+
+    def _write(self, num_rows: int) -> None:
+        with open(self.dataset, 'wb') as file:
+            file.write(b''.join(self.lines[:num_rows + 1]))
+
+    def _run(self, runner, state):
+        start, end = state.offset, complete_end(self.dataset)
+        result = runner.run_pipeline_stream(CONFIG, lambda: iter_appended(self.dataset, start, end, 64), None, self.schema, state=state)
+        state.offset = end
+        return result
+
+    def test_resumed_run_matches_whole_file(self):
+        for name, runner in runners():
+            with self.subTest(runner=name):
+                whole = runner.run_pipeline_stream(CONFIG, lambda: iter_csv(self.dataset, 64), None, self.schema)
+
+                key = state_key(CONFIG, self.schema, name)
+                self._write(200)
+                state = PipelineState(key)
+                self._run(runner, state)
+                save_state(self.state_path, self.dataset, state)
+
+                self._write(300)
+                resumed = load_state(self.state_path, self.dataset, key)
+                self.assertIsNotNone(resumed)
+                self.assertEqual(rounded(self._run(runner, resumed)), rounded(whole))
+
+    def test_state_is_plain_json(self):
+        _, runner = next(runners())
+        state = PipelineState('key')
+        self._run(runner, state)
+        save_state(self.state_path, self.dataset, state)
+        with open(self.state_path, encoding='utf-8') as file:
+            self.assertEqual(json.load(file)['offset'], os.path.getsize(self.dataset))
+
+    def test_unreadable_state_is_ignored(self):
+        os.makedirs(os.path.dirname(self.state_path))
+        with open(self.state_path, 'wb') as file:
+            file.write(b'\x80\x05not a state')
+        self.assertIsNone(load_state(self.state_path, self.dataset, 'key'))
+
+    def test_rewritten_prefix_is_not_resumed(self):
+        _, runner = next(runners())
+        self._write(200)
+        state = PipelineState('key')
+        self._run(runner, state)
+        save_state(self.state_path, self.dataset, state)
+
+        # Appended to, but with one byte of a record in the middle changed too
+        self._write(300)
+        with open(self.dataset, 'r+b') as file:
+            file.seek(len(b''.join(self.lines[:100])))
+            byte = file.read(1)
+            file.seek(len(b''.join(self.lines[:100])))
+            file.write(b'9' if byte != b'9' else b'8')
+        self.assertIsNone(load_state(self.state_path, self.dataset, 'key'))
+
+
+class PlainDataTest(unittest.TestCase):
+    """Partial results read back from JSON carry on exactly as the originals do."""
+
+    def test_sketch_past_exact_limit(self):
+        rng = random.Random(21)
+        values = [rng.random() for _ in range(2000)]
+        sketch = QuantileSketch(k=50, exact_limit=100).extend(values[:1000])
+        restored = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        for value in values[1000:]:
+            sketch.update(value)
+            restored.update(value)
+        self.assertEqual(restored._levels, sketch._levels)
+        self.assertEqual(restored.quantiles([0.1, 0.5, 0.9]), sketch.quantiles([0.1, 0.5, 0.9]))
+
+    def test_group_by(self):
+        rows = [{'Region': region, 'Product_ID': str(i % 7), 'Sales_Amount': float(i)} for i, region in enumerate(['North', 'West', None] * 20)]
+        group = GroupBy(['Region'], ['count', 'mean:Sales_Amount', 'min:Sales_Amount', 'count_distinct:Product_ID', 'median:Sales_Amount'])
+        restored = GroupBy.from_dict(json.loads(json.dumps(group.update(rows[:30]).to_dict())))
+        self.assertEqual(restored.update(rows[30:]).result(), group.update(rows[30:]).result())
+
+
+if __name__ == '__main__':
+    unittest.main()
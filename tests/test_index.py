@@ -0,0 +1,44 @@
+import unittest
+
+from benchmarks.generate import generate_rows
+from core.index import DatasetIndex
+from core.schema import Schema
+from core.table import Table
+from helpers import rounded, runners
+
+EXPRESSIONS = [
+    "Sales_Amount > 3000",
+    "Sales_Amount between 1000 and 2000 or Quantity_Sold <= 5",
+    "Region == 'north' and not Sales_Channel == 'Online'",
+    "Region in ('East', 'West') and Sale_Date >= '2023-06-01'",
+    "Sales_Rep contains 'o' and Discount != 0.1",
+]
+
+
+class DatasetIndexTest(unittest.TestCase):
+    """Filters answered from one index, query after query, select the rows a full scan does."""
+
+    def setUp(self):
+        self.rows = list(generate_rows(300, seed=7, missing_rate=0.05))
+        self.schema = Schema.infer(self.rows)
+
+    def test_matches_full_scan(self):
+        for name, runner in runners():
+            for action in ('remove', 'fill'):
+                for dataset in ([dict(row) for row in self.rows], Table.from_batches([[dict(row) for row in self.rows]], self.schema)):
+                    index = DatasetIndex(dataset, self.schema)
+                    for expression in EXPRESSIONS:
+                        with self.subTest(runner=name, missing=action, table=isinstance(dataset, Table), where=expression):
+                            config = {'missing_data_action': action, 'filter': {'apply': True, 'expression': expression}}
+                            scanned, report, _ = runner.run_pipeline(dict(config), [dict(row) for row in self.rows], self.schema)
+                            indexed, indexed_report, _ = runner.run_pipeline(dict(config), dataset, self.schema, None, True, index)
+                            self.assertGreater(len(scanned), 0)
+                            self.assertLess(len(scanned), len(self.rows))
+                            self.assertEqual(rounded([dict(row) for row in indexed]), rounded([dict(row) for row in scanned]))
+                            self.assertEqual(rounded(indexed_report), rounded(report))
+                    # The filters were answered from the index
+                    self.assertIn('Sales_Amount', index.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
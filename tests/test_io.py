@@ -0,0 +1,108 @@
+import contextlib
+import csv
+import importlib
+import io
+import math
+import os
+import tempfile
+import unittest
+
+from core.io import COMPRESSIONS, CsvBatchWriter, table_lines
+from core.table import Table
+
+
+class TableLinesTest(unittest.TestCase):
+    """A Table formatted a column at a time gives the lines csv.DictWriter writes for its rows."""
+
+    def test_matches_dict_writer(self):
+        rows = [
+            {'Region': 'North', 'Note': 'plain', 'Sales_Amount': 1500.0, 'Discount': 0.1},
+            {'Region': 'South, East', 'Note': 'say "hi"', 'Sales_Amount': None, 'Discount': math.inf},
+            {'Region': '', 'Note': 'two\nlines', 'Sales_Amount': 1e-7, 'Discount': 3},
+            {'Region': None, 'Note': 'carriage\rreturn', 'Sales_Amount': -0.0, 'Discount': 2.5},
+        ]
+        table = Table.from_rows(rows)
+        fieldnames = ['Note', 'Region', 'Missing', 'Sales_Amount', 'Discount']
+
+        expected = io.StringIO()
+        writer = csv.DictWriter(expected, fieldnames=fieldnames)
+        writer.writerows(table.to_rows())
+        self.assertEqual(''.join(line + '\r\n' for line in table_lines(table, fieldnames)), expected.getvalue())
+
+
+ROWS = [
+    {'Sale_Date': '2023-01-05', 'Region': 'North', 'Sales_Amount': 100.0},
+    {'Sale_Date': '2023-01-20', 'Region': 'West', 'Sales_Amount': 200.0},
+    {'Sale_Date': '2023-02-11', 'Region': None, 'Sales_Amount': 300.0},
+    {'Sale_Date': '2023-02-12', 'Region': 'North', 'Sales_Amount': 400.0},
+]
+
+
+class CsvBatchWriterTest(unittest.TestCase):
+    """Batches written through small buffers, compressed, partitioned or appended read back as the rows written."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+
+    def _write(self, path, batches, **options):
+        # The writer reports where it saved
+        with contextlib.redirect_stdout(io.StringIO()), CsvBatchWriter(path, buffer_size=16, **options) as writer:
+            for batch in batches:
+                writer.write(batch)
+        return writer
+
+    def _read(self, path, compression=None):
+        module = importlib.import_module(COMPRESSIONS[compression][0]) if compression else io
+        with module.open(path, 'rt', newline='', encoding='utf-8') as file:
+            return list(csv.DictReader(file))
+
+    def _expected(self, rows):
+        return [{col: '' if value is None else str(value) for col, value in row.items()} for row in rows]
+
+    def test_rows_and_tables(self):
+        for as_table in (False, True):
+            with self.subTest(table=as_table):
+                path = os.path.join(self.tmp_dir, f'out_{as_table}.csv')
+                batches = [ROWS[:3], ROWS[3:]]
+                if as_table:
+                    batches = [Table.from_rows(batch) for batch in batches]
+                self.assertEqual(self._write(path, batches).rows_written, len(ROWS))
+                self.assertEqual(self._read(path), self._expected(ROWS))
+
+    def test_compression(self):
+        for compression, (_, suffix, _) in COMPRESSIONS.items():
+            with self.subTest(compression=compression):
+                path = os.path.join(self.tmp_dir, f'out.csv{suffix}')
+                self._write(path, [ROWS[:2], ROWS[2:]], compression=compression)
+                self.assertEqual(self._read(path, compression), self._expected(ROWS))
+
+    def test_append_keeps_one_header(self):
+        for compression in (None, 'gzip'):
+            with self.subTest(compression=compression):
+                path = os.path.join(self.tmp_dir, f'append_{compression}.csv')
+                self._write(path, [ROWS[:1]], compression=compression)
+                self._write(path, [ROWS[1:3]], compression=compression, append=True)
+                self._write(path, [Table.from_rows(ROWS[3:])], compression=compression, append=True)
+                self.assertEqual(self._read(path, compression), self._expected(ROWS))
+
+    def test_partitions(self):
+        for spec, files in (
+            ('Region', {'Region=North.csv': [0, 3], 'Region=West.csv': [1], 'Region=__missing__.csv': [2]}),
+            ('Sale_Date:month', {'Sale_Date=2023-01.csv': [0, 1], 'Sale_Date=2023-02.csv': [2, 3]}),
+        ):
+            for as_table in (False, True):
+                with self.subTest(partition_by=spec, table=as_table):
+                    path = os.path.join(self.tmp_dir, f'{spec.replace(":", "_")}_{as_table}')
+                    batches = [ROWS[:2], ROWS[2:]]
+                    if as_table:
+                        batches = [Table.from_rows(batch) for batch in batches]
+                    self._write(path, batches, partition_by=spec)
+                    self.assertEqual(sorted(os.listdir(path)), sorted(files))
+                    for name, indices in files.items():
+                        self.assertEqual(self._read(os.path.join(path, name)), self._expected([ROWS[i] for i in indices]))
+
+
+if __name__ == '__main__':
+    unittest.main()
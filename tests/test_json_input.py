@@ -0,0 +1,71 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from core.io import iter_json, iter_json_array, iter_ndjson
+
+RECORDS = [
+    {'Region': 'North', 'Sales_Amount': 1234.5, 'Quantity_Sold': 12},
+    {'Region': 'Süd "west", \\ [1]', 'Sales_Amount': -0.25e3, 'Quantity_Sold': None},
+    {'Region': '', 'Sales_Amount': 7, 'Tags': [1, [2, {'a': '}'}], True]},
+]
+
+
+class JsonArrayTest(unittest.TestCase):
+    """A JSON array decodes the same however its text is split into chunks."""
+
+    def test_every_chunk_size(self):
+        text = ' [\n ' + ' ,\n '.join(json.dumps(record, ensure_ascii=False) for record in RECORDS) + ' ]\n'
+        for chunk_size in range(1, len(text) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(iter_json_array(io.StringIO(text), chunk_size)), RECORDS)
+
+    def test_number_at_chunk_end(self):
+        # A chunk ending in '12' must not decode as 1
+        self.assertEqual(list(iter_json_array(io.StringIO('[1, 12345, 6]'), 5)), [1, 12345, 6])
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array(io.StringIO(' [ ] '), 1)), [])
+
+    def test_malformed(self):
+        for text in ('{"a": 1}', '[1, 2', '[1 2]', '[1] 2'):
+            with self.subTest(text=text):
+                with self.assertRaises(json.JSONDecodeError):
+                    list(iter_json_array(io.StringIO(text), 2))
+
+    def test_records_before_an_error_are_yielded(self):
+        records = iter_json_array(io.StringIO('[{"a": 1}, {"a": 2}, oops]'), 4)
+        self.assertEqual([next(records), next(records)], [{'a': 1}, {'a': 2}])
+        with self.assertRaises(json.JSONDecodeError):
+            next(records)
+
+
+class JsonFileTest(unittest.TestCase):
+    """JSON array and NDJSON files are read in batches of the requested size."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        return path
+
+    def test_json_batches(self):
+        path = self._write('sales.json', json.dumps(RECORDS))
+        self.assertEqual([len(batch) for batch in iter_json(path, 2)], [2, 1])
+        self.assertEqual([record for batch in iter_json(path, 2) for record in batch], RECORDS)
+
+    def test_ndjson_batches_skip_blank_lines(self):
+        path = self._write('sales.ndjson', '\n'.join(json.dumps(record) for record in RECORDS[:2]) + '\n\n' + json.dumps(RECORDS[2]) + '\n')
+        self.assertEqual([len(batch) for batch in iter_ndjson(path, 2)], [2, 1])
+        self.assertEqual([record for batch in iter_ndjson(path, 2) for record in batch], RECORDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
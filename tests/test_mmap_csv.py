@@ -0,0 +1,61 @@
+import csv
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from core import mmap_csv
+from core.io import iter_csv
+from core.table import DictColumn, NumberColumn
+
+COL_TYPES = {'Amount': 'number', 'Note': 'string'}
+
+
+class ReadCsvTest(unittest.TestCase):
+    """A file reads the same whether it is parsed as one range or many, by one process or several."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'data.csv')
+
+    def _write(self, rows):
+        with open(self.path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=list(COL_TYPES))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def test_column_storage_does_not_depend_on_workers(self):
+        rows = [{'Amount': str(i), 'Note': 'x'} for i in range(300)]
+        # Only the last range holds text in the number column
+        rows[290]['Amount'] = 'n/a'
+        self._write(rows)
+        for workers in (1, 3):
+            with self.subTest(workers=workers):
+                table = mmap_csv.read_csv(self.path, COL_TYPES, columnar=True, workers=workers)
+                self.assertIsInstance(table.columns['Amount'], DictColumn)
+                self.assertEqual(list(table.columns['Amount']), [row['Amount'] for row in rows])
+
+    def test_numbers_stay_numbers(self):
+        rows = [{'Amount': '' if i % 7 == 0 else f"{i}.5", 'Note': 'x'} for i in range(300)]
+        self._write(rows)
+        for workers in (1, 3):
+            with self.subTest(workers=workers):
+                table = mmap_csv.read_csv(self.path, COL_TYPES, columnar=True, workers=workers)
+                self.assertIsInstance(table.columns['Amount'], NumberColumn)
+                self.assertEqual(list(table.columns['Amount']), [float(row['Amount']) if row['Amount'] else None for row in rows])
+
+    def test_ranges_split_at_record_boundaries(self):
+        rows = [{'Amount': str(i), 'Note': f'line {i}\nwith "quotes", and commas' if i % 3 == 0 else 'plain'} for i in range(500)]
+        self._write(rows)
+        expected = [row for batch in iter_csv(self.path) for row in batch]
+        # Ranges of a few records each, most of them starting inside a quoted note
+        with mock.patch.object(mmap_csv, 'RANGE_BYTES', 256):
+            loaded = mmap_csv.read_csv(self.path, COL_TYPES)
+            table = mmap_csv.read_csv(self.path, COL_TYPES, columnar=True, workers=1)
+        self.assertEqual([dict(row) for row in loaded], expected)
+        self.assertEqual(list(table.columns['Note']), [row['Note'] for row in rows])
+
+
+if __name__ == '__main__':
+    unittest.main()
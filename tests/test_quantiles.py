@@ -0,0 +1,53 @@
+import bisect
+import random
+import statistics
+import unittest
+
+from core.quantiles import QuantileSketch, percentile_report
+
+QS = (0.01, 0.1, 0.5, 0.9, 0.99)
+
+
+class QuantileSketchTest(unittest.TestCase):
+    """Quantiles are exact up to the exact limit and within the reported rank error past it."""
+
+    def setUp(self):
+        rng = random.Random(5)
+        self.values = [rng.lognormvariate(8, 1) for _ in range(20000)]
+        self.ordered = sorted(self.values)
+
+    def assertWithinRankError(self, sketch):
+        self.assertFalse(sketch.is_exact)
+        error = sketch.rank_error()
+        for q, value in zip(QS, sketch.quantiles(QS)):
+            rank = bisect.bisect_left(self.ordered, value) / len(self.ordered)
+            self.assertLessEqual(abs(rank - q), error, f"q={q}")
+
+    def test_exact_below_limit(self):
+        sketch = QuantileSketch().extend(self.values[:1001])
+        self.assertTrue(sketch.is_exact)
+        self.assertEqual(sketch.rank_error(), 0.0)
+        self.assertEqual(sketch.quantile(0.5), statistics.median(self.values[:1001]))
+        self.assertEqual(QuantileSketch().extend([1.0, 2.0, 3.0, 4.0]).quantile(0.5), 2.5)
+
+    def test_sketch_error_bound(self):
+        sketch = QuantileSketch(exact_limit=1000)
+        for value in self.values:
+            sketch.update(value)
+        self.assertWithinRankError(sketch)
+        retained = sum(len(level) for level in sketch._levels)
+        self.assertLess(retained, len(self.values) // 5)
+
+    def test_merged_sketches_error_bound(self):
+        merged = QuantileSketch(exact_limit=1000)
+        for start in range(0, len(self.values), 3000):
+            merged.merge(QuantileSketch(exact_limit=1000).extend(self.values[start:start + 3000]))
+        self.assertEqual(merged.count, len(self.values))
+        self.assertWithinRankError(merged)
+
+    def test_empty(self):
+        self.assertEqual(percentile_report(QuantileSketch()), {'p50': None, 'p90': None, 'p99': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
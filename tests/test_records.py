@@ -0,0 +1,68 @@
+import copy
+import pickle
+import unittest
+
+from core.records import POOL_LIMIT, Header, Record, make_records, new_pools
+
+
+class RecordTest(unittest.TestCase):
+    """A record behaves like the dict with the same items."""
+
+    def setUp(self):
+        self.record = Record(Header(['Region', 'Sales_Amount']), ['North', '100'])
+
+    def test_equals_dict(self):
+        self.assertEqual(self.record, {'Region': 'North', 'Sales_Amount': '100'})
+        self.assertEqual(self.record, Record(Header(['Region', 'Sales_Amount']), ['North', '100']))
+        self.assertNotEqual(self.record, {'Region': 'North', 'Sales_Amount': '200'})
+        self.assertNotEqual(self.record, {'Sales_Amount': '100'})
+        self.assertEqual(dict(self.record), self.record.to_dict())
+
+    def test_writes_and_deletes(self):
+        expected = {'Region': 'North', 'Sales_Amount': '100'}
+        for key, value in (('Sales_Amount', 100.0), ('Profit', 25.0), ('Region', None)):
+            self.record[key] = expected[key] = value
+        del self.record['Sales_Amount']
+        del expected['Sales_Amount']
+        self.assertEqual(self.record, expected)
+        self.assertEqual(list(self.record), list(expected))
+        self.assertEqual(self.record.get('Sales_Amount', 'gone'), 'gone')
+        with self.assertRaises(KeyError):
+            self.record['Sales_Amount']
+
+    def test_copies_are_independent(self):
+        for duplicate in (self.record.copy(), copy.deepcopy(self.record), pickle.loads(pickle.dumps(self.record))):
+            duplicate['Region'] = 'West'
+            self.assertEqual(self.record['Region'], 'North')
+            self.assertEqual(duplicate, {'Region': 'West', 'Sales_Amount': '100'})
+
+    def test_shared_headers(self):
+        header = Header(['Region'])
+        first, second = Record(header, ['North']), Record(header, ['West'])
+        first['Profit'] = 1.0
+        second['Profit'] = 2.0
+        self.assertIs(first._header, second._header)
+
+
+class InterningTest(unittest.TestCase):
+    """Repeated values are stored once per column, while the pools stay bounded."""
+
+    def test_repeated_values_are_shared(self):
+        pools = new_pools(2)
+        parts = [[['North', ''.join(['1', '0'])], ['North', '20']], [[''.join(['Nor', 'th']), '10']]]
+        rows = [row for part in parts for row in make_records(['Region', 'Sales_Amount'], part, pools)]
+        self.assertEqual([row['Region'] for row in rows], ['North'] * 3)
+        self.assertIs(rows[0]['Region'], rows[2]['Region'])
+        self.assertIs(rows[0]['Sales_Amount'], rows[2]['Sales_Amount'])
+
+    def test_pools_are_bounded(self):
+        pools = new_pools(1)
+        rows = make_records(['Product_ID'], ([str(i)] for i in range(40_000)), pools)
+        self.assertEqual([row['Product_ID'] for row in rows[-3:]], ['39997', '39998', '39999'])
+        # A unique-valued column's pool outgrows the limit and is cleared as rows go by
+        self.assertGreater(len(rows), POOL_LIMIT)
+        self.assertLess(len(pools[0]), len(rows) // 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+
+from benchmarks.scaling import time_sizes
+
+# Ten times the rows; a quadratic stage would take about ten times as long per row
+SIZES = [2_000, 20_000]
+# Looser than the benchmark's 2x: small runs are noisy, and a quadratic step is still far beyond it
+MAX_RATIO = 3.0
+
+
+class ScalingTest(unittest.TestCase):
+    """The functional pipeline's time per row stays about level as the row count grows."""
+
+    def test_time_per_row_is_flat(self):
+        # The faster of two runs, so a stall on a busy machine does not fail the test
+        seconds = [time_sizes(SIZES, 'functional') for _ in range(2)]
+        per_row = {size: min(run[size] for run in seconds) / size for size in SIZES}
+        ratio = per_row[SIZES[-1]] / per_row[SIZES[0]]
+        self.assertLess(ratio, MAX_RATIO, f"time per row grew {ratio:.2f}x from {SIZES[0]:,} to {SIZES[-1]:,} rows")
+
+
+if __name__ == '__main__':
+    unittest.main()
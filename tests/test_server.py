@@ -0,0 +1,95 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import validate_config
+from core.io import load_csv
+from helpers import read_csv_rows, rounded, runners, write_csv
+from main import load_schema
+from server import DatasetStore, PipelineHTTPServer, _jsonable_aggregation, run_query
+
+CONFIG = {
+    'filter': "Region in ('North', 'West') and Sales_Amount > 1000",
+    'compute': 'Profit',
+    'group_by': {'keys': ['Region'], 'aggregates': ['count', 'mean:Profit', 'median:Sales_Amount']},
+}
+
+
+class ServerTest(unittest.TestCase):
+    """Queries on a resident dataset answer what a run over the freshly loaded file does."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.dataset = os.path.join(tmp_dir.name, 'sales.csv')
+        write_csv(self.dataset, 300)
+        self.store = DatasetStore()
+
+    def _expected(self, runner, config):
+        schema = load_schema(self.dataset, None)
+        output, report, aggregation = runner.run_pipeline(validate_config(config, schema), load_csv(self.dataset, columnar=True, schema=schema), schema)
+        return output, {'rows': len(output), 'analysis': report, 'aggregation': _jsonable_aggregation(aggregation)}
+
+    def test_queries_match_a_fresh_run(self):
+        for name, runner in runners():
+            impl = name.split('_')[0]
+            for config in (CONFIG, {**CONFIG, 'missing_data_action': 'fill'}):
+                with self.subTest(impl=impl, missing=config.get('missing_data_action', 'remove')):
+                    _, expected = self._expected(runner, config)
+                    # The second query runs on the cleaned rows and index the first one left
+                    for _ in range(2):
+                        result = run_query(self.store, {'dataset': self.dataset, 'impl': impl, 'config': config})
+                        self.assertEqual(rounded({key: result[key] for key in expected}), rounded(expected))
+        self.assertEqual(len(self.store.describe()), 1)
+
+    def test_concurrent_saves(self):
+        name, runner = next(runners())
+        config = {**CONFIG, 'output': 'Save to CSV'}
+        output, _ = self._expected(runner, config)
+        request = {'dataset': self.dataset, 'impl': name.split('_')[0], 'config': config}
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: run_query(self.store, request), range(16)))
+
+        output_path = results[0]['output_path']
+        self.assertEqual({result['output_path'] for result in results}, {output_path})
+        # One whole copy of the output, with no rows of another save mixed in
+        saved = read_csv_rows(output_path)
+        self.assertEqual(len(saved), len(output))
+        self.assertEqual([row['Product_ID'] for row in saved], [str(row['Product_ID']) for row in output])
+
+    def test_http(self):
+        # The server logs every request
+        self.enterContext(contextlib.redirect_stderr(io.StringIO()))
+        server = PipelineHTTPServer(('127.0.0.1', 0), self.store, workers=2)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_port}"
+
+        def post(body):
+            request = urllib.request.Request(url + '/query', json.dumps(body).encode('utf-8'), {'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request) as response:
+                    return response.status, json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                return e.code, json.loads(e.read())
+
+        status, result = post({'dataset': self.dataset, 'config': CONFIG})
+        self.assertEqual(status, 200)
+        self.assertEqual(result['rows'], self._expected(next(runners())[1], CONFIG)[1]['rows'])
+        self.assertEqual(post({'dataset': self.dataset, 'config': {'compute': 'Nope'}})[0], 400)
+        self.assertEqual(post({'dataset': self.dataset + '.missing.csv'})[0], 404)
+        with urllib.request.urlopen(url + '/datasets') as response:
+            self.assertEqual([dataset['path'] for dataset in json.loads(response.read())], [self.dataset])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import random
+import unittest
+from collections import Counter
+
+from core.schema import Schema
+from core.sketches import HyperLogLog, StringSketch, TopK
+from helpers import runners
+
+SCHEMA = Schema({'Sale_Date': 'date', 'Region': 'string', 'Sales_Amount': 'number'}, {'Sale_Date': '%Y-%m-%d'})
+ROWS = [
+    {'Sale_Date': '2023-01-05', 'Region': 'North', 'Sales_Amount': '100'},
+    {'Sale_Date': '2023-01-05', 'Region': 'North', 'Sales_Amount': '200'},
+    {'Sale_Date': '2023-02-11', 'Region': 'West', 'Sales_Amount': '300'},
+]
+
+
+class StringColumnSketchTest(unittest.TestCase):
+    """Only columns the schema types as 'string' get distinct counts and top values."""
+
+    def test_report_covers_string_columns_only(self):
+        for name, runner in runners():
+            with self.subTest(runner=name):
+                _, report, _ = runner.run_pipeline({'missing_data_action': 'remove'}, [dict(row) for row in ROWS], SCHEMA)
+                self.assertEqual(report['distinct'], {'Region': 2})
+                self.assertEqual(report['top_values'], {'Region': [('North', 2, 0), ('West', 1, 0)]})
+
+
+class HyperLogLogTest(unittest.TestCase):
+    """Distinct counts stay within a few standard errors, merged across chunks or not."""
+
+    def test_error_bound(self):
+        for count in (10, 1000, 50_000):
+            with self.subTest(count=count):
+                sketch = HyperLogLog().update(f"customer-{i}" for i in range(count))
+                self.assertLessEqual(abs(sketch.estimate() - count), 3 * sketch.relative_error() * count + 1)
+
+    def test_merge_equals_one_sketch(self):
+        values = [f"customer-{i}" for i in range(20_000)]
+        merged = HyperLogLog().update(values[:5000]).merge(HyperLogLog().update(values[3000:]))
+        self.assertEqual(merged.registers, HyperLogLog().update(values).registers)
+
+    def test_repeats_change_nothing(self):
+        self.assertEqual(HyperLogLog().update(['a', 'b', 'a', 'a']).registers, HyperLogLog().update(['a', 'b']).registers)
+
+    def test_precisions_do_not_merge(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+
+class TopKTest(unittest.TestCase):
+    """Counts are exact within capacity and bracket the true counts past it."""
+
+    def setUp(self):
+        rng = random.Random(6)
+        # A few heavy values over a long tail of rare ones
+        self.values = [f"v{min(int(rng.paretovariate(1.2)), 5000)}" for _ in range(20_000)]
+        self.true_counts = Counter(self.values)
+
+    def test_exact_within_capacity(self):
+        summary = TopK(capacity=4).update({'a': 3, 'b': 1}).update({'b': 1, 'c': 5})
+        self.assertEqual(summary.top(), [('c', 5, 0), ('a', 3, 0), ('b', 2, 0)])
+
+    def test_bounds_past_capacity(self):
+        summary = TopK(capacity=16)
+        for start in range(0, len(self.values), 1000):
+            chunk = TopK(capacity=16).update(Counter(self.values[start:start + 1000]))
+            summary.merge(chunk)
+        self.assertEqual(summary.total, len(self.values))
+        for value, count in summary.counts.items():
+            self.assertLessEqual(count - summary.errors[value], self.true_counts[value], value)
+            self.assertGreaterEqual(count, self.true_counts[value], value)
+        for value, count in self.true_counts.items():
+            if value not in summary.counts:
+                self.assertLessEqual(count, summary.floor, value)
+        top = [value for value, _, _ in summary.top(3)]
+        self.assertEqual(top, [value for value, _ in self.true_counts.most_common(3)])
+
+    def test_string_sketch(self):
+        sketch = StringSketch().update(Counter(self.values[:10_000])).merge(StringSketch().update(Counter(self.values[10_000:])))
+        self.assertLessEqual(abs(sketch.distinct.estimate() - len(self.true_counts)), 3 * sketch.distinct.relative_error() * len(self.true_counts))
+        self.assertEqual(sketch.frequent.top(1)[0][0], self.true_counts.most_common(1)[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from core.sources import expand_dataset, source_root
+from helpers import read_csv_rows, run_main, write_csv
+
+
+class DirectoryDatasetTest(unittest.TestCase):
+    """A directory is processed as the dataset its files make up, whatever earlier runs saved into it."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.shards = os.path.join(tmp_dir.name, 'shards')
+        os.mkdir(self.shards)
+        for seed in range(4):
+            write_csv(os.path.join(self.shards, f'part_{seed}.csv'), 250, seed, missing_rate=0.0)
+
+    def test_outputs_are_not_read_back(self):
+        # Saving one file's output puts part_0_output.csv in the directory
+        run_main(os.path.join(self.shards, 'part_0.csv'), '--output', 'csv', '--compute', 'Profit')
+        self.assertTrue(os.path.exists(os.path.join(self.shards, 'part_0_output.csv')))
+        self.assertEqual(len(expand_dataset(self.shards)), 4)
+
+        output_path = source_root(self.shards) + '_output.csv'
+        for _ in range(2):
+            run_main(self.shards, '--output', 'csv', '--compute', 'Profit', '--workers', '1', '--batch-size', '300')
+            rows = read_csv_rows(output_path)
+            self.assertEqual(len(rows), 1000)
+        self.assertEqual(len(expand_dataset(self.shards)), 4)
+
+    def test_partitioned_outputs_are_not_read_back(self):
+        run_main(self.shards, '--output', 'csv', '--partition-by', 'Region', '--workers', '1')
+        self.assertEqual(len(expand_dataset(os.path.join(self.shards + '_output', '*.csv'))), 0)
+        self.assertEqual(len(expand_dataset(os.path.join(os.path.dirname(self.shards), '*', '*.csv'))), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import random
+import statistics
+import unittest
+
+from core.stats import RunningStats
+
+
+class RunningStatsTest(unittest.TestCase):
+    """One pass over the values, or any split of them merged back, gives their mean, variance, min and max."""
+
+    def setUp(self):
+        rng = random.Random(4)
+        self.values = [rng.uniform(-500, 5000) for _ in range(1000)]
+
+    def assertMatches(self, stats, values):
+        self.assertEqual(stats.count, len(values))
+        self.assertAlmostEqual(stats.mean, statistics.fmean(values), places=6)
+        self.assertAlmostEqual(stats.variance, statistics.pvariance(values), places=4)
+        self.assertEqual((stats.min, stats.max), (min(values), max(values)))
+
+    def test_one_pass(self):
+        self.assertMatches(RunningStats.from_values(self.values), self.values)
+
+    def test_merge_of_any_split(self):
+        for sizes in ([500, 500], [1, 999], [300, 0, 200, 500]):
+            with self.subTest(sizes=sizes):
+                merged, start = RunningStats(), 0
+                for size in sizes:
+                    merged.merge(RunningStats.from_values(self.values[start:start + size]))
+                    start += size
+                self.assertMatches(merged, self.values)
+
+    def test_merge_leaves_other_unchanged(self):
+        left, right = RunningStats.from_values(self.values[:10]), RunningStats.from_values(self.values[10:20])
+        left.merge(right)
+        self.assertMatches(right, self.values[10:20])
+
+    def test_empty(self):
+        stats = RunningStats()
+        self.assertEqual((stats.count, stats.variance), (0, 0.0))
+        self.assertEqual(stats.merge(RunningStats()).count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
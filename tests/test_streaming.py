@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from core.io import iter_csv, load_csv
+from core.schema import Schema
+from helpers import rounded, runners, write_csv
+
+CONFIGS = {
+    'remove': {
+        'missing_data_action': 'remove',
+        'filter': {'apply': True, 'column': 'Sales_Amount', 'operator': '>', 'value': 3000.0},
+        'compute': 'Profit',
+        'aggregate': 'Aggregate total sales by region',
+    },
+    'fill': {
+        'missing_data_action': 'fill',
+        'compute': 'Profit',
+        'group_by': {'keys': ['Region', 'Sale_Date:month'], 'aggregates': ['count', 'mean:Sales_Amount']},
+    },
+}
+
+
+class BatchedRunTest(unittest.TestCase):
+    """Running the pipeline batch by batch gives the rows, report and aggregation of one run over the whole file."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.dataset = os.path.join(tmp_dir.name, 'sales.csv')
+        write_csv(self.dataset, 300, missing_rate=0.05)
+        self.schema = Schema.infer(next(iter_csv(self.dataset, 100)))
+
+    def test_batches_match_whole_file(self):
+        for name, runner in runners():
+            for action, config in CONFIGS.items():
+                with self.subTest(runner=name, missing=action):
+                    output, report, aggregation = runner.run_pipeline(dict(config), load_csv(self.dataset), self.schema)
+
+                    batches = []
+                    num_rows, batch_report, batch_aggregation = runner.run_pipeline_stream(
+                        dict(config), lambda: iter_csv(self.dataset, 37), lambda batch: batches.append([dict(row) for row in batch]), self.schema
+                    )
+                    self.assertGreater(len(batches), 1)
+                    self.assertEqual(num_rows, len(output))
+                    self.assertEqual(rounded([row for batch in batches for row in batch]), rounded([dict(row) for row in output]))
+                    self.assertEqual(rounded(batch_report), rounded(report))
+                    self.assertEqual(rounded(batch_aggregation), rounded(aggregation))
+
+    def test_workers_give_the_same_result(self):
+        _, runner = next(runners())
+        config = CONFIGS['remove']
+        load_batches = lambda: iter_csv(self.dataset, 50)
+        one = runner.run_pipeline_stream(dict(config), load_batches, None, self.schema, workers=1)
+        two = runner.run_pipeline_stream(dict(config), load_batches, None, self.schema, workers=2)
+        self.assertEqual(rounded(two), rounded(one))
+
+
+if __name__ == '__main__':
+    unittest.main()
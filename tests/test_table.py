@@ -0,0 +1,72 @@
+import unittest
+
+from benchmarks.generate import generate_rows
+from core.schema import Schema
+from core.table import DictColumn, NumberColumn, Table
+from helpers import rounded, runners
+
+ROWS = [
+    {'Region': 'North', 'Sales_Amount': 10.0},
+    {'Region': 'West', 'Sales_Amount': None},
+    {'Region': 'North', 'Sales_Amount': 30.5},
+]
+
+
+class TableTest(unittest.TestCase):
+    """A Table reads back the rows it was built from, whatever storage each column ended up in."""
+
+    def test_round_trip(self):
+        table = Table.from_rows([dict(row) for row in ROWS])
+        self.assertIsInstance(table.columns['Sales_Amount'], NumberColumn)
+        self.assertIsInstance(table.columns['Region'], DictColumn)
+        self.assertEqual(table.columns['Region'].dictionary, ['North', 'West'])
+        self.assertEqual(table.to_rows(), ROWS)
+
+    def test_number_column_falls_back_to_dictionary(self):
+        batches = [[{'Amount': '1'}, {'Amount': '2'}], [{'Amount': 'n/a'}]]
+        table = Table.from_batches(batches, {'Amount': 'number'})
+        self.assertIsInstance(table.columns['Amount'], DictColumn)
+        self.assertEqual(list(table.columns['Amount']), [1.0, 2.0, 'n/a'])
+
+    def test_rows_write_through(self):
+        table = Table.from_rows([dict(row) for row in ROWS])
+        table[1]['Sales_Amount'] = 20.0
+        table[0]['Region'] = 'South'
+        table[2]['Sales_Amount'] = 'unknown'
+        self.assertEqual(
+            table.to_rows(),
+            [{'Region': 'South', 'Sales_Amount': 10.0}, {'Region': 'West', 'Sales_Amount': 20.0}, {'Region': 'North', 'Sales_Amount': 'unknown'}]
+        )
+
+    def test_filter_and_slice_assignment(self):
+        table = Table.from_rows([dict(row) for row in ROWS])
+        self.assertEqual(table.filter([True, False, True]).to_rows(), [ROWS[0], ROWS[2]])
+        table[:] = [row for row in table if row['Region'] == 'North']
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.columns['Region'].dictionary, ['North'])
+
+    def test_concat(self):
+        parts = [Table.from_rows([dict(row)]) for row in ROWS]
+        self.assertEqual(Table.concat(parts).to_rows(), ROWS)
+
+
+class TableInputTest(unittest.TestCase):
+    """Every implementation gives the same results on a Table as on the list of rows it holds."""
+
+    def test_table_matches_rows(self):
+        rows = list(generate_rows(200, seed=3))
+        schema = Schema.infer(rows)
+        config = {'missing_data_action': 'remove', 'compute': 'Profit', 'aggregate': 'Aggregate total sales by region'}
+        for name, runner in runners():
+            with self.subTest(runner=name):
+                output, report, aggregation = runner.run_pipeline(dict(config), [dict(row) for row in rows], schema)
+                table_output, table_report, table_aggregation = runner.run_pipeline(
+                    dict(config), Table.from_batches([[dict(row) for row in rows]], schema), schema
+                )
+                self.assertEqual(rounded([dict(row) for row in table_output]), rounded([dict(row) for row in output]))
+                self.assertEqual(rounded(table_report), rounded(report))
+                self.assertEqual(rounded(table_aggregation), rounded(aggregation))
+
+
+if __name__ == '__main__':
+    unittest.main()